@@ -6,19 +6,30 @@ from issuer.db.models import (
     Project,
     ProjectToUser,
     Issue,
+    ProjectIssueStats,
+    IssueFollower,
+    IssueAssignee,
+    IssueTag,
     Metas,
     IssueComment,
     Activity,
+    Timeline,
     Notice,
+    Job,
+    WebhookDelivery,
 )
 from issuer.db.users import (
+    USER_TOKEN_CACHE,
+    TOKEN_REVOCATIONS,
     insert_user,
     delete_all_users,
     find_user_by_email,
     update_user_by_code,
     delete_user_by_code,
     find_user_by_code,
+    find_user_by_token,
     list_users,
+    list_users_by_codes,
 )
 from issuer.db.user_group import (
     insert_user_group,
@@ -35,6 +46,7 @@ from issuer.db.project import (
     update_project_by_code,
     delete_project_by_code,
     find_project_by_code,
+    list_projects_by_codes,
     list_project_by_owner,
     delete_all_projects,
     list_projects_by_condition,
@@ -49,9 +61,13 @@ from issuer.db.issue import (
     count_issues_by_condition,
     find_issue_by_code,
     find_issue_by_project_and_code_id,
+    list_issues_by_project_and_code_ids,
+    update_issues_status,
+    list_issues_by_codes,
 )
 from issuer.db.issue_comment import (
     insert_issue_comment,
+    insert_issue_comments,
     delete_all_issue_comments,
     update_issue_comment_by_code,
     delete_issue_comment_by_issue,
@@ -70,17 +86,26 @@ from issuer.db.relationships import (
     insert_project_to_user,
     delete_project_to_user_by_project_and_user,
     list_project_to_user_by_project,
+    list_project_to_user_by_projects,
     list_project_to_user_by_user,
     delete_all_project_to_user,
     delete_project_to_user_by_project,
     count_user_to_user_group_by_user,
 )
-from issuer.db.metas import insert_metas, delete_metas, list_metas_by_type
+from issuer.db.metas import (
+    METAS_REGISTRY,
+    insert_metas,
+    delete_metas,
+    list_metas_by_type,
+    load_metas,
+)
 from issuer.db.activity import (
     insert_activity,
+    insert_activities,
     delete_activity_by_create_time,
     list_activities_by_subject,
     list_activities_by_targets,
+    list_timeline_activities,
 )
 from issuer.db.notice import (
     insert_notice,
@@ -88,3 +113,30 @@ from issuer.db.notice import (
     delete_notice_by_code,
     delete_all_notices,
 )
+from issuer.db.cascade import delete_project_cascade
+from issuer.db.seed import seed_database
+from issuer.db.webhook import (
+    DELIVERY_CACHE,
+    record_webhook_delivery,
+    delete_all_webhook_deliveries,
+)
+from issuer.db.archive import archive_activities, list_archived_activities
+from issuer.db.job import (
+    insert_job,
+    claim_jobs,
+    complete_job,
+    retry_job,
+    fail_job,
+    recover_jobs,
+    count_jobs_by_status,
+    delete_all_jobs,
+)
+from issuer.db.stats import (
+    rebuild_project_issue_stats,
+    stat_issues_by_status,
+    stat_issues_by_date,
+    stat_issues_by_date_and_status,
+)
+from issuer.db.migrations import run_migrations
+from issuer.db.pagination import decode_cursor, next_cursor
+from issuer.db.search import SEARCH_BACKEND, search_issues
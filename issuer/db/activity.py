@@ -1,20 +1,66 @@
 from datetime import datetime
 import logging
-from typing import Optional, Sequence
+from typing import List, Optional, Sequence
 
+from sqlalchemy import delete, insert, literal, union
 from sqlmodel import Session, or_, select
 
-from issuer.db.database import DatabaseFactory
-from issuer.db.models import Activity
+from issuer.db.bulk import delete_in_chunks, delete_where
+from issuer.db.database import get_session
+from issuer.db.models import (
+    Activity,
+    IssueFollower,
+    ProjectToUser,
+    Timeline,
+    UserToUserGroup,
+)
 
 
 Logger = logging.getLogger(__name__)
 
 
+def _audience(target, activity_id, *criteria):
+    """活动对象的相关用户：用户组成员、项目参与者和议题关注者"""
+    return union(
+        select(UserToUserGroup.user_code, activity_id).where(
+            UserToUserGroup.group_code == target, *criteria
+        ),
+        select(ProjectToUser.user_code, activity_id).where(
+            ProjectToUser.project_code == target, *criteria
+        ),
+        select(IssueFollower.user_code, activity_id).where(
+            IssueFollower.issue_code == target, *criteria
+        ),
+    )
+
+
+def fan_out_activity(session: "Session", activity: "Activity") -> None:
+    """在:arg:`session`的事务中将已写入的活动分发到相关用户的时间线"""
+    session.exec(
+        insert(Timeline).from_select(
+            ["user_code", "activity_id"],
+            _audience(literal(activity.target), literal(activity.id)),
+        )
+    )
+
+
+def rebuild_timeline(session: "Session") -> None:
+    """在:arg:`session`的事务中根据当前的所属、参与和关注关系重建时间线"""
+    session.exec(delete(Timeline))
+    session.exec(
+        insert(Timeline).from_select(
+            ["user_code", "activity_id"],
+            _audience(Activity.target, Activity.id),
+        )
+    )
+
+
 def insert_activity(activity: "Activity") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session() as session:
             session.add(activity)
+            session.flush()
+            fan_out_activity(session, activity)
             session.commit()
             session.refresh(activity)
     except Exception as e:
@@ -23,14 +69,26 @@ def insert_activity(activity: "Activity") -> bool:
     return True
 
 
-def delete_activity_by_create_time(create_time: datetime) -> bool:
+def insert_activities(activities: Sequence["Activity"]) -> bool:
+    """用一条多行INSERT写入多条活动，并用一条INSERT ... SELECT分发到时间线"""
+    if len(activities) == 0:
+        return True
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(Activity).where(Activity.gmt_create < create_time)
-            results = session.exec(stmt).all()
-
-            for result in results:
-                session.delete(result)
+        with get_session() as session:
+            rows = [
+                activity.model_dump(exclude={"id"}) for activity in activities
+            ]
+            ids = session.scalars(
+                insert(Activity).returning(Activity.id), rows
+            ).all()
+            session.exec(
+                insert(Timeline).from_select(
+                    ["user_code", "activity_id"],
+                    _audience(
+                        Activity.target, Activity.id, Activity.id.in_(ids)
+                    ),
+                )
+            )
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -38,11 +96,29 @@ def delete_activity_by_create_time(create_time: datetime) -> bool:
     return True
 
 
+def _delete_timelines(session: "Session", activity_ids: List[int]) -> None:
+    delete_where(session, Timeline, Timeline.activity_id.in_(activity_ids))
+
+
+def delete_activity_by_create_time(create_time: datetime) -> bool:
+    try:
+        count = delete_in_chunks(
+            Activity,
+            Activity.gmt_create < create_time,
+            before_chunk=_delete_timelines,
+        )
+        Logger.info(f"Deleted {count} activities before {create_time}")
+    except Exception as e:
+        Logger.error(e)
+        return False
+    return True
+
+
 def list_activities_by_subject(
     subject: str, limit: Optional[int] = None
 ) -> Sequence["Activity"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = (
                 select(Activity)
                 .where(Activity.subject == subject)
@@ -61,7 +137,7 @@ def list_activities_by_targets(
     targets: Sequence[str], limit: Optional[int] = None
 ) -> Sequence["Activity"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(Activity)
             or_clauses = []
             for target in targets:
@@ -74,3 +150,31 @@ def list_activities_by_targets(
     except Exception as e:
         Logger.error(e)
     return []
+
+
+def list_timeline_activities(
+    user_code: str, limit: Optional[int] = None
+) -> Sequence["Activity"]:
+    """
+    按时间倒序获取用户时间线中的活动，只需在时间线上按用户码做一次索引范围扫描。
+
+    Args:
+        user_code: 用户码。
+        limit: 返回的最大条数，为空时不限制。
+
+    """
+    try:
+        with get_session(read_only=True) as session:
+            stmt = (
+                select(Activity)
+                .join(Timeline, Timeline.activity_id == Activity.id)
+                .where(Timeline.user_code == user_code)
+                .order_by(Timeline.activity_id.desc())
+            )
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            results = session.exec(stmt).all()
+            return results
+    except Exception as e:
+        Logger.error(e)
+    return []
@@ -0,0 +1,191 @@
+"""
+:mod:`issuer.db`的异步版本，提供与其同名的函数，供``async def``的路由处理函数
+await，例如：
+
+    from issuer.db import aio
+
+    user = await aio.find_user_by_code(user_code)
+
+``DB_EXECUTION_MODE``为``async``时各函数在请求级的异步会话作用域中通过greenlet
+执行，数据库IO由``DB_URL``对应的异步驱动（aiosqlite、asyncpg）完成，等待IO时
+事件循环可以处理其他请求；为``threadpool``时交给大小为``DB_THREADPOOL_SIZE``的
+线程池执行，作为没有异步驱动时的过渡方案；为``sync``时直接在事件循环中执行。
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from issuer import db
+from issuer.config import GET_CONFIG
+from issuer.db.database import (
+    AsyncSessionScope,
+    SessionScope,
+    async_session_scope,
+    current_scope,
+    session_scope,
+    threaded_session_scope,
+)
+
+
+EXECUTION_MODE = GET_CONFIG("DB_EXECUTION_MODE", "async")
+"""``db``函数的执行方式，可选async、threadpool和sync"""
+
+
+class DbThreadPool:
+    """
+    执行``db``函数的有界线程池。同时处于会话作用域中的请求数不超过线程数，避免
+    所有线程都在等待被其他请求占用的数据库连接。
+
+    Args:
+        size: 线程数。
+
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.executor = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix="issuer-db"
+        )
+        self.scopes = asyncio.Semaphore(size)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.waiting_scopes = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """在线程池中执行:arg:`fn`，并沿用当前的上下文变量，如会话作用域"""
+        context = contextvars.copy_context()
+        submitted = time.monotonic()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        def task():
+            wait = time.monotonic() - submitted
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        return await asyncio.wrap_future(self.executor.submit(task))
+
+    @asynccontextmanager
+    async def scope(
+        self, sticky_key: Optional[str] = None, sticky: bool = False
+    ) -> AsyncIterator["SessionScope"]:
+        """开启请求级的会话作用域，作用域数达到线程数时异步等待"""
+        self.waiting_scopes += 1
+        try:
+            await self.scopes.acquire()
+        finally:
+            self.waiting_scopes -= 1
+        try:
+            async with threaded_session_scope(
+                self.run, sticky_key, sticky
+            ) as scope:
+                yield scope
+        finally:
+            self.scopes.release()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            completed = max(self.completed, 1)
+            return {
+                "size": self.size,
+                "active": self.active,
+                "saturation": self.active / self.size,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "waiting_scopes": self.waiting_scopes,
+                "completed": self.completed,
+                "avg_wait_ms": self.total_wait / completed * 1000,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+DB_THREAD_POOL = DbThreadPool(int(GET_CONFIG("DB_THREADPOOL_SIZE", 8)))
+"""``threadpool``执行方式下使用的线程池，线程在首次使用时创建"""
+
+
+SYNC_ONLY = {
+    "archive_activities",
+    "decode_cursor",
+    "list_archived_activities",
+    "next_cursor",
+    "run_migrations",
+    "seed_database",
+}
+"""
+:mod:`issuer.db`中不访问数据库、只在启动时调用或须在会话作用域之外分批提交的
+函数，不提供异步版本
+"""
+
+
+@asynccontextmanager
+async def request_scope(
+    sticky_key: Optional[str] = None, sticky: bool = False
+) -> AsyncIterator["SessionScope"]:
+    """
+    按执行方式开启请求级的会话作用域。
+
+    Args:
+        sticky_key: 标识请求方的键，用于只读副本的读写一致性。
+        sticky: 是否所有读取都走主库。
+
+    """
+    if EXECUTION_MODE == "sync":
+        with session_scope(sticky_key, sticky) as scope:
+            yield scope
+    elif EXECUTION_MODE == "threadpool":
+        async with DB_THREAD_POOL.scope(sticky_key, sticky) as scope:
+            yield scope
+    else:
+        async with async_session_scope(sticky_key, sticky) as scope:
+            yield scope
+
+
+async def run(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    执行访问数据库的同步代码，如转换函数或外部系统的适配器。处于异步会话作用域时
+    在该作用域中执行，否则开启一个独立的作用域。
+    """
+    if EXECUTION_MODE == "sync":
+        return fn(*args, **kwargs)
+    if EXECUTION_MODE == "threadpool":
+        return await DB_THREAD_POOL.run(fn, *args, **kwargs)
+    scope = current_scope()
+    if isinstance(scope, AsyncSessionScope):
+        return await scope.run(fn, *args, **kwargs)
+    async with async_session_scope() as scope:
+        return await scope.run(fn, *args, **kwargs)
+
+
+def _to_async(fn: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+for _name, _fn in inspect.getmembers(db, inspect.isfunction):
+    if _name not in SYNC_ONLY:
+        globals()[_name] = _to_async(_fn)
@@ -0,0 +1,163 @@
+from collections import defaultdict
+from datetime import date, datetime
+import glob
+import gzip
+import json
+import logging
+import os
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+from sqlmodel import select
+
+from issuer.config import GET_CONFIG
+from issuer.db.bulk import DELETE_CHUNK_SIZE, delete_where
+from issuer.db.database import get_session
+from issuer.db.models import Activity, Timeline
+
+
+Logger = logging.getLogger(__name__)
+
+
+def get_archive_dir() -> str:
+    default = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "archive",
+    )
+    return GET_CONFIG("ACTIVITY_ARCHIVE_DIR") or default
+
+
+def _archive_path(archive_dir: str, month: str, run_id: str) -> str:
+    # 每次归档每月写入一个独立的分片，多个进程同时归档时互不干扰
+    return os.path.join(archive_dir, f"activity-{month}.{run_id}.jsonl.gz")
+
+
+def _archive_paths(archive_dir: str, month: str) -> List[str]:
+    # 兼容按月追加写入的旧归档文件
+    return sorted(
+        glob.glob(os.path.join(archive_dir, f"activity-{month}.jsonl.gz"))
+        + glob.glob(os.path.join(archive_dir, f"activity-{month}.*.jsonl.gz"))
+    )
+
+
+def _months(start: date, end: date) -> List[str]:
+    months = list()
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _write_archive(
+    archive_dir: str, run_id: str, activities: Sequence["Activity"]
+) -> None:
+    rows: Dict[str, List[str]] = defaultdict(list)
+    for activity in activities:
+        rows[activity.gmt_create.strftime("%Y-%m")].append(
+            activity.model_dump_json()
+        )
+    os.makedirs(archive_dir, exist_ok=True)
+    for month, lines in rows.items():
+        # 分片只由本次归档写入，每批追加一个gzip成员；写了一半的成员在读取时跳过，
+        # 对应的活动尚未从数据库删除
+        with gzip.open(_archive_path(archive_dir, month, run_id), "at") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def _read_archive(path: str) -> List["Activity"]:
+    # 损坏的文件或行只跳过自身，保留已读出的活动
+    activities = list()
+    try:
+        with gzip.open(path, "rt") as f:
+            for line in f:
+                try:
+                    activity = Activity.model_validate(json.loads(line))
+                except Exception as e:
+                    Logger.warning(f"Skip malformed line in {path}: {e}")
+                    continue
+                activities.append(activity)
+    except Exception as e:
+        Logger.error(f"Failed to read {path}: {e}")
+    return activities
+
+
+def archive_activities(
+    before: datetime, chunk_size: Optional[int] = None
+) -> Optional[int]:
+    """
+    将:arg:`before`之前创建的活动按月写入压缩的JSONL归档分片，并从活动表和时间线
+    中分批删除，每次归档每月只生成一个分片。每批先写入归档再提交删除，中途失败时重新执行可能使归档中出现重复的
+    活动，读取归档时按主键去重。
+
+    Args:
+        before: 归档该时间之前创建的活动。
+        chunk_size: 每批的行数，默认为``DB_DELETE_CHUNK_SIZE``。
+
+    Returns:
+        归档的活动数，失败时返回``None``。
+
+    """
+    chunk_size = chunk_size or DELETE_CHUNK_SIZE
+    archive_dir = get_archive_dir()
+    run_id = uuid.uuid4().hex
+    total = 0
+    try:
+        while True:
+            with get_session() as session:
+                stmt = (
+                    select(Activity)
+                    .where(Activity.gmt_create < before)
+                    .order_by(Activity.id)
+                    .limit(chunk_size)
+                )
+                activities = session.exec(stmt).all()
+                if len(activities) == 0:
+                    break
+                _write_archive(archive_dir, run_id, activities)
+                ids = [activity.id for activity in activities]
+                delete_where(session, Timeline, Timeline.activity_id.in_(ids))
+                delete_where(session, Activity, Activity.id.in_(ids))
+                session.commit()
+            total += len(activities)
+            if len(activities) < chunk_size:
+                break
+    except Exception as e:
+        Logger.error(e)
+        return None
+    Logger.info(f"Archived {total} activities before {before}")
+    return total
+
+
+def list_archived_activities(
+    start: date,
+    end: date,
+    subject: Optional[str] = None,
+    target: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List["Activity"]:
+    """
+    按时间倒序查询已归档的活动，只读取日期范围覆盖的月份的归档文件。
+
+    Args:
+        start: 起始日期，包含当天。
+        end: 结束日期，包含当天。
+        subject: 活动主体。
+        target: 活动对象。
+        limit: 返回的最大条数，为空时不限制。
+
+    """
+    archive_dir = get_archive_dir()
+    activities: Dict[int, "Activity"] = dict()
+    for month in _months(start, end):
+        for path in _archive_paths(archive_dir, month):
+            for activity in _read_archive(path):
+                if not start <= activity.gmt_create.date() <= end:
+                    continue
+                if subject is not None and activity.subject != subject:
+                    continue
+                if target is not None and activity.target != target:
+                    continue
+                activities[activity.id] = activity
+    results = sorted(activities.values(), key=lambda a: a.id, reverse=True)
+    return results[:limit] if limit is not None else results
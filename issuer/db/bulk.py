@@ -0,0 +1,78 @@
+import logging
+from typing import Callable, List, Optional, Type
+
+from sqlalchemy import delete
+from sqlalchemy.exc import NoResultFound
+from sqlmodel import Session, select
+
+from issuer.config import GET_CONFIG
+from issuer.db.database import get_session
+
+
+Logger = logging.getLogger(__name__)
+
+
+DELETE_CHUNK_SIZE = int(GET_CONFIG("DB_DELETE_CHUNK_SIZE", 1000))
+"""分批删除时每批删除的最大行数"""
+
+
+def delete_where(session: "Session", model: Type, *criteria) -> int:
+    """
+    在:arg:`session`的事务中执行``DELETE ... WHERE``，被删除的行不加载到会话中。
+
+    Returns:
+        删除的行数。
+
+    """
+    return session.exec(delete(model).where(*criteria)).rowcount
+
+
+def delete_one(session: "Session", model: Type, *criteria) -> int:
+    """同:func:`delete_where`，没有匹配的行时抛出``NoResultFound``"""
+    count = delete_where(session, model, *criteria)
+    if count == 0:
+        raise NoResultFound(f"No {model.__name__} was found for deletion")
+    return count
+
+
+def delete_in_chunks(
+    model: Type,
+    *criteria,
+    before_chunk: Optional[Callable[["Session", List[int]], None]] = None,
+    chunk_size: Optional[int] = None,
+) -> int:
+    """
+    分批删除匹配的行。每批先取出至多:arg:`chunk_size`个主键再按主键删除，并单独
+    提交，删除大范围的数据时内存占用与写锁的持有时间都有上限。处于会话作用域时
+    各批在作用域的事务中执行，随作用域一并提交。
+
+    Args:
+        model: 被删除的模型，须有自增主键``id``。
+        criteria: 删除条件。
+        before_chunk: 删除每批之前在同一事务中调用，用于清理依赖这批行的数据。
+        chunk_size: 每批的行数，默认为``DB_DELETE_CHUNK_SIZE``。
+
+    Returns:
+        删除的行数。
+
+    """
+    chunk_size = chunk_size or DELETE_CHUNK_SIZE
+    total = 0
+    while True:
+        with get_session() as session:
+            ids = session.exec(
+                select(model.id)
+                .where(*criteria)
+                .order_by(model.id)
+                .limit(chunk_size)
+            ).all()
+            if len(ids) == 0:
+                break
+            if before_chunk is not None:
+                before_chunk(session, ids)
+            delete_where(session, model, model.id.in_(ids))
+            session.commit()
+        total += len(ids)
+        if len(ids) < chunk_size:
+            break
+    return total
@@ -0,0 +1,103 @@
+import logging
+from typing import Dict, Optional
+
+from sqlmodel import or_, select
+
+from issuer.db.bulk import delete_one, delete_where
+from issuer.db.database import forget_identity, get_session
+from issuer.db.issue import ISSUE_RELATIONS, _issue_id_counter
+from issuer.db.models import (
+    Activity,
+    Counter,
+    Issue,
+    IssueComment,
+    Project,
+    ProjectIssueStats,
+    ProjectToUser,
+    Timeline,
+)
+from issuer.db.search import unindex
+
+
+Logger = logging.getLogger(__name__)
+
+
+def delete_project_cascade(project_code: str) -> Optional[Dict[str, int]]:
+    """
+    在一个事务中删除项目及其全部议题、评论、议题关系、参与者、统计和活动，每类数据
+    各用一条``DELETE ... WHERE``语句删除，不加载被删除的行。
+
+    Args:
+        project_code: 项目code。
+
+    Returns:
+        各类数据被删除的行数，项目不存在或删除失败时返回``None``。
+
+    """
+    issue_codes = select(Issue.issue_code).where(
+        Issue.project_code == project_code
+    )
+    counts = dict()
+    try:
+        with get_session() as session:
+            issue_ids = session.exec(
+                select(Issue.id).where(Issue.project_code == project_code)
+            ).all()
+            comment_ids = session.exec(
+                select(IssueComment.id).where(
+                    IssueComment.issue_code.in_(issue_codes)
+                )
+            ).all()
+            unindex(session, "issue", issue_ids)
+            unindex(session, "comment", comment_ids)
+
+            activity_target = or_(
+                Activity.target == project_code,
+                Activity.target.in_(issue_codes),
+            )
+            delete_where(
+                session,
+                Timeline,
+                Timeline.activity_id.in_(
+                    select(Activity.id).where(activity_target)
+                ),
+            )
+            counts["activities"] = delete_where(
+                session, Activity, activity_target
+            )
+            counts["comments"] = delete_where(
+                session, IssueComment, IssueComment.issue_code.in_(issue_codes)
+            )
+            for model, _, name in ISSUE_RELATIONS:
+                counts[name] = delete_where(
+                    session, model, model.issue_code.in_(issue_codes)
+                )
+            # 批量删除不经过统计表的维护监听，统计行需一并删除
+            delete_where(
+                session,
+                ProjectIssueStats,
+                ProjectIssueStats.project_code == project_code,
+            )
+            delete_where(
+                session,
+                Counter,
+                Counter.name == _issue_id_counter(project_code),
+            )
+            counts["issues"] = delete_where(
+                session, Issue, Issue.project_code == project_code
+            )
+            counts["members"] = delete_where(
+                session,
+                ProjectToUser,
+                ProjectToUser.project_code == project_code,
+            )
+            counts["projects"] = delete_one(
+                session, Project, Project.project_code == project_code
+            )
+            session.commit()
+    except Exception as e:
+        Logger.error(e)
+        return None
+    forget_identity(Project, project_code)
+    forget_identity(Issue)
+    return counts
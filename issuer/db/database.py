@@ -1,11 +1,36 @@
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import itertools
 import os
-from typing import ClassVar
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
 
-from sqlalchemy import Engine
-from sqlmodel import SQLModel, create_engine
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.orm import object_session
+from sqlmodel import Session, SQLModel, create_engine
 
+from issuer.cache import TTLCache
 from issuer.config import GET_CONFIG
 from issuer.db import models
+from issuer.db.engine import configure_engine, engine_options
 
 
 def get_default_db_url() -> str:
@@ -18,14 +43,138 @@ def get_default_db_url() -> str:
 SQLALCHEMY_DB_URL = GET_CONFIG("DB_URL", get_default_db_url())
 
 
+def get_read_db_urls() -> List[str]:
+    """``DB_READ_URLS``中逗号分隔的只读副本连接串"""
+    urls = GET_CONFIG("DB_READ_URLS", "")
+    return [url.strip() for url in urls.split(",") if url.strip() != ""]
+
+
+STICKY_SECONDS = float(GET_CONFIG("DB_READ_STICKY_SECONDS", 5))
+"""请求方写入后其读取仍走主库的秒数"""
+
+
+RECENT_WRITERS = TTLCache(
+    int(GET_CONFIG("DB_READ_STICKY_SIZE", 4096)),
+    ttl=STICKY_SECONDS,
+)
+"""
+本进程中最近写入过的请求方，其后续请求的读取在存活时间内仍走主库。只在进程内
+有效，多进程部署时依靠:data:`LAST_WRITE_COOKIE`
+"""
+
+
+LAST_WRITE_COOKIE = "last_write"
+"""记录请求方最近一次写入时间的Cookie，后续请求无论落在哪个进程都能据此读主库"""
+
+
+def wrote_recently(last_write: Optional[str]) -> bool:
+    """:data:`LAST_WRITE_COOKIE`中的写入时间是否在:data:`STICKY_SECONDS`以内"""
+    try:
+        return time.time() - float(last_write) < STICKY_SECONDS
+    except (TypeError, ValueError):
+        return False
+
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+"""各数据库默认使用的异步驱动"""
+
+
+def get_async_db_url(url: str) -> str:
+    """
+    将:arg:`url`转换为异步驱动的连接串，如``sqlite:///issuer.db``转换为
+    ``sqlite+aiosqlite:///issuer.db``，已指定异步驱动时保持不变。
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if url.get_dialect().is_async or backend not in ASYNC_DRIVERS:
+        return url.render_as_string(hide_password=False)
+    url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url.render_as_string(hide_password=False)
+
+
+def _begin_before_savepoint(
+    conn, cursor, statement, parameters, context, executemany
+):
+    # pysqlite只会在DML语句前隐式开启事务，SAVEPOINT语句会自行开启一个事务并在
+    # RELEASE时提交。这里在第一个SAVEPOINT之前显式开启写事务，使请求级会话中的
+    # 所有写入在请求结束时一次提交。
+    if statement.startswith("SAVEPOINT"):
+        driver_connection = conn.connection.driver_connection
+        if not driver_connection.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+
+
+def _listen_engine(engine: "Engine") -> None:
+    configure_engine(engine)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "before_cursor_execute", _begin_before_savepoint)
+
+
+def _create_async_engine(url: str) -> "AsyncEngine":
+    async_db_url = get_async_db_url(url)
+    engine = create_async_engine(async_db_url, **engine_options(async_db_url))
+    _listen_engine(engine.sync_engine)
+    return engine
+
+
 class Database:
-    def __init__(self):
-        self.engine = create_engine(SQLALCHEMY_DB_URL)
+    """
+    主库引擎以及只读副本引擎。副本由外部复制，这里不会在副本上创建表。
+
+    Args:
+        url: 主库连接串，默认为``DB_URL``。
+        read_urls: 只读副本连接串，默认为``DB_READ_URLS``。
+
+    """
+
+    def __init__(
+        self, url: Optional[str] = None, read_urls: Optional[List[str]] = None
+    ):
+        self.url = url or SQLALCHEMY_DB_URL
+        self.read_urls = (
+            read_urls if read_urls is not None else get_read_db_urls()
+        )
+        self.engine = create_engine(self.url, **engine_options(self.url))
+        _listen_engine(self.engine)
         SQLModel.metadata.create_all(self.engine)
+        self.read_engines: List["Engine"] = list()
+        for read_url in self.read_urls:
+            read_engine = create_engine(read_url, **engine_options(read_url))
+            configure_engine(read_engine)
+            self.read_engines.append(read_engine)
+        self._read_engines = itertools.cycle(self.read_engines)
+        self.async_engine: Optional["AsyncEngine"] = None
+        self.async_read_engines: Optional[List["AsyncEngine"]] = None
+        self._async_read_engines = None
 
     def get_engine(self) -> "Engine":
         return self.engine
 
+    def has_replicas(self) -> bool:
+        return len(self.read_urls) > 0
+
+    def get_read_engine(self) -> "Engine":
+        """轮流返回只读副本引擎，没有副本时返回主库引擎"""
+        if not self.has_replicas():
+            return self.engine
+        return next(self._read_engines)
+
+    def get_async_engine(self) -> "AsyncEngine":
+        """与同步引擎连接同一数据库的异步引擎，首次使用时创建"""
+        if self.async_engine is None:
+            self.async_engine = _create_async_engine(self.url)
+        return self.async_engine
+
+    def get_async_read_engine(self) -> "AsyncEngine":
+        if not self.has_replicas():
+            return self.get_async_engine()
+        if self.async_read_engines is None:
+            self.async_read_engines = [
+                _create_async_engine(read_url) for read_url in self.read_urls
+            ]
+            self._async_read_engines = itertools.cycle(self.async_read_engines)
+        return next(self._async_read_engines)
+
 
 class DatabaseFactory:
     db: ClassVar["Database"] = None
@@ -35,3 +184,336 @@ class DatabaseFactory:
         if cls.db is None:
             cls.db = Database()
         return cls.db
+
+
+class ScopedSession(Session):
+    """
+    请求级会话。``db``函数中的``commit``只会flush到数据库，整个作用域结束时由
+    :class:`SessionScope`统一提交。
+    """
+
+    def commit(self) -> None:
+        self.flush()
+
+
+class SessionScope:
+    """
+    会话作用域，作用域内所有``db``函数共享同一个会话，并通过业务码维护User、
+    Project和Issue的身份映射。
+
+    配置了只读副本时，作用域内的读取使用一个副本会话；作用域写入之后，或者
+    :arg:`sticky_key`对应的请求方刚刚写入过时，读取改走主库会话以读到自己的写入。
+
+    Args:
+        engine: 主库引擎。
+        sticky_key: 标识请求方的键，如用户码。
+        sticky: 是否所有读取都走主库，如请求方的Cookie表明其刚刚写入过，或者后台
+            任务需要读到最新的数据。
+
+    """
+
+    def __init__(
+        self,
+        engine: "Engine",
+        sticky_key: Optional[str] = None,
+        sticky: bool = False,
+    ) -> None:
+        self.session = ScopedSession(engine, expire_on_commit=False)
+        self._init_scope(sticky_key, sticky)
+
+    def _init_scope(self, sticky_key: Optional[str], sticky: bool) -> None:
+        self.identities: Dict[Tuple[Type, str], Any] = dict()
+        self.callbacks: List[Callable[[], None]] = list()
+        self.rollback_callbacks: List[Callable[[], None]] = list()
+        self.sticky_key = sticky_key
+        self.sticky = sticky or (
+            sticky_key is not None and sticky_key in RECENT_WRITERS
+        )
+        self.wrote = False
+        self.rollback_only = False
+        self.read_session: Optional["Session"] = None
+
+    def _open_read_session(self) -> "Session":
+        engine = DatabaseFactory.get_db().get_read_engine()
+        return Session(engine, autoflush=False, expire_on_commit=False)
+
+    def reader(self) -> "Session":
+        """只读操作使用的会话"""
+        if self.sticky or self.wrote:
+            return self.session
+        if not DatabaseFactory.get_db().has_replicas():
+            return self.session
+        if self.read_session is None:
+            self.read_session = self._open_read_session()
+        return self.read_session
+
+    def _after_commit(self) -> None:
+        if self.wrote and self.sticky_key is not None:
+            RECENT_WRITERS.set(self.sticky_key, True)
+        for callback in self.callbacks:
+            callback()
+
+    def _after_rollback(self) -> None:
+        self.identities.clear()
+        self.callbacks.clear()
+        for callback in self.rollback_callbacks:
+            callback()
+        self.rollback_callbacks.clear()
+
+    def commit(self) -> None:
+        Session.commit(self.session)
+        self._after_commit()
+
+    def rollback(self) -> None:
+        self.session.rollback()
+        self._after_rollback()
+
+    def close(self) -> None:
+        if self.read_session is not None:
+            self.read_session.close()
+        self.session.close()
+
+
+class AsyncSessionScope(SessionScope):
+    """
+    基于异步引擎的会话作用域。``db``函数仍使用同步会话的接口，但需通过
+    :meth:`run`在greenlet中执行，数据库IO由异步驱动完成而不会阻塞事件循环。
+    """
+
+    def __init__(
+        self,
+        engine: "AsyncEngine",
+        sticky_key: Optional[str] = None,
+        sticky: bool = False,
+    ) -> None:
+        self.async_session = AsyncSession(
+            engine, sync_session_class=ScopedSession, expire_on_commit=False
+        )
+        self.session = self.async_session.sync_session
+        self.async_read_session: Optional["AsyncSession"] = None
+        self._init_scope(sticky_key, sticky)
+
+    def _open_read_session(self) -> "Session":
+        self.async_read_session = AsyncSession(
+            DatabaseFactory.get_db().get_async_read_engine(),
+            sync_session_class=Session,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        return self.async_read_session.sync_session
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        return await self.async_session.run_sync(lambda _: fn(*args, **kwargs))
+
+    async def commit(self) -> None:
+        # ``ScopedSession.commit``只会flush，这里需调用``Session.commit``
+        await self.async_session.run_sync(Session.commit)
+        self._after_commit()
+
+    async def rollback(self) -> None:
+        await self.async_session.rollback()
+        self._after_rollback()
+
+    async def close(self) -> None:
+        if self.async_read_session is not None:
+            await self.async_read_session.close()
+        await self.async_session.close()
+
+
+_CURRENT_SCOPE: ContextVar[Optional["SessionScope"]] = ContextVar(
+    "current_scope", default=None
+)
+
+
+def current_scope() -> Optional["SessionScope"]:
+    return _CURRENT_SCOPE.get()
+
+
+@contextmanager
+def session_scope(
+    sticky_key: Optional[str] = None, sticky: bool = False
+) -> Iterator["SessionScope"]:
+    """
+    开启一个会话作用域，正常退出时提交，出现异常时回滚。已处于作用域内时复用外层
+    作用域。
+
+    Args:
+        sticky_key: 标识请求方的键，见:class:`SessionScope`。
+        sticky: 是否所有读取都走主库，见:class:`SessionScope`。
+
+    """
+    scope = _CURRENT_SCOPE.get()
+    if scope is not None:
+        yield scope
+        return
+    scope = SessionScope(
+        DatabaseFactory.get_db().get_engine(), sticky_key, sticky
+    )
+    token = _CURRENT_SCOPE.set(scope)
+    try:
+        yield scope
+        if scope.rollback_only:
+            scope.rollback()
+        else:
+            scope.commit()
+    except Exception:
+        scope.rollback()
+        raise
+    finally:
+        _CURRENT_SCOPE.reset(token)
+        scope.close()
+
+
+@asynccontextmanager
+async def async_session_scope(
+    sticky_key: Optional[str] = None, sticky: bool = False
+) -> AsyncIterator["AsyncSessionScope"]:
+    """
+    开启一个异步会话作用域，语义与:func:`session_scope`一致。已处于异步作用域内时
+    复用外层作用域。
+    """
+    scope = _CURRENT_SCOPE.get()
+    if isinstance(scope, AsyncSessionScope):
+        yield scope
+        return
+    scope = AsyncSessionScope(
+        DatabaseFactory.get_db().get_async_engine(), sticky_key, sticky
+    )
+    token = _CURRENT_SCOPE.set(scope)
+    try:
+        yield scope
+        if scope.rollback_only:
+            await scope.rollback()
+        else:
+            await scope.commit()
+    except Exception:
+        await scope.rollback()
+        raise
+    finally:
+        _CURRENT_SCOPE.reset(token)
+        await scope.close()
+
+
+@asynccontextmanager
+async def threaded_session_scope(
+    run: Callable[..., Awaitable[Any]],
+    sticky_key: Optional[str] = None,
+    sticky: bool = False,
+) -> AsyncIterator["SessionScope"]:
+    """
+    开启一个同步会话作用域，语义与:func:`session_scope`一致，但提交、回滚和关闭
+    都通过:arg:`run`交给线程池执行，不阻塞事件循环。
+    """
+    scope = _CURRENT_SCOPE.get()
+    if scope is not None:
+        yield scope
+        return
+    scope = SessionScope(
+        DatabaseFactory.get_db().get_engine(), sticky_key, sticky
+    )
+    token = _CURRENT_SCOPE.set(scope)
+    try:
+        yield scope
+        await run(scope.rollback if scope.rollback_only else scope.commit)
+    except Exception:
+        await run(scope.rollback)
+        raise
+    finally:
+        _CURRENT_SCOPE.reset(token)
+        await run(scope.close)
+
+
+@contextmanager
+def get_session(read_only: bool = False) -> Iterator["Session"]:
+    """
+    获取会话。处于会话作用域内时复用作用域的会话，写操作包裹在SAVEPOINT中，失败时
+    只回滚本次操作；否则创建一个独立的会话。配置了只读副本时，只读操作按
+    :meth:`SessionScope.reader`路由，不处于作用域时直接使用副本。
+
+    Args:
+        read_only: 是否为只读操作，只读操作不需要SAVEPOINT。
+
+    """
+    scope = _CURRENT_SCOPE.get()
+    if scope is None:
+        db = DatabaseFactory.get_db()
+        engine = db.get_read_engine() if read_only else db.get_engine()
+        with Session(engine) as session:
+            yield session
+    elif read_only:
+        yield scope.reader()
+    else:
+        scope.wrote = True
+        with scope.session.begin_nested():
+            yield scope.session
+
+
+def scope_holds_write_lock() -> bool:
+    """
+    当前会话作用域是否持有SQLite的写锁。持有时另开连接写入会一直等待到作用域结束。
+    """
+    scope = _CURRENT_SCOPE.get()
+    if scope is None or not scope.session.in_transaction():
+        return False
+    connection = scope.session.connection()
+    if connection.dialect.name != "sqlite":
+        return False
+    return connection.connection.driver_connection.in_transaction
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """
+    在当前会话作用域提交后执行:arg:`callback`，不处于作用域时立即执行。
+    """
+    scope = _CURRENT_SCOPE.get()
+    if scope is None:
+        callback()
+    else:
+        scope.callbacks.append(callback)
+
+
+def set_rollback() -> None:
+    """
+    使当前会话作用域结束时回滚而不是提交，用于返回错误响应而不抛出异常的请求。
+    不处于作用域时不执行。
+    """
+    scope = _CURRENT_SCOPE.get()
+    if scope is not None:
+        scope.rollback_only = True
+
+
+def on_rollback(callback: Callable[[], None]) -> None:
+    """
+    在当前会话作用域回滚后执行:arg:`callback`，不处于作用域时不执行。
+    """
+    scope = _CURRENT_SCOPE.get()
+    if scope is not None:
+        scope.rollback_callbacks.append(callback)
+
+
+def find_identity(model: Type, code: str) -> Optional[Any]:
+    scope = _CURRENT_SCOPE.get()
+    if scope is None or code is None:
+        return None
+    return scope.identities.get((model, code))
+
+
+def remember_identity(model: Type, code: str, obj: Any) -> None:
+    scope = _CURRENT_SCOPE.get()
+    if scope is None or code is None:
+        return
+    # 只记住主库会话中的对象，写操作会直接修改身份映射中的对象
+    if object_session(obj) is scope.session:
+        scope.identities[(model, code)] = obj
+
+
+def forget_identity(model: Type, code: Optional[str] = None) -> None:
+    """移除身份映射，:arg:`code`为空时移除该模型的全部映射。"""
+    scope = _CURRENT_SCOPE.get()
+    if scope is None:
+        return
+    if code is not None:
+        scope.identities.pop((model, code), None)
+        return
+    for key in [key for key in scope.identities if key[0] is model]:
+        scope.identities.pop(key)
@@ -0,0 +1,95 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import URL, make_url
+
+from issuer.config import GET_CONFIG
+
+
+Logger = logging.getLogger(__name__)
+
+
+def _get_int(key: str, default: int) -> int:
+    return int(GET_CONFIG(key, default))
+
+
+def _get_bool(key: str, default: bool) -> bool:
+    value = GET_CONFIG(key)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def is_sqlite(url: "URL") -> bool:
+    return url.get_backend_name() == "sqlite"
+
+
+def is_memory_sqlite(url: "URL") -> bool:
+    return is_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    根据配置生成``create_engine``的参数。内存SQLite数据库使用单连接的连接池，不
+    设置连接池参数；文件SQLite数据库与服务端数据库一样使用``QueuePool``。
+
+    配置项:
+        DB_POOL_SIZE: 连接池常驻连接数，默认5。
+        DB_MAX_OVERFLOW: 超出常驻连接数后最多额外创建的连接数，默认10。
+        DB_POOL_TIMEOUT: 获取连接的超时秒数，默认30。
+        DB_POOL_RECYCLE: 连接的最长使用秒数，超过后重建，默认-1即不重建。
+        DB_POOL_PRE_PING: 取出连接时是否先检测可用性，服务端数据库默认开启。
+
+    """
+    url = make_url(url)
+    if is_memory_sqlite(url):
+        return dict()
+    return dict(
+        pool_size=_get_int("DB_POOL_SIZE", 5),
+        max_overflow=_get_int("DB_MAX_OVERFLOW", 10),
+        pool_timeout=_get_int("DB_POOL_TIMEOUT", 30),
+        pool_recycle=_get_int("DB_POOL_RECYCLE", -1),
+        pool_pre_ping=_get_bool("DB_POOL_PRE_PING", not is_sqlite(url)),
+    )
+
+
+def sqlite_pragmas() -> List[Tuple[str, str]]:
+    """
+    每个SQLite连接建立时执行的PRAGMA，配置为空字符串时跳过该项。
+
+    配置项:
+        DB_SQLITE_JOURNAL_MODE: 日志模式，默认WAL，读写互不阻塞。
+        DB_SQLITE_SYNCHRONOUS: 同步级别，默认NORMAL，WAL下只在检查点时同步。
+        DB_SQLITE_BUSY_TIMEOUT: 等待写锁的毫秒数，默认5000。
+        DB_SQLITE_CACHE_SIZE: 页缓存大小，负数表示KiB，默认-20000即约20MB。
+        DB_SQLITE_MMAP_SIZE: 内存映射读取的字节数，默认268435456即256MB。
+
+    """
+    pragmas = [
+        ("journal_mode", GET_CONFIG("DB_SQLITE_JOURNAL_MODE", "WAL")),
+        ("synchronous", GET_CONFIG("DB_SQLITE_SYNCHRONOUS", "NORMAL")),
+        ("busy_timeout", GET_CONFIG("DB_SQLITE_BUSY_TIMEOUT", "5000")),
+        ("cache_size", GET_CONFIG("DB_SQLITE_CACHE_SIZE", "-20000")),
+        ("mmap_size", GET_CONFIG("DB_SQLITE_MMAP_SIZE", "268435456")),
+    ]
+    return [(name, value) for name, value in pragmas if value != ""]
+
+
+def configure_engine(engine: "Engine") -> None:
+    """为SQLite引擎注册连接建立时执行PRAGMA的监听，异步引擎需传入其同步引擎"""
+    if not is_sqlite(engine.url):
+        return
+    pragmas = sqlite_pragmas()
+    if is_memory_sqlite(engine.url):
+        # 内存数据库不支持WAL
+        pragmas = [pragma for pragma in pragmas if pragma[0] != "journal_mode"]
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -1,17 +1,151 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util.concurrency import await_only, in_greenlet
 from sqlmodel import Session, select
 
-from issuer.db.models import Generator
-from issuer.db.database import DatabaseFactory
+from issuer.config import GET_CONFIG
+from issuer.db.database import (
+    AsyncSessionScope,
+    DatabaseFactory,
+    current_scope,
+    get_session,
+    scope_holds_write_lock,
+)
+from issuer.db.models import Counter, Generator
+
+
+def _legacy_start(session: "Session") -> int:
+    # 旧发号器所有标识共用一个序列，从其最大值开始可以保证不与已有编码重复
+    return session.exec(select(func.max(Generator.id))).one() or 0
+
+
+def reserve(
+    session: "Session",
+    name: str,
+    size: int = 1,
+    initial: Optional[Callable[["Session"], int]] = None,
+) -> int:
+    """
+    在:arg:`session`的事务中将计数器:arg:`name`原子地增加:arg:`size`，返回增加后的
+    值，即预留区间``(value - size, value]``。
+
+    Args:
+        session: 会话，由调用方提交。
+        name: 计数器名称。
+        size: 预留数量。
+        initial: 计数器不存在时计算初始值的函数，默认为0。
+
+    """
+    statement = (
+        update(Counter)
+        .where(Counter.name == name)
+        .values(value=Counter.value + size, gmt_modified=datetime.utcnow())
+    )
+    if session.exec(statement).rowcount == 0:
+        start = initial(session) if initial is not None else 0
+        try:
+            # 其他事务可能同时创建了计数器，冲突时只回滚SAVEPOINT并重新递增
+            with session.begin_nested():
+                session.add(Counter(name=name, value=start + size))
+        except IntegrityError:
+            session.exec(statement)
+    statement = select(Counter.value).where(Counter.name == name)
+    return session.exec(statement).one()
+
+
+class IdAllocator:
+    """
+    分段发号器。每个发号标识一次预留:attr:`block_size`个号码并在内存中依次发放，
+    预留通过一条原子的UPDATE完成，多线程、多进程之间不会重复。
+
+    Args:
+        block_size: 每次预留的号码数量。
+
+    """
+
+    def __init__(self, block_size: int) -> None:
+        self.block_size = block_size
+        self._blocks: Dict[str, Tuple[int, int]] = dict()
+        self._locks: Dict[str, threading.Lock] = dict()
+        self._lock = threading.Lock()
+
+    def _get_lock(self, meta_type: str) -> "threading.Lock":
+        with self._lock:
+            return self._locks.setdefault(meta_type, threading.Lock())
+
+    @contextmanager
+    def _locked(self, meta_type: str) -> Iterator[None]:
+        lock = self._get_lock(meta_type)
+        if in_greenlet():
+            # 异步执行方式下持有锁的请求可能正在等待IO并让出了事件循环，在同一线程
+            # 中阻塞等待会使事件循环死锁
+            while not lock.acquire(blocking=False):
+                await_only(asyncio.sleep(0.001))
+        else:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def _reserve_block(self, name: str) -> int:
+        if isinstance(current_scope(), AsyncSessionScope) and in_greenlet():
+            return await_only(self._reserve_block_async(name))
+        engine = DatabaseFactory.get_db().get_engine()
+        while True:
+            try:
+                with Session(engine) as session:
+                    end = reserve(
+                        session, name, self.block_size, _legacy_start
+                    )
+                    session.commit()
+                    return end
+            except IntegrityError:
+                # 其他进程同时创建了计数器，重新递增即可
+                continue
+
+    async def _reserve_block_async(self, name: str) -> int:
+        # 通过异步引擎的独立连接预留，等待其他请求释放写锁时不阻塞事件循环
+        engine = DatabaseFactory.get_db().get_async_engine()
+        while True:
+            try:
+                async with AsyncSession(
+                    engine, sync_session_class=Session
+                ) as session:
+                    end = await session.run_sync(
+                        reserve, name, self.block_size, _legacy_start
+                    )
+                    await session.commit()
+                    return end
+            except IntegrityError:
+                continue
+
+    def next_id(self, meta_type: str) -> int:
+        name = "code:" + meta_type
+        with self._locked(meta_type):
+            current, end = self._blocks.get(meta_type, (0, 0))
+            if current < end:
+                self._blocks[meta_type] = (current + 1, end)
+                return current + 1
+            if scope_holds_write_lock():
+                # 请求已持有写锁时在请求事务中单独取号，号码随请求一起提交或回滚，
+                # 因此不能放入进程共享的号段
+                with get_session() as session:
+                    return reserve(session, name, 1, _legacy_start)
+            end = self._reserve_block(name)
+            self._blocks[meta_type] = (end - self.block_size + 1, end)
+            return end - self.block_size + 1
+
+
+ID_ALLOCATOR = IdAllocator(block_size=int(GET_CONFIG("ID_BLOCK_SIZE", 64)))
 
 
 def generate_code(meta_type: str) -> str:
-    gen = Generator(meta_type=meta_type)
-    engine = DatabaseFactory.get_db().get_engine()
-    with Session(engine) as session:
-        session.add(gen)
-        session.commit()
-
-    with Session(engine) as session:
-        stmt = select(Generator).order_by(Generator.id.desc()).limit(1)
-        result = session.exec(stmt).first()
-        return meta_type + str(result.id)
+    return meta_type + str(ID_ALLOCATOR.next_id(meta_type))
@@ -1,37 +1,144 @@
 from datetime import date, datetime
 import logging
-from typing import List, Optional, Sequence
-from sqlalchemy import func
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+from sqlalchemy import delete, func, insert
 from sqlmodel import Session, select
-from issuer.db.database import DatabaseFactory
-from issuer.db.gen import generate_code
-from issuer.db.models import Issue
+from issuer.db.bulk import delete_where
+from issuer.db.database import (
+    find_identity,
+    forget_identity,
+    get_session,
+    remember_identity,
+)
+from issuer.db.gen import generate_code, reserve
+from issuer.db.pagination import paginate
+from issuer.db.search import index_issue, unindex
+from issuer.db.models import (
+    Counter,
+    Issue,
+    IssueAssignee,
+    IssueFollower,
+    IssueTag,
+    ProjectIssueStats,
+)
 
 
 Logger = logging.getLogger(__name__)
 
 
+ISSUE_RELATIONS: Tuple[Tuple[Type, str, str], ...] = (
+    (IssueFollower, "user_code", "followers"),
+    (IssueAssignee, "user_code", "assigned"),
+    (IssueTag, "tag", "tags"),
+)
+"""关系表、关系表的值字段以及:class:`Issue`中对应的逗号分隔字段"""
+
+
+def split_values(values: Optional[str]) -> List[str]:
+    """拆分逗号分隔的字段，去除空值与重复值"""
+    if values is None:
+        return list()
+    return list(dict.fromkeys(value for value in values.split(",") if value))
+
+
+def issue_relation_rows(issue: "Issue") -> Dict[Type, List[Dict[str, str]]]:
+    """根据议题中逗号分隔的字段生成各关系表的行"""
+    return {
+        model: [
+            {"issue_code": issue.issue_code, column: value}
+            for value in split_values(getattr(issue, field))
+        ]
+        for model, column, field in ISSUE_RELATIONS
+    }
+
+
+def _sync_issue_relations(session: "Session", issue: "Issue") -> None:
+    for model, rows in issue_relation_rows(issue).items():
+        session.exec(delete(model).where(model.issue_code == issue.issue_code))
+        if len(rows) > 0:
+            session.exec(insert(model), params=rows)
+
+
+def _filter_issue_relations(
+    stmt,
+    follower: Optional[str] = None,
+    assigned: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+):
+    # 通过关系表上(user_code, issue_code)或(tag, issue_code)的索引筛选
+    if follower is not None:
+        stmt = stmt.where(
+            Issue.issue_code.in_(
+                select(IssueFollower.issue_code).where(
+                    IssueFollower.user_code == follower
+                )
+            )
+        )
+    if assigned is not None:
+        stmt = stmt.where(
+            Issue.issue_code.in_(
+                select(IssueAssignee.issue_code).where(
+                    IssueAssignee.user_code == assigned
+                )
+            )
+        )
+    if tags is not None:
+        for tag in tags:
+            stmt = stmt.where(
+                Issue.issue_code.in_(
+                    select(IssueTag.issue_code).where(IssueTag.tag == tag)
+                )
+            )
+    return stmt
+
+
+def _issue_id_counter(project_code: str) -> str:
+    return "issue_id:" + project_code
+
+
+def _max_issue_id(project_code: str):
+    def initial(session: "Session") -> int:
+        stmt = select(func.max(Issue.issue_id)).where(
+            Issue.project_code == project_code
+        )
+        return session.exec(stmt).one() or 0
+
+    return initial
+
+
 def insert_issue(issue: "Issue") -> str | None:
-    if issue.issue_code is None:
-        issue.issue_code = generate_code("IS")
-    issue_id = count_issues_by_condition(project_code=issue.project_code)
-    issue.issue_id = issue_id + 1
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        if issue.issue_code is None:
+            issue.issue_code = generate_code("IS")
+        with get_session() as session:
+            # 序号与议题在同一事务中递增，插入失败时一并回滚
+            issue.issue_id = reserve(
+                session,
+                _issue_id_counter(issue.project_code),
+                initial=_max_issue_id(issue.project_code),
+            )
             session.add(issue)
+            _sync_issue_relations(session, issue)
+            session.flush()
+            index_issue(session, issue)
             session.commit()
             session.refresh(issue)
     except Exception as e:
         Logger.error(e)
         return None
+    remember_identity(Issue, issue.issue_code, issue)
     return issue.issue_code
 
 
 def update_issue_by_code(issue: "Issue") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(Issue).where(Issue.issue_code == issue.issue_code)
-            result = session.exec(stmt).one()
+        with get_session() as session:
+            result = find_identity(Issue, issue.issue_code)
+            if result is None:
+                stmt = select(Issue).where(
+                    Issue.issue_code == issue.issue_code
+                )
+                result = session.exec(stmt).one()
 
             result.gmt_modified = datetime.utcnow()
             result.title = issue.title
@@ -40,6 +147,8 @@ def update_issue_by_code(issue: "Issue") -> bool:
             result.followers = issue.followers
             result.assigned = issue.assigned
             session.add(result)
+            _sync_issue_relations(session, result)
+            index_issue(session, result)
             session.commit()
             session.refresh(result)
     except Exception as e:
@@ -50,34 +159,58 @@ def update_issue_by_code(issue: "Issue") -> bool:
 
 def delete_issue_by_code(issue_code: str) -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session() as session:
             stmt = select(Issue).where(Issue.issue_code == issue_code)
             result = session.exec(stmt).one()
 
+            # 经ORM删除议题本身，由监听维护统计表
             session.delete(result)
+            for model, _, _ in ISSUE_RELATIONS:
+                delete_where(session, model, model.issue_code == issue_code)
+            unindex(session, "issue", [result.id])
             session.commit()
     except Exception as e:
         Logger.error(e)
         return False
+    forget_identity(Issue, issue_code)
     return True
 
 
 def find_issue_by_code(issue_code: str) -> Optional["Issue"]:
+    issue = find_identity(Issue, issue_code)
+    if issue is not None:
+        return issue
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(Issue).where(Issue.issue_code == issue_code)
             res = session.exec(stmt).one()
+            remember_identity(Issue, issue_code, res)
             return res
     except Exception as e:
         Logger.error(e)
     return None
 
 
+def list_issues_by_codes(issue_codes: Sequence[str]) -> Sequence["Issue"]:
+    if len(issue_codes) == 0:
+        return list()
+    try:
+        with get_session(read_only=True) as session:
+            stmt = select(Issue).where(Issue.issue_code.in_(set(issue_codes)))
+            results = session.exec(stmt).all()
+            for result in results:
+                remember_identity(Issue, result.issue_code, result)
+            return results
+    except Exception as e:
+        Logger.error(e)
+    return list()
+
+
 def find_issue_by_project_and_code_id(
     project_code: str, issue_id: int
 ) -> Optional["Issue"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = (
                 select(Issue)
                 .where(Issue.project_code == project_code)
@@ -90,6 +223,45 @@ def find_issue_by_project_and_code_id(
     return None
 
 
+def list_issues_by_project_and_code_ids(
+    project_code: str, issue_ids: Sequence[int]
+) -> Sequence["Issue"]:
+    if len(issue_ids) == 0:
+        return list()
+    try:
+        with get_session(read_only=True) as session:
+            stmt = select(Issue).where(
+                Issue.project_code == project_code,
+                Issue.issue_id.in_(set(issue_ids)),
+            )
+            return session.exec(stmt).all()
+    except Exception as e:
+        Logger.error(e)
+    return list()
+
+
+def update_issues_status(issue_codes: Sequence[str], status: str) -> bool:
+    """
+    批量变更议题状态。议题经ORM更新，由监听维护统计表，各议题的UPDATE在一次flush
+    中执行。
+    """
+    if len(issue_codes) == 0:
+        return True
+    try:
+        with get_session() as session:
+            stmt = select(Issue).where(Issue.issue_code.in_(set(issue_codes)))
+            now = datetime.utcnow()
+            for result in session.exec(stmt).all():
+                result.status = status
+                result.gmt_modified = now
+                session.add(result)
+            session.commit()
+    except Exception as e:
+        Logger.error(e)
+        return False
+    return True
+
+
 def list_issues_by_condition(
     issue_code: Optional[str] = None,
     project_code: Optional[str] = None,
@@ -105,9 +277,10 @@ def list_issues_by_condition(
     tags: Optional[List[str]] = None,
     page_num: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
 ) -> Sequence["Issue"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(Issue)
             if issue_code is not None:
                 stmt = stmt.where(Issue.issue_code == issue_code)
@@ -129,14 +302,8 @@ def list_issues_by_condition(
                 stmt = stmt.where(Issue.propose_date >= start_date)
             if end_date is not None:
                 stmt = stmt.where(Issue.propose_date <= end_date)
-            if follower is not None:
-                stmt = stmt.where(Issue.followers.like("%" + follower + "%"))
-            if assigned is not None:
-                stmt = stmt.where(Issue.assigned.like("%" + assigned + "%"))
-            if tags is not None:
-                for tag in tags:
-                    stmt = stmt.where(Issue.tags.like("%" + tag + "%"))
-            stmt = stmt.limit(page_size).offset((page_num - 1) * page_size)
+            stmt = _filter_issue_relations(stmt, follower, assigned, tags)
+            stmt = paginate(stmt, Issue, page_num, page_size, cursor)
             results = session.exec(stmt).all()
             return results
     except Exception as e:
@@ -159,7 +326,7 @@ def count_issues_by_condition(
     tags: Optional[List[str]] = None,
 ) -> Optional[int]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(func.count(Issue.id))
             if issue_code is not None:
                 stmt = stmt.where(Issue.issue_code == issue_code)
@@ -181,13 +348,7 @@ def count_issues_by_condition(
                 stmt = stmt.where(Issue.propose_date >= start_date)
             if end_date is not None:
                 stmt = stmt.where(Issue.propose_date <= end_date)
-            if follower is not None:
-                stmt = stmt.where(Issue.followers.like("%" + follower + "%"))
-            if assigned is not None:
-                stmt = stmt.where(Issue.assigned.like("%" + assigned + "%"))
-            if tags is not None:
-                for tag in tags:
-                    stmt = stmt.where(Issue.tags.like("%" + tag + "%"))
+            stmt = _filter_issue_relations(stmt, follower, assigned, tags)
             result = session.scalar(stmt)
             return result if result is not None else 0
     except Exception as e:
@@ -197,14 +358,21 @@ def count_issues_by_condition(
 
 def delete_all_issues() -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(Issue)
-            results = session.exec(stmt).all()
-
-            for result in results:
-                session.delete(result)
+        with get_session() as session:
+            # 批量删除不经过统计表的维护监听，统计表需一并清空
+            delete_where(session, Issue)
+            delete_where(session, ProjectIssueStats)
+            for model, _, _ in ISSUE_RELATIONS:
+                delete_where(session, model)
+            unindex(session, "issue")
+            delete_where(
+                session,
+                Counter,
+                Counter.name.startswith(_issue_id_counter("")),
+            )
             session.commit()
     except Exception as e:
         Logger.error(e)
         return False
+    forget_identity(Issue)
     return True
@@ -1,22 +1,26 @@
 from datetime import datetime
 import logging
-from typing import Optional, Sequence
+from typing import List, Optional, Sequence
 
 from sqlmodel import Session, select
-from issuer.db.database import DatabaseFactory
+from issuer.db.bulk import delete_in_chunks, delete_where
+from issuer.db.database import get_session
 from issuer.db.gen import generate_code
 from issuer.db.models import IssueComment
+from issuer.db.search import index_comment, index_comments, unindex
 
 
 Logger = logging.getLogger(__name__)
 
 
 def insert_issue_comment(comment: "IssueComment") -> str | None:
-    if comment.comment_code is None:
-        comment.comment_code = generate_code("IC")
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        if comment.comment_code is None:
+            comment.comment_code = generate_code("IC")
+        with get_session() as session:
             session.add(comment)
+            session.flush()
+            index_comment(session, comment)
             session.commit()
             session.refresh(comment)
     except Exception as e:
@@ -25,16 +29,16 @@ def insert_issue_comment(comment: "IssueComment") -> str | None:
     return comment.comment_code
 
 
-def delete_issue_comment_by_issue(issue_code: str) -> bool:
+def insert_issue_comments(comments: Sequence["IssueComment"]) -> bool:
+    """在一次flush中写入多条评论并更新其索引"""
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(IssueComment).where(
-                IssueComment.issue_code == issue_code
-            )
-            results = session.exec(stmt).all()
-
-            for result in results:
-                session.delete(result)
+        for comment in comments:
+            if comment.comment_code is None:
+                comment.comment_code = generate_code("IC")
+        with get_session() as session:
+            session.add_all(comments)
+            session.flush()
+            index_comments(session, comments)
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -42,9 +46,26 @@ def delete_issue_comment_by_issue(issue_code: str) -> bool:
     return True
 
 
+def _unindex_comments(session: "Session", comment_ids: List[int]) -> None:
+    unindex(session, "comment", comment_ids)
+
+
+def delete_issue_comment_by_issue(issue_code: str) -> bool:
+    try:
+        delete_in_chunks(
+            IssueComment,
+            IssueComment.issue_code == issue_code,
+            before_chunk=_unindex_comments,
+        )
+    except Exception as e:
+        Logger.error(e)
+        return False
+    return True
+
+
 def update_issue_comment_by_code(comment: "IssueComment") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session() as session:
             stmt = select(IssueComment).where(
                 IssueComment.comment_code == comment.comment_code
             )
@@ -64,7 +85,7 @@ def update_issue_comment_by_code(comment: "IssueComment") -> bool:
 
 def find_issue_comment_by_code(comment_code: str) -> Optional["IssueComment"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(IssueComment).where(
                 IssueComment.comment_code == comment_code
             )
@@ -76,7 +97,7 @@ def find_issue_comment_by_code(comment_code: str) -> Optional["IssueComment"]:
 
 def list_issue_comment_by_issue(issue_code: str) -> Sequence["IssueComment"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = (
                 select(IssueComment)
                 .where(IssueComment.issue_code == issue_code)
@@ -92,7 +113,7 @@ def list_issue_comment_by_commenter(
     user_code: str,
 ) -> Sequence["IssueComment"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(IssueComment).where(
                 IssueComment.commenter == user_code
             )
@@ -104,12 +125,9 @@ def list_issue_comment_by_commenter(
 
 def delete_all_issue_comments() -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(IssueComment)
-            results = session.exec(stmt).all()
-
-            for result in results:
-                session.delete(result)
+        with get_session() as session:
+            delete_where(session, IssueComment)
+            unindex(session, "comment")
             session.commit()
     except Exception as e:
         Logger.error(e)
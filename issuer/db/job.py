@@ -0,0 +1,152 @@
+from datetime import datetime
+import logging
+from typing import Dict, Optional, Sequence
+import uuid
+
+from sqlalchemy import func, update
+from sqlmodel import select
+
+from issuer.db.bulk import delete_where
+from issuer.db.database import get_session
+from issuer.db.models import Job
+
+
+Logger = logging.getLogger(__name__)
+
+
+def insert_job(job: "Job") -> Optional[int]:
+    try:
+        with get_session() as session:
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+    except Exception as e:
+        Logger.error(e)
+        return None
+    return job.id
+
+
+def claim_jobs(limit: int) -> Sequence["Job"]:
+    """
+    取出至多:arg:`limit`个到期的待执行任务并标记为执行中。标记与读取通过批次标识
+    关联，多个进程同时取任务时不会取到同一个任务。
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    try:
+        with get_session() as session:
+            due = (
+                select(Job.id)
+                .where(Job.status == "pending", Job.next_run_at <= now)
+                .order_by(Job.id)
+                .limit(limit)
+            )
+            session.exec(
+                update(Job)
+                .where(Job.id.in_(due), Job.status == "pending")
+                .values(status="running", claimed_by=token, gmt_modified=now)
+            )
+            stmt = (
+                select(Job)
+                .where(Job.status == "running", Job.claimed_by == token)
+                .order_by(Job.id)
+            )
+            results = session.exec(stmt).all()
+            # 不处于作用域时独立会话提交后会使对象过期，先移出会话再提交，返回的
+            # 任务在会话关闭后仍可读取
+            for job in results:
+                session.expunge(job)
+            session.commit()
+            return results
+    except Exception as e:
+        Logger.error(e)
+    return list()
+
+
+def complete_job(job_id: int) -> bool:
+    try:
+        with get_session() as session:
+            delete_where(session, Job, Job.id == job_id)
+            session.commit()
+    except Exception as e:
+        Logger.error(e)
+        return False
+    return True
+
+
+def retry_job(job_id: int, error: str, next_run_at: datetime) -> bool:
+    try:
+        with get_session() as session:
+            session.exec(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(
+                    status="pending",
+                    attempts=Job.attempts + 1,
+                    next_run_at=next_run_at,
+                    last_error=error,
+                    gmt_modified=datetime.utcnow(),
+                )
+            )
+            session.commit()
+    except Exception as e:
+        Logger.error(e)
+        return False
+    return True
+
+
+def fail_job(job_id: int, error: str) -> bool:
+    try:
+        with get_session() as session:
+            session.exec(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(
+                    status="failed",
+                    attempts=Job.attempts + 1,
+                    last_error=error,
+                    gmt_modified=datetime.utcnow(),
+                )
+            )
+            session.commit()
+    except Exception as e:
+        Logger.error(e)
+        return False
+    return True
+
+
+def recover_jobs(before: datetime) -> int:
+    """将:arg:`before`之前取出但未完成的任务恢复为待执行，用于进程异常退出后"""
+    try:
+        with get_session() as session:
+            count = session.exec(
+                update(Job)
+                .where(Job.status == "running", Job.gmt_modified < before)
+                .values(status="pending", claimed_by=None)
+            ).rowcount
+            session.commit()
+            return count
+    except Exception as e:
+        Logger.error(e)
+    return 0
+
+
+def count_jobs_by_status() -> Dict[str, int]:
+    try:
+        with get_session(read_only=True) as session:
+            stmt = select(Job.status, func.count(Job.id)).group_by(Job.status)
+            return {status: count for status, count in session.exec(stmt)}
+    except Exception as e:
+        Logger.error(e)
+    return dict()
+
+
+def delete_all_jobs() -> bool:
+    try:
+        with get_session() as session:
+            delete_where(session, Job)
+            session.commit()
+    except Exception as e:
+        Logger.error(e)
+        return False
+    return True
@@ -1,18 +1,160 @@
+import hashlib
+import json
 import logging
-from typing import Sequence
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
 
-from sqlmodel import Session, select
-from issuer.db.database import DatabaseFactory
-from issuer.db.models import Metas
+from sqlmodel import select
+from issuer.config import GET_CONFIG
+from issuer.db.bulk import delete_one
+from issuer.db.database import get_session, on_commit
+from issuer.db.gen import reserve
+from issuer.db.models import Counter, Metas
 
 
 Logger = logging.getLogger(__name__)
 
 
+METAS_VERSION = "metas_version"
+"""元数据版本号的计数器名称，每次写入元数据时递增"""
+
+
+class MetasSnapshot:
+    """
+    某一版本的全部元数据，以及各类型元数据接口的响应体，创建后不再修改。
+
+    Args:
+        version: 元数据版本号。
+        metas: 全部元数据。
+
+    """
+
+    def __init__(self, version: int, metas: Sequence["Metas"]) -> None:
+        self.version = version
+        self.metas: Dict[str, Tuple["Metas", ...]] = dict()
+        for meta_type in {meta.meta_type for meta in metas}:
+            self.metas[meta_type] = tuple(
+                meta for meta in metas if meta.meta_type == meta_type
+            )
+        self._responses = {
+            meta_type: self._build_response(values)
+            for meta_type, values in self.metas.items()
+        }
+
+    @staticmethod
+    def _build_response(metas: Sequence["Metas"]) -> Tuple[bytes, str]:
+        data = [
+            {"value": meta.meta_value, "label": meta.note} for meta in metas
+        ]
+        body = json.dumps(
+            {"success": True, "data": data},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        # 以内容计算ETag，各进程对相同的元数据给出相同的值
+        return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+    def response(self, meta_type: str) -> Tuple[bytes, str]:
+        """:arg:`meta_type`类型元数据接口的响应体及其ETag"""
+        res = self._responses.get(meta_type)
+        if res is None:
+            res = self._build_response(tuple())
+        return res
+
+
+class MetasRegistry:
+    """
+    进程内的元数据注册表。元数据只在启动时写入，注册表加载一次后直接从内存提供；
+    本进程写入元数据提交后立即失效，其他进程的写入通过数据库中的版本号发现，每隔
+    :arg:`refresh_interval`秒至多检查一次。
+
+    Args:
+        refresh_interval: 检查版本号的间隔秒数。
+
+    """
+
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional["MetasSnapshot"] = None
+        self._stale = True
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def snapshot(self) -> Optional["MetasSnapshot"]:
+        """不访问数据库，返回仍然有效的元数据，需要刷新时返回``None``"""
+        if self._stale:
+            return None
+        if time.monotonic() - self._checked_at > self.refresh_interval:
+            return None
+        return self._snapshot
+
+    def load(self) -> Optional["MetasSnapshot"]:
+        """
+        检查版本号，版本号变化或本进程写入过元数据时重新加载全部元数据。
+
+        Returns:
+            最新的元数据，加载失败时返回上一次加载的元数据，从未加载过时返回
+            ``None``。
+
+        """
+        with self._lock:
+            snapshot = self.snapshot()
+            if snapshot is not None:
+                return snapshot
+            try:
+                with get_session(read_only=True) as session:
+                    stale = self._stale
+                    self._stale = False
+                    version = session.exec(
+                        select(Counter.value).where(
+                            Counter.name == METAS_VERSION
+                        )
+                    ).one_or_none()
+                    version = version or 0
+                    if (
+                        stale
+                        or self._snapshot is None
+                        or self._snapshot.version != version
+                    ):
+                        metas = session.exec(
+                            select(Metas).order_by(Metas.id)
+                        ).all()
+                        self._snapshot = MetasSnapshot(version, metas)
+                        self.loads += 1
+            except Exception as e:
+                Logger.error(e)
+                self._stale = True
+                return self._snapshot
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+
+METAS_REGISTRY = MetasRegistry(
+    refresh_interval=float(GET_CONFIG("METAS_REFRESH_INTERVAL", 30))
+)
+"""应用使用的元数据注册表"""
+
+
+def load_metas() -> Optional["MetasSnapshot"]:
+    """从元数据注册表取出最新的元数据，只在需要刷新时访问数据库"""
+    return METAS_REGISTRY.snapshot() or METAS_REGISTRY.load()
+
+
+def _metas_changed(session) -> None:
+    reserve(session, METAS_VERSION)
+    on_commit(METAS_REGISTRY.invalidate)
+
+
 def insert_metas(metas: "Metas") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session() as session:
             session.add(metas)
+            _metas_changed(session)
             session.commit()
             session.refresh(metas)
     except Exception:
@@ -22,14 +164,14 @@ def insert_metas(metas: "Metas") -> bool:
 
 def delete_metas(metas: "Metas") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = (
-                select(Metas)
-                .where(Metas.meta_type == metas.meta_type)
-                .where(Metas.meta_value == metas.meta_value)
+        with get_session() as session:
+            delete_one(
+                session,
+                Metas,
+                Metas.meta_type == metas.meta_type,
+                Metas.meta_value == metas.meta_value,
             )
-            result = session.exec(stmt).one()
-            session.delete(result)
+            _metas_changed(session)
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -39,7 +181,7 @@ def delete_metas(metas: "Metas") -> bool:
 
 def list_metas_by_type(meta_type: str) -> Sequence["Metas"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(Metas).where(Metas.meta_type == meta_type)
             results = session.exec(stmt).all()
             return results
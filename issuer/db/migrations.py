@@ -0,0 +1,81 @@
+from collections import defaultdict
+import logging
+from typing import Callable, Dict, List, Tuple, Type
+
+from sqlalchemy import Engine, delete, insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, select
+
+from issuer.db.activity import rebuild_timeline
+from issuer.db.database import DatabaseFactory
+from issuer.db.issue import ISSUE_RELATIONS, issue_relation_rows
+from issuer.db.models import Issue, Migration
+from issuer.db.search import rebuild_search_index
+from issuer.db.stats import rebuild_issue_stats
+
+
+Logger = logging.getLogger(__name__)
+
+
+BATCH_SIZE = 500
+
+
+def _backfill_issue_relations(session: "Session") -> None:
+    """根据议题中逗号分隔的关注者、被指派者和标签字段填充关系表"""
+    for model, _, _ in ISSUE_RELATIONS:
+        session.exec(delete(model))
+    stmt = select(
+        Issue.issue_code, Issue.followers, Issue.assigned, Issue.tags
+    ).execution_options(yield_per=BATCH_SIZE)
+    rows: Dict[Type, List[Dict[str, str]]] = defaultdict(list)
+    for issue in session.exec(stmt):
+        for model, _rows in issue_relation_rows(issue).items():
+            rows[model].extend(_rows)
+            if len(rows[model]) >= BATCH_SIZE:
+                session.exec(insert(model), params=rows.pop(model))
+    for model, _rows in rows.items():
+        if len(_rows) > 0:
+            session.exec(insert(model), params=_rows)
+
+
+MIGRATIONS: List[Tuple[str, Callable[["Session"], None]]] = [
+    ("backfill_issue_relations", _backfill_issue_relations),
+    ("build_search_index", rebuild_search_index),
+    ("build_project_issue_stats", rebuild_issue_stats),
+    ("build_timeline", rebuild_timeline),
+]
+"""按顺序执行的数据迁移，名称一经发布不可修改"""
+
+
+def ensure_indexes(engine: "Engine") -> None:
+    """为已存在的表补建模型中新增的索引，``create_all``只会为新建的表创建索引"""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(engine, checkfirst=True)
+            except Exception as e:
+                # 其他进程可能同时创建了该索引
+                Logger.warning(e)
+
+
+def run_migrations() -> None:
+    """
+    补建索引并执行尚未执行的数据迁移。每个迁移与其执行记录在同一事务中提交，多个进程
+    同时启动时只有一个进程会执行。
+    """
+    engine = DatabaseFactory.get_db().get_engine()
+    ensure_indexes(engine)
+    for name, migrate in MIGRATIONS:
+        try:
+            with Session(engine) as session:
+                if session.get(Migration, name) is not None:
+                    continue
+                session.add(Migration(name=name))
+                session.flush()
+                migrate(session)
+                session.commit()
+            Logger.info(f"Migration {name} finished")
+        except IntegrityError as e:
+            # 其他进程已经执行了该迁移
+            Logger.warning(e)
+            continue
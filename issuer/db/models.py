@@ -1,12 +1,12 @@
 from datetime import date, datetime
 from typing import Optional
 from sqlmodel import Field, SQLModel
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint
 
 
 class Generator(SQLModel, table=True):
     """
-    简易发号器
+    简易发号器，已由:class:`Counter`取代，仅用于初始化计数器
     """
 
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -17,12 +17,29 @@ class Generator(SQLModel, table=True):
     """发号标识"""
 
 
+class Counter(SQLModel, table=True):
+    """
+    计数器，通过原子的UPDATE递增，用于分段发号
+    """
+
+    name: str = Field(primary_key=True)
+    """计数器名称"""
+
+    value: int = Field(default=0, nullable=False)
+    """当前已分配的最大值"""
+
+    gmt_modified: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+
 class User(SQLModel, table=True):
     """
     用户模型，发号标识为US
     """
 
-    __table_args__ = (UniqueConstraint("email"),)
+    __table_args__ = (
+        UniqueConstraint("email"),
+        Index("ix_user_gmt_create_id", "gmt_create", "id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     gmt_create: Optional[datetime] = Field(default_factory=datetime.utcnow)
     gmt_modified: Optional[datetime] = Field(default_factory=datetime.utcnow)
@@ -66,6 +83,7 @@ class UserGroup(SQLModel, table=True):
     用户组模型，发号标识为UG
     """
 
+    __table_args__ = (Index("ix_usergroup_gmt_create_id", "gmt_create", "id"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     gmt_create: Optional[datetime] = Field(default_factory=datetime.utcnow)
     gmt_modified: Optional[datetime] = Field(default_factory=datetime.utcnow)
@@ -104,6 +122,7 @@ class Project(SQLModel, table=True):
     项目模型，发号标识为PJ
     """
 
+    __table_args__ = (Index("ix_project_gmt_create_id", "gmt_create", "id"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     gmt_create: Optional[datetime] = Field(default_factory=datetime.utcnow)
     gmt_modified: Optional[datetime] = Field(default_factory=datetime.utcnow)
@@ -163,6 +182,21 @@ class Issue(SQLModel, table=True):
 
     """
 
+    __table_args__ = (
+        Index("ix_issue_gmt_create_id", "gmt_create", "id"),
+        Index(
+            "ix_issue_project_code_gmt_create_id",
+            "project_code",
+            "gmt_create",
+            "id",
+        ),
+        Index(
+            "ix_issue_project_code_propose_date_status",
+            "project_code",
+            "propose_date",
+            "status",
+        ),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     gmt_create: Optional[datetime] = Field(default_factory=datetime.utcnow)
     gmt_modified: Optional[datetime] = Field(default_factory=datetime.utcnow)
@@ -205,6 +239,96 @@ class Issue(SQLModel, table=True):
     """议题被指派者，用半角逗号分隔的用户码"""
 
 
+class IssueFollower(SQLModel, table=True):
+    """
+    议题-用户关系模型，关注关系，与:attr:`Issue.followers`保持一致
+    """
+
+    __table_args__ = (
+        UniqueConstraint("issue_code", "user_code"),
+        Index(
+            "ix_issuefollower_user_code_issue_code", "user_code", "issue_code"
+        ),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    issue_code: str
+    """议题码"""
+
+    user_code: str
+    """用户码"""
+
+
+class IssueAssignee(SQLModel, table=True):
+    """
+    议题-用户关系模型，指派关系，与:attr:`Issue.assigned`保持一致
+    """
+
+    __table_args__ = (
+        UniqueConstraint("issue_code", "user_code"),
+        Index(
+            "ix_issueassignee_user_code_issue_code", "user_code", "issue_code"
+        ),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    issue_code: str
+    """议题码"""
+
+    user_code: str
+    """用户码"""
+
+
+class IssueTag(SQLModel, table=True):
+    """
+    议题-标签关系模型，与:attr:`Issue.tags`保持一致
+    """
+
+    __table_args__ = (
+        UniqueConstraint("issue_code", "tag"),
+        Index("ix_issuetag_tag_issue_code", "tag", "issue_code"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    issue_code: str
+    """议题码"""
+
+    tag: str
+    """标签"""
+
+
+class Migration(SQLModel, table=True):
+    """
+    已执行的数据迁移
+    """
+
+    name: str = Field(primary_key=True)
+    """迁移名称"""
+
+    gmt_create: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+
+class ProjectIssueStats(SQLModel, table=True):
+    """
+    项目议题的每日统计，按提出日期和状态汇总议题个数，随议题的增删改增量维护
+    """
+
+    __table_args__ = (UniqueConstraint("project_code", "day", "status"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    project_code: str
+    """项目码"""
+
+    day: date
+    """议题的提出日期"""
+
+    status: str
+    """议题状态"""
+
+    count: int = Field(default=0)
+    """议题个数"""
+
+
 class IssueComment(SQLModel, table=True):
     """
     议题评论模型，发号标识为IC。
@@ -264,6 +388,10 @@ class Activity(SQLModel, table=True):
 
     """
 
+    __table_args__ = (
+        Index("ix_activity_subject_id", "subject", "id"),
+        Index("ix_activity_gmt_create", "gmt_create"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     gmt_create: Optional[datetime] = Field(default_factory=datetime.utcnow)
     gmt_modified: Optional[datetime] = Field(default_factory=datetime.utcnow)
@@ -281,6 +409,26 @@ class Activity(SQLModel, table=True):
     """其他信息，用json字符串表示"""
 
 
+class Timeline(SQLModel, table=True):
+    """
+    用户动态时间线，活动写入时分发给活动对象的相关用户，即用户组成员、项目参与者
+    和议题关注者。
+    """
+
+    __table_args__ = (
+        UniqueConstraint("user_code", "activity_id"),
+        # 归档和级联删除按活动主键分批删除时间线
+        Index("ix_timeline_activity_id", "activity_id"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    user_code: str
+    """接收动态的用户码"""
+
+    activity_id: int
+    """活动主键"""
+
+
 class Notice(SQLModel, table=True):
     """
     管理员发布的通知，发号标识为NT
@@ -293,3 +441,58 @@ class Notice(SQLModel, table=True):
 
     notice_code: Optional[str] = Field(index=True)
     content: str
+
+
+class Job(SQLModel, table=True):
+    """
+    后台任务的发件箱，与产生任务的写操作在同一事务中提交，由:mod:`issuer.jobs`
+    的worker取出执行，执行成功后删除。
+    """
+
+    __table_args__ = (
+        Index("ix_job_status_next_run_at", "status", "next_run_at"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    gmt_create: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    gmt_modified: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+    name: str
+    """任务名称，对应注册的处理函数"""
+
+    payload: str
+    """任务参数，用json字符串表示"""
+
+    status: str = Field(default="pending")
+    """任务状态，可以是pending、running和failed"""
+
+    attempts: int = Field(default=0)
+    """已执行的次数"""
+
+    next_run_at: datetime = Field(default_factory=datetime.utcnow)
+    """最早的执行时间，重试时按退避时间推迟"""
+
+    claimed_by: Optional[str] = None
+    """取出任务的批次标识"""
+
+    last_error: Optional[str] = None
+    """最近一次执行失败的原因"""
+
+
+class WebhookDelivery(SQLModel, table=True):
+    """
+    代码仓库推送回调的投递记录，每个提交一行。重试的投递按投递标识、已处理的提交
+    按提交标识去重。
+    """
+
+    __table_args__ = (UniqueConstraint("project_code", "commit_id"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    gmt_create: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+    delivery_id: str = Field(index=True)
+    """投递标识，取自回调请求头"""
+
+    project_code: str
+    """项目码"""
+
+    commit_id: str
+    """提交标识"""
@@ -1,9 +1,10 @@
 import logging
 from typing import Optional, Sequence
 
-from sqlmodel import Session, select
+from sqlmodel import select
 
-from issuer.db.database import DatabaseFactory
+from issuer.db.bulk import delete_one, delete_where
+from issuer.db.database import get_session
 from issuer.db.gen import generate_code
 from issuer.db.models import Notice
 
@@ -12,10 +13,10 @@ Logger = logging.getLogger(__name__)
 
 
 def insert_notice(notice: "Notice") -> str | None:
-    if notice.notice_code is None:
-        notice.notice_code = generate_code("NT")
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        if notice.notice_code is None:
+            notice.notice_code = generate_code("NT")
+        with get_session() as session:
             session.add(notice)
             session.commit()
             session.refresh(notice)
@@ -27,7 +28,7 @@ def insert_notice(notice: "Notice") -> str | None:
 
 def list_notices(limit: Optional[int] = None) -> Sequence["Notice"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(Notice).order_by(Notice.id.desc())
             if limit is not None:
                 stmt.limit(limit)
@@ -40,10 +41,8 @@ def list_notices(limit: Optional[int] = None) -> Sequence["Notice"]:
 
 def delete_notice_by_code(notice_code: str) -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(Notice).where(Notice.notice_code == notice_code)
-            result = session.exec(stmt).one()
-            session.delete(result)
+        with get_session() as session:
+            delete_one(session, Notice, Notice.notice_code == notice_code)
             session.commit()
             return True
     except Exception as e:
@@ -53,11 +52,8 @@ def delete_notice_by_code(notice_code: str) -> bool:
 
 def delete_all_notices() -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(Notice)
-            results = session.exec(stmt).all()
-            for result in results:
-                session.delete(result)
+        with get_session() as session:
+            delete_where(session, Notice)
             session.commit()
             return True
     except Exception as e:
@@ -0,0 +1,66 @@
+import base64
+from datetime import datetime
+import json
+from typing import Any, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(gmt_create: datetime, id_: int) -> str:
+    """将``(gmt_create, id)``编码为不透明的游标"""
+    raw = json.dumps([gmt_create.isoformat(), id_])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """解析游标，格式不正确时返回空"""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(raw[0]), int(raw[1])
+    except Exception:
+        return None
+
+
+def paginate(
+    stmt,
+    model: Any,
+    page_num: int = 1,
+    page_size: int = 10,
+    cursor: Optional[str] = None,
+):
+    """
+    为查询语句添加分页条件。
+
+    Args:
+        stmt: 查询语句。
+        model: 查询的模型，需要包含``gmt_create``和``id``字段。
+        page_num: 页码，仅在:arg:`cursor`为空时生效。
+        page_size: 页数。
+        cursor: 游标，为空时使用``OFFSET``分页；为空字符串时返回第一页，否则返回
+            游标之后的一页。游标模式按``(gmt_create, id)``排序，通过索引定位，
+            与页码无关。
+
+    """
+    if cursor is None:
+        return stmt.limit(page_size).offset((page_num - 1) * page_size)
+    stmt = stmt.order_by(model.gmt_create, model.id)
+    if cursor != "":
+        after = decode_cursor(cursor)
+        if after is None:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        gmt_create, id_ = after
+        stmt = stmt.where(
+            or_(
+                model.gmt_create > gmt_create,
+                and_(model.gmt_create == gmt_create, model.id > id_),
+            )
+        )
+    return stmt.limit(page_size)
+
+
+def next_cursor(results: Sequence[Any], page_size: int) -> Optional[str]:
+    """根据游标模式查询的结果生成下一页的游标，没有下一页时返回空"""
+    if len(results) < page_size or len(results) == 0:
+        return None
+    last = results[-1]
+    return encode_cursor(last.gmt_create, last.id)
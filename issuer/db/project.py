@@ -1,10 +1,17 @@
 from datetime import date, datetime
 import logging
 from typing import Optional, Sequence
-from sqlalchemy import distinct, func
-from sqlmodel import Session, or_, select
-from issuer.db.database import DatabaseFactory
+from sqlalchemy import distinct, exists, func
+from sqlmodel import or_, select
+from issuer.db.bulk import delete_one, delete_where
+from issuer.db.database import (
+    find_identity,
+    forget_identity,
+    get_session,
+    remember_identity,
+)
 from issuer.db.gen import generate_code
+from issuer.db.pagination import paginate
 from issuer.db.models import Project, ProjectToUser
 
 
@@ -12,26 +19,29 @@ Logger = logging.getLogger(__name__)
 
 
 def insert_project(project: "Project") -> str | None:
-    if project.project_code is None:
-        project.project_code = generate_code("PJ")
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        if project.project_code is None:
+            project.project_code = generate_code("PJ")
+        with get_session() as session:
             session.add(project)
             session.commit()
             session.refresh(project)
     except Exception as e:
         Logger.error(e)
         return None
+    remember_identity(Project, project.project_code, project)
     return project.project_code
 
 
 def update_project_by_code(project: "Project") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(Project).where(
-                Project.project_code == project.project_code
-            )
-            result = session.exec(stmt).one()
+        with get_session() as session:
+            result = find_identity(Project, project.project_code)
+            if result is None:
+                stmt = select(Project).where(
+                    Project.project_code == project.project_code
+                )
+                result = session.exec(stmt).one()
 
             result.gmt_modified = datetime.utcnow()
             result.project_name = project.project_name
@@ -53,33 +63,55 @@ def update_project_by_code(project: "Project") -> bool:
 
 def delete_project_by_code(project_code: str) -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(Project).where(Project.project_code == project_code)
-            result = session.exec(stmt).one()
-
-            session.delete(result)
+        with get_session() as session:
+            delete_one(session, Project, Project.project_code == project_code)
             session.commit()
     except Exception as e:
         Logger.error(e)
         return False
+    forget_identity(Project, project_code)
     return True
 
 
 def find_project_by_code(project_code: str) -> Optional["Project"]:
+    project = find_identity(Project, project_code)
+    if project is not None:
+        return project
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(Project).where(Project.project_code == project_code)
-            return session.exec(stmt).one()
+            project = session.exec(stmt).one()
+            remember_identity(Project, project_code, project)
+            return project
     except Exception as e:
         Logger.error(e)
     return None
 
 
+def list_projects_by_codes(
+    project_codes: Sequence[str],
+) -> Sequence["Project"]:
+    if len(project_codes) == 0:
+        return list()
+    try:
+        with get_session(read_only=True) as session:
+            stmt = select(Project).where(
+                Project.project_code.in_(set(project_codes))
+            )
+            results = session.exec(stmt).all()
+            for result in results:
+                remember_identity(Project, result.project_code, result)
+            return results
+    except Exception as e:
+        Logger.error(e)
+    return list()
+
+
 def list_project_by_owner(
     owner: str, page_num: int = 1, page_size: int = 10
 ) -> Sequence["Project"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = (
                 select(Project)
                 .where(Project.owner == owner)
@@ -103,12 +135,15 @@ def list_projects_by_condition(
     participants: Optional[Sequence[str]] = None,
     page_num: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
 ) -> Sequence["Project"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(Project).where(
+        with get_session(read_only=True) as session:
+            # 参与关系的条件放在EXISTS子查询中，避免连接后再DISTINCT
+            p2u_stmt = select(ProjectToUser.id).where(
                 Project.project_code == ProjectToUser.project_code
             )
+            stmt = select(Project)
             if project_code is not None:
                 stmt = stmt.where(Project.project_code == project_code)
             if project_name is not None:
@@ -127,19 +162,16 @@ def list_projects_by_condition(
                 or_clauses = []
                 for participant in participants:
                     or_clauses.append(ProjectToUser.user_code == participant)
-                stmt = stmt.where(or_(*or_clauses))
-            stmt = (
-                stmt.distinct()
-                .where(
-                    or_(
-                        Project.privilege == "Public",
-                        Project.owner == current_user,
-                        ProjectToUser.user_code == current_user,
-                    )
+                p2u_stmt = p2u_stmt.where(or_(*or_clauses))
+            p2u_stmt = p2u_stmt.where(
+                or_(
+                    Project.privilege == "Public",
+                    Project.owner == current_user,
+                    ProjectToUser.user_code == current_user,
                 )
-                .limit(page_size)
-                .offset((page_num - 1) * page_size)
             )
+            stmt = stmt.where(exists(p2u_stmt))
+            stmt = paginate(stmt, Project, page_num, page_size, cursor)
             result = session.exec(stmt).all()
             return result
     except Exception as e:
@@ -158,7 +190,7 @@ def count_projects_by_condition(
     participants: Optional[Sequence[str]] = None,
 ) -> Optional[int]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(func.count(distinct(Project.id))).where(
                 Project.project_code == ProjectToUser.project_code
             )
@@ -197,14 +229,11 @@ def count_projects_by_condition(
 
 def delete_all_projects() -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(Project)
-            results = session.exec(stmt).all()
-
-            for result in results:
-                session.delete(result)
+        with get_session() as session:
+            delete_where(session, Project)
             session.commit()
     except Exception as e:
         Logger.error(e)
         return False
+    forget_identity(Project)
     return True
@@ -1,8 +1,9 @@
 import logging
 from typing import Sequence
 from sqlalchemy import func
-from sqlmodel import Session, select
-from issuer.db.database import DatabaseFactory
+from sqlmodel import select
+from issuer.db.bulk import delete_one, delete_where
+from issuer.db.database import get_session
 from issuer.db.models import ProjectToUser, UserToUserGroup
 
 
@@ -11,7 +12,7 @@ Logger = logging.getLogger(__name__)
 
 def insert_user_to_user_group(user_to_user_group: "UserToUserGroup") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session() as session:
             session.add(user_to_user_group)
             session.commit()
             session.refresh(user_to_user_group)
@@ -25,14 +26,13 @@ def delete_user_to_user_group_by_user_and_group(
     user_code: str, group_code: str
 ) -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(UserToUserGroup).where(
+        with get_session() as session:
+            delete_one(
+                session,
+                UserToUserGroup,
                 UserToUserGroup.user_code == user_code,
                 UserToUserGroup.group_code == group_code,
             )
-            result = session.exec(stmt).one()
-
-            session.delete(result)
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -42,14 +42,12 @@ def delete_user_to_user_group_by_user_and_group(
 
 def delete_user_to_user_group_by_group(group_code: str) -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(UserToUserGroup).where(
-                UserToUserGroup.group_code == group_code
+        with get_session() as session:
+            delete_where(
+                session,
+                UserToUserGroup,
+                UserToUserGroup.group_code == group_code,
             )
-            results = session.exec(stmt).all()
-
-            for result in results:
-                session.delete(result)
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -59,14 +57,12 @@ def delete_user_to_user_group_by_group(group_code: str) -> bool:
 
 def delete_user_to_user_group_by_user(user_code: str) -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(UserToUserGroup).where(
-                UserToUserGroup.user_code == user_code
+        with get_session() as session:
+            delete_where(
+                session,
+                UserToUserGroup,
+                UserToUserGroup.user_code == user_code,
             )
-            results = session.exec(stmt).all()
-
-            for result in results:
-                session.delete(result)
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -78,7 +74,7 @@ def list_user_to_user_group_by_user(
     user_code: str, page_num: int = 1, page_size: int = 10
 ) -> Sequence["UserToUserGroup"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = (
                 select(UserToUserGroup)
                 .where(UserToUserGroup.user_code == user_code)
@@ -93,7 +89,7 @@ def list_user_to_user_group_by_user(
 
 def count_user_to_user_group_by_user(user_code: str) -> int:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(func.count(UserToUserGroup.id)).where(
                 UserToUserGroup.user_code == user_code
             )
@@ -107,7 +103,7 @@ def list_user_to_user_group_by_group(
     group_code: str, page_num: int = 1, page_size: int = 10
 ) -> Sequence["UserToUserGroup"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = (
                 select(UserToUserGroup)
                 .where(UserToUserGroup.group_code == group_code)
@@ -122,11 +118,8 @@ def list_user_to_user_group_by_group(
 
 def delete_all_user_to_user_group() -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(UserToUserGroup)
-            user_to_user_groups = session.exec(stmt).all()
-            for user_to_user_group in user_to_user_groups:
-                session.delete(user_to_user_group)
+        with get_session() as session:
+            delete_where(session, UserToUserGroup)
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -136,7 +129,7 @@ def delete_all_user_to_user_group() -> bool:
 
 def insert_project_to_user(project_to_user: "ProjectToUser") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session() as session:
             session.add(project_to_user)
             session.commit()
             session.refresh(project_to_user)
@@ -150,14 +143,13 @@ def delete_project_to_user_by_project_and_user(
     project_code: str, user_code: str
 ) -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(ProjectToUser).where(
+        with get_session() as session:
+            delete_one(
+                session,
+                ProjectToUser,
                 ProjectToUser.project_code == project_code,
                 ProjectToUser.user_code == user_code,
             )
-            result = session.exec(stmt).one()
-
-            session.delete(result)
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -167,13 +159,12 @@ def delete_project_to_user_by_project_and_user(
 
 def delete_project_to_user_by_project(project_code: str) -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(ProjectToUser).where(
-                ProjectToUser.project_code == project_code
+        with get_session() as session:
+            delete_where(
+                session,
+                ProjectToUser,
+                ProjectToUser.project_code == project_code,
             )
-            results = session.exec(stmt).all()
-            for result in results:
-                session.delete(result)
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -185,7 +176,7 @@ def list_project_to_user_by_project(
     project_code: str, page_num: int = 1, page_size: int = 10
 ) -> Sequence["ProjectToUser"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = (
                 select(ProjectToUser)
                 .where(ProjectToUser.project_code == project_code)
@@ -198,11 +189,29 @@ def list_project_to_user_by_project(
     return list()
 
 
+def list_project_to_user_by_projects(
+    project_codes: Sequence[str],
+) -> Sequence["ProjectToUser"]:
+    if len(project_codes) == 0:
+        return list()
+    try:
+        with get_session(read_only=True) as session:
+            stmt = (
+                select(ProjectToUser)
+                .where(ProjectToUser.project_code.in_(set(project_codes)))
+                .order_by(ProjectToUser.id)
+            )
+            return session.exec(stmt).all()
+    except Exception as e:
+        Logger.error(e)
+    return list()
+
+
 def list_project_to_user_by_user(
     user_code: str, page_num: int = 1, page_size: int = 10
 ) -> Sequence["ProjectToUser"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = (
                 select(ProjectToUser)
                 .where(ProjectToUser.user_code == user_code)
@@ -217,12 +226,8 @@ def list_project_to_user_by_user(
 
 def delete_all_project_to_user() -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(ProjectToUser)
-            results = session.exec(stmt).all()
-
-            for result in results:
-                session.delete(result)
+        with get_session() as session:
+            delete_where(session, ProjectToUser)
             session.commit()
     except Exception as e:
         Logger.error(e)
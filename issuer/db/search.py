@@ -0,0 +1,577 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+import logging
+import math
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import DDL, event, text
+from sqlalchemy.engine import make_url
+from sqlmodel import Session, SQLModel, select
+
+from issuer.config import GET_CONFIG
+from issuer.db.database import SQLALCHEMY_DB_URL, get_session, on_commit
+from issuer.db.models import Issue, IssueComment, Project, ProjectToUser
+
+
+Logger = logging.getLogger(__name__)
+
+
+DOC_TYPES = ("issue", "comment")
+"""被索引的文档类型，分别对应议题的标题、描述以及评论内容"""
+
+TITLE_WEIGHT = 10.0
+"""标题命中时的权重，内容为1"""
+
+SNIPPET_WIDTH = 80
+
+
+class SearchDoc(SQLModel):
+    """
+    被索引的文档
+    """
+
+    doc_type: str
+    """文档类型，见:data:`DOC_TYPES`"""
+
+    id: int
+    """议题或评论的主键"""
+
+    doc_code: str
+    """议题码或评论码"""
+
+    issue_code: str
+    """所属议题码"""
+
+    project_code: str
+    """所属项目码"""
+
+    title: str = ""
+    """标题，仅议题有"""
+
+    content: str = ""
+    """议题描述或评论内容"""
+
+
+class SearchHit(SQLModel):
+    """
+    搜索结果
+    """
+
+    doc_type: str
+    doc_code: str
+    issue_code: str
+    project_code: str
+    snippet: str
+    score: float
+    """相关度，越大越相关"""
+
+
+def split_terms(query: str) -> List[str]:
+    """按空白拆分查询词，各词之间为AND关系，不区分大小写"""
+    return list(dict.fromkeys(term.lower() for term in query.split()))
+
+
+def make_snippet(doc: "SearchDoc", terms: Sequence[str]) -> str:
+    """截取第一个命中词附近的文本，内容未命中时使用标题"""
+    text_ = doc.content
+    lowered = text_.lower()
+    positions = [lowered.find(term) for term in terms]
+    positions = [position for position in positions if position >= 0]
+    if len(positions) == 0 and doc.title != "":
+        text_ = doc.title
+        lowered = text_.lower()
+        positions = [lowered.find(term) for term in terms]
+        positions = [position for position in positions if position >= 0]
+    start = max(min(positions, default=0) - SNIPPET_WIDTH // 4, 0)
+    end = start + SNIPPET_WIDTH
+    snippet = text_[start:end].replace("\n", " ")
+    if start > 0:
+        snippet = "..." + snippet
+    if end < len(text_):
+        snippet = snippet + "..."
+    return snippet
+
+
+def issue_doc(issue: "Issue") -> "SearchDoc":
+    return SearchDoc(
+        doc_type="issue",
+        id=issue.id,
+        doc_code=issue.issue_code,
+        issue_code=issue.issue_code,
+        project_code=issue.project_code,
+        title=issue.title or "",
+        content=issue.description or "",
+    )
+
+
+def comment_doc(comment: "IssueComment", project_code: str) -> "SearchDoc":
+    return SearchDoc(
+        doc_type="comment",
+        id=comment.id,
+        doc_code=comment.comment_code,
+        issue_code=comment.issue_code,
+        project_code=project_code,
+        content=comment.content or "",
+    )
+
+
+def iter_docs(session: "Session") -> Iterator["SearchDoc"]:
+    """遍历数据库中所有需要索引的文档"""
+    for issue in session.exec(select(Issue)):
+        yield issue_doc(issue)
+    stmt = select(IssueComment, Issue.project_code).where(
+        IssueComment.issue_code == Issue.issue_code
+    )
+    for comment, project_code in session.exec(stmt):
+        yield comment_doc(comment, project_code)
+
+
+VISIBLE_PROJECTS = (
+    f"SELECT project_code FROM {Project.__tablename__} "
+    "WHERE privilege = 'Public' OR owner = :visible_to "
+    f"UNION SELECT project_code FROM {ProjectToUser.__tablename__} "
+    "WHERE user_code = :visible_to"
+)
+"""用户可见的项目：公开项目以及其拥有或参与的私有项目"""
+
+
+def visible_project_codes(session: "Session", user_code: str) -> Set[str]:
+    return set(
+        session.exec(text(VISIBLE_PROJECTS), params={"visible_to": user_code})
+        .scalars()
+        .all()
+    )
+
+
+class SearchBackend(ABC):
+    """
+    搜索后端。写入方法在调用方的会话中执行，随调用方的事务一起提交。
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def index(self, session: "Session", docs: Sequence["SearchDoc"]) -> None:
+        """新增或覆盖文档"""
+
+    @abstractmethod
+    def remove(
+        self,
+        session: "Session",
+        doc_type: str,
+        ids: Optional[Sequence[int]] = None,
+    ) -> None:
+        """移除文档，:arg:`ids`为空时移除该类型的全部文档"""
+
+    @abstractmethod
+    def search(
+        self,
+        session: "Session",
+        terms: Sequence[str],
+        project_code: Optional[str] = None,
+        limit: int = 20,
+        visible_to: Optional[str] = None,
+    ) -> List["SearchHit"]:
+        """
+        搜索文档，:arg:`visible_to`不为空时只返回该用户可见的项目中的文档，可见性
+        在截取:arg:`limit`条之前过滤。
+        """
+
+    @abstractmethod
+    def rebuild(self, session: "Session") -> None:
+        """根据数据库中的议题和评论重建索引"""
+
+
+class Fts5Backend(SearchBackend):
+    """
+    基于SQLite FTS5的搜索后端，使用trigram分词以支持中文的子串匹配。文档的rowid由
+    类型和主键计算得出，更新和删除不需要扫描索引。不足3个字符的查询词无法使用
+    trigram索引，退化为对索引表的扫描。
+    """
+
+    name = "fts5"
+
+    def __init__(self) -> None:
+        event.listen(
+            SQLModel.metadata,
+            "after_create",
+            DDL(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+                "doc_type UNINDEXED, doc_code UNINDEXED, "
+                "issue_code UNINDEXED, project_code UNINDEXED, "
+                "title, content, tokenize='trigram')"
+            ).execute_if(dialect="sqlite"),
+        )
+
+    @staticmethod
+    def _rowid(doc_type: str, id_: int) -> int:
+        return id_ * len(DOC_TYPES) + DOC_TYPES.index(doc_type)
+
+    def index(self, session: "Session", docs: Sequence["SearchDoc"]) -> None:
+        if len(docs) == 0:
+            return
+        rows = [
+            {"rowid": self._rowid(doc.doc_type, doc.id), **doc.model_dump()}
+            for doc in docs
+        ]
+        session.exec(
+            text("DELETE FROM search_index WHERE rowid = :rowid"),
+            params=[{"rowid": row["rowid"]} for row in rows],
+        )
+        session.exec(
+            text(
+                "INSERT INTO search_index(rowid, doc_type, doc_code, "
+                "issue_code, project_code, title, content) VALUES (:rowid, "
+                ":doc_type, :doc_code, :issue_code, :project_code, :title, "
+                ":content)"
+            ),
+            params=rows,
+        )
+
+    def remove(
+        self,
+        session: "Session",
+        doc_type: str,
+        ids: Optional[Sequence[int]] = None,
+    ) -> None:
+        if ids is None:
+            session.exec(
+                text("DELETE FROM search_index WHERE doc_type = :doc_type"),
+                params={"doc_type": doc_type},
+            )
+        elif len(ids) > 0:
+            session.exec(
+                text("DELETE FROM search_index WHERE rowid = :rowid"),
+                params=[{"rowid": self._rowid(doc_type, id_)} for id_ in ids],
+            )
+
+    def search(
+        self,
+        session: "Session",
+        terms: Sequence[str],
+        project_code: Optional[str] = None,
+        limit: int = 20,
+        visible_to: Optional[str] = None,
+    ) -> List["SearchHit"]:
+        conditions = list()
+        params = {"limit": limit}
+        long_terms = [term for term in terms if len(term) >= 3]
+        if len(long_terms) > 0:
+            conditions.append("search_index MATCH :query")
+            params["query"] = " ".join(
+                '"' + term.replace('"', '""') + '"' for term in long_terms
+            )
+        for idx, term in enumerate(term for term in terms if len(term) < 3):
+            conditions.append(
+                f"(instr(lower(title), :term{idx}) > 0 "
+                f"OR instr(lower(content), :term{idx}) > 0)"
+            )
+            params[f"term{idx}"] = term
+        if project_code is not None:
+            conditions.append("project_code = :project_code")
+            params["project_code"] = project_code
+        if visible_to is not None:
+            conditions.append(f"project_code IN ({VISIBLE_PROJECTS})")
+            params["visible_to"] = visible_to
+        rank = (
+            f"bm25(search_index, 0, 0, 0, 0, {TITLE_WEIGHT}, 1.0)"
+            if len(long_terms) > 0
+            else "0"
+        )
+        stmt = text(
+            "SELECT doc_type, rowid, doc_code, issue_code, project_code, "
+            f"title, content, {rank} AS score FROM search_index WHERE "
+            + " AND ".join(conditions)
+            + " ORDER BY score LIMIT :limit"
+        )
+        hits = list()
+        for row in session.exec(stmt, params=params):
+            doc = SearchDoc(
+                doc_type=row.doc_type,
+                id=row.rowid // len(DOC_TYPES),
+                doc_code=row.doc_code,
+                issue_code=row.issue_code,
+                project_code=row.project_code,
+                title=row.title,
+                content=row.content,
+            )
+            hits.append(
+                SearchHit(
+                    doc_type=doc.doc_type,
+                    doc_code=doc.doc_code,
+                    issue_code=doc.issue_code,
+                    project_code=doc.project_code,
+                    snippet=make_snippet(doc, terms),
+                    score=-row.score,
+                )
+            )
+        return hits
+
+    def rebuild(self, session: "Session") -> None:
+        session.exec(text("DELETE FROM search_index"))
+        batch = list()
+        for doc in iter_docs(session):
+            batch.append(doc)
+            if len(batch) >= 500:
+                self.index(session, batch)
+                batch = list()
+        self.index(session, batch)
+
+
+def _trigrams(value: str) -> Set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class MemoryBackend(SearchBackend):
+    """
+    纯Python的倒排索引，以小写文本的三元组为词项，查询时先求三元组倒排表的交集，
+    再校验子串并按BM25排序。索引保存在进程内存中，首次查询时从数据库加载，之后在
+    写入提交后更新；多进程部署时各进程看不到其他进程的写入，此时应使用FTS5。
+    """
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._docs: Dict[Tuple[str, int], "SearchDoc"] = dict()
+        self._postings: Dict[str, Set[Tuple[str, int]]] = defaultdict(set)
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def _add(self, doc: "SearchDoc") -> None:
+        key = (doc.doc_type, doc.id)
+        self._discard(key)
+        self._docs[key] = doc
+        for gram in _trigrams(doc.title.lower()) | _trigrams(
+            doc.content.lower()
+        ):
+            self._postings[gram].add(key)
+
+    def _discard(self, key: Tuple[str, int]) -> None:
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for gram in _trigrams(doc.title.lower()) | _trigrams(
+            doc.content.lower()
+        ):
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    self._postings.pop(gram)
+
+    def _apply_index(self, docs: Sequence["SearchDoc"]) -> None:
+        with self._lock:
+            if not self._loaded:
+                # 尚未加载时无需维护，首次查询会从数据库加载最新数据
+                return
+            for doc in docs:
+                self._add(doc)
+
+    def _apply_remove(
+        self, doc_type: str, ids: Optional[Sequence[int]]
+    ) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            if ids is None:
+                ids = [key[1] for key in self._docs if key[0] == doc_type]
+            for id_ in ids:
+                self._discard((doc_type, id_))
+
+    def index(self, session: "Session", docs: Sequence["SearchDoc"]) -> None:
+        docs = list(docs)
+        on_commit(lambda: self._apply_index(docs))
+
+    def remove(
+        self,
+        session: "Session",
+        doc_type: str,
+        ids: Optional[Sequence[int]] = None,
+    ) -> None:
+        ids = list(ids) if ids is not None else None
+        on_commit(lambda: self._apply_remove(doc_type, ids))
+
+    def search(
+        self,
+        session: "Session",
+        terms: Sequence[str],
+        project_code: Optional[str] = None,
+        limit: int = 20,
+        visible_to: Optional[str] = None,
+    ) -> List["SearchHit"]:
+        visible = None
+        if visible_to is not None:
+            visible = visible_project_codes(session, visible_to)
+        with self._lock:
+            if not self._loaded:
+                self.rebuild(session)
+            candidates = None
+            for term in terms:
+                if len(term) < 3:
+                    continue
+                postings = [
+                    self._postings.get(gram, set()) for gram in _trigrams(term)
+                ]
+                keys = set.intersection(*postings)
+                candidates = keys if candidates is None else candidates & keys
+            if candidates is None:
+                candidates = set(self._docs)
+
+            total = max(len(self._docs), 1)
+            avg_length = (
+                sum(
+                    len(doc.title) + len(doc.content)
+                    for doc in self._docs.values()
+                )
+                / total
+            ) or 1.0
+            docs = list()
+            for key in candidates:
+                doc = self._docs[key]
+                if project_code not in (None, doc.project_code):
+                    continue
+                if visible is not None and doc.project_code not in visible:
+                    continue
+                title = doc.title.lower()
+                content = doc.content.lower()
+                if all(term in title or term in content for term in terms):
+                    docs.append(doc)
+
+            # 所有查询词都需命中，各词的文档频率均取命中的文档数
+            df = len(docs)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            hits = list()
+            for doc in docs:
+                title = doc.title.lower()
+                content = doc.content.lower()
+                length = (len(title) + len(content)) / avg_length
+                score = 0.0
+                for term in terms:
+                    tf = TITLE_WEIGHT * title.count(term) + content.count(term)
+                    norm = 1.2 * (0.25 + 0.75 * length)
+                    score += idf * tf * 2.2 / (tf + norm)
+                hits.append(
+                    SearchHit(
+                        doc_type=doc.doc_type,
+                        doc_code=doc.doc_code,
+                        issue_code=doc.issue_code,
+                        project_code=doc.project_code,
+                        snippet=make_snippet(doc, terms),
+                        score=score,
+                    )
+                )
+        hits.sort(key=lambda hit: hit.score, reverse=True)
+        return hits[:limit]
+
+    def rebuild(self, session: "Session") -> None:
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            for doc in iter_docs(session):
+                self._add(doc)
+            self._loaded = True
+
+
+def _fts5_available() -> bool:
+    try:
+        connection = sqlite3.connect(":memory:")
+        connection.execute(
+            "CREATE VIRTUAL TABLE t USING fts5(c, tokenize='trigram')"
+        )
+        connection.close()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def create_backend(name: str) -> "SearchBackend":
+    """
+    创建搜索后端。:arg:`name`为``auto``时，SQLite且支持FTS5的环境使用FTS5，否则
+    使用内存倒排索引。
+    """
+    fts5 = (
+        make_url(SQLALCHEMY_DB_URL).get_backend_name() == "sqlite"
+        and _fts5_available()
+    )
+    if name == "fts5" and not fts5:
+        Logger.warning("FTS5 is not available, fall back to memory index")
+    if name in ("auto", "fts5") and fts5:
+        return Fts5Backend()
+    return MemoryBackend()
+
+
+SEARCH_BACKEND = create_backend(GET_CONFIG("SEARCH_BACKEND", "auto"))
+
+
+def index_issue(session: "Session", issue: "Issue") -> None:
+    """在:arg:`session`的事务中更新议题的索引，:arg:`issue`需已flush"""
+    SEARCH_BACKEND.index(session, [issue_doc(issue)])
+
+
+def index_comment(session: "Session", comment: "IssueComment") -> None:
+    """在:arg:`session`的事务中更新评论的索引，:arg:`comment`需已flush"""
+    stmt = select(Issue.project_code).where(
+        Issue.issue_code == comment.issue_code
+    )
+    project_code = session.exec(stmt).first() or ""
+    SEARCH_BACKEND.index(session, [comment_doc(comment, project_code)])
+
+
+def index_comments(
+    session: "Session", comments: Sequence["IssueComment"]
+) -> None:
+    """同:func:`index_comment`，所属项目只查询一次"""
+    if len(comments) == 0:
+        return
+    stmt = select(Issue.issue_code, Issue.project_code).where(
+        Issue.issue_code.in_({comment.issue_code for comment in comments})
+    )
+    project_codes = dict(session.exec(stmt).all())
+    SEARCH_BACKEND.index(
+        session,
+        [
+            comment_doc(comment, project_codes.get(comment.issue_code, ""))
+            for comment in comments
+        ],
+    )
+
+
+def unindex(
+    session: "Session", doc_type: str, ids: Optional[Sequence[int]] = None
+) -> None:
+    SEARCH_BACKEND.remove(session, doc_type, ids)
+
+
+def rebuild_search_index(session: "Session") -> None:
+    SEARCH_BACKEND.rebuild(session)
+
+
+def search_issues(
+    query: str,
+    project_code: Optional[str] = None,
+    limit: int = 20,
+    visible_to: Optional[str] = None,
+) -> List["SearchHit"]:
+    """
+    搜索议题标题、描述以及评论内容。
+
+    Args:
+        query: 查询语句，空白分隔的各词之间为AND关系。
+        project_code: 限定所属项目。
+        limit: 返回的最大条数。
+        visible_to: 用户码，只返回该用户可见的项目中的内容。
+
+    """
+    terms = split_terms(query)
+    if len(terms) == 0:
+        return list()
+    try:
+        with get_session(read_only=True) as session:
+            return SEARCH_BACKEND.search(
+                session, terms, project_code, limit, visible_to
+            )
+    except Exception as e:
+        Logger.error(e)
+    return list()
@@ -0,0 +1,146 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from issuer.config import GET_CONFIG
+from issuer.db.database import get_session
+from issuer.db.gen import generate_code
+from issuer.db.metas import _metas_changed
+from issuer.db.models import Metas, User
+
+
+Logger = logging.getLogger(__name__)
+
+
+DEFAULT_PASSWD = "21232f297a57a5a743894a0e4a801fc3"
+"""初始用户的默认密码，即admin的MD5值"""
+
+
+BOT_EMAIL = GET_CONFIG("SEED_BOT_EMAIL", "bot@issuer.com")
+"""自动评论机器人的邮箱，回调处理通过其查找机器人用户"""
+
+
+SEED_USERS = (
+    ("SEED_ADMIN", "admin", "admin@issuer.com", "admin"),
+    ("SEED_BOT", "自动评论", "bot@issuer.com", "admin"),
+)
+"""
+初始用户，依次为环境变量前缀、用户名、邮箱和角色。用户名、邮箱和密码可以通过
+``<前缀>_NAME``、``<前缀>_EMAIL``和``<前缀>_PASSWD``覆盖，密码为MD5值
+"""
+
+
+SEED_METAS = {
+    "USER_ROLE": "admin:管理员,default:默认",
+    "PROJECT_STATUS": "start:开始,processing:进行,checking:验收,checked:完工",
+    "ISSUE_STATUS": "open:开放,finished:完成,closed:关闭",
+}
+"""
+初始元数据，键为元数据类型，值为逗号分隔的``值:备注``，可以通过
+``SEED_<元数据类型>``覆盖，如``SEED_ISSUE_STATUS=open:开放,closed:关闭``
+"""
+
+
+def get_seed_users() -> List["User"]:
+    users = list()
+    for prefix, name, email, role in SEED_USERS:
+        users.append(
+            User(
+                user_name=GET_CONFIG(f"{prefix}_NAME", name),
+                passwd=GET_CONFIG(f"{prefix}_PASSWD", DEFAULT_PASSWD),
+                role=role,
+                email=GET_CONFIG(f"{prefix}_EMAIL", email),
+            )
+        )
+    return users
+
+
+def get_seed_metas() -> List["Metas"]:
+    metas = list()
+    for meta_type, default in SEED_METAS.items():
+        for item in GET_CONFIG(f"SEED_{meta_type}", default).split(","):
+            if item.strip() == "":
+                continue
+            value, _, note = item.partition(":")
+            metas.append(
+                Metas(
+                    meta_type=meta_type,
+                    meta_value=value.strip(),
+                    note=note.strip() or None,
+                )
+            )
+    return metas
+
+
+def _seed(
+    users: List["User"], metas: List["Metas"]
+) -> Tuple[List["User"], List["Metas"]]:
+    with get_session() as session:
+        existing = set(
+            session.exec(
+                select(User.email).where(
+                    User.email.in_([user.email for user in users])
+                )
+            ).all()
+        )
+        users = [user for user in users if user.email not in existing]
+        existing = set(
+            session.exec(
+                select(Metas.meta_type, Metas.meta_value).where(
+                    tuple_(Metas.meta_type, Metas.meta_value).in_(
+                        [(meta.meta_type, meta.meta_value) for meta in metas]
+                    )
+                )
+            ).all()
+        )
+        metas = [
+            meta
+            for meta in metas
+            if (meta.meta_type, meta.meta_value) not in existing
+        ]
+        if len(users) > 0:
+            for user in users:
+                user.user_code = generate_code("US")
+            session.exec(
+                insert(User).values(
+                    [user.model_dump(exclude={"id"}) for user in users]
+                )
+            )
+        if len(metas) > 0:
+            session.exec(
+                insert(Metas).values(
+                    [meta.model_dump(exclude={"id"}) for meta in metas]
+                )
+            )
+            _metas_changed(session)
+        session.commit()
+    return users, metas
+
+
+def seed_database() -> Optional[Dict[str, int]]:
+    """
+    写入初始用户和元数据。每张表用一次查询找出已存在的初始数据，缺少的用一条
+    多行INSERT写入，重复执行不会写入重复的数据。
+
+    Returns:
+        各表写入的行数，失败时返回``None``。
+
+    """
+    users, metas = get_seed_users(), get_seed_metas()
+    for _ in range(2):
+        try:
+            users, metas = _seed(users, metas)
+            break
+        except IntegrityError as e:
+            # 多个进程同时启动时可能都认为数据缺失，重新检查一次
+            Logger.info(e)
+        except Exception as e:
+            Logger.error(e)
+            return None
+    else:
+        return None
+    Logger.info(f"Seeded {len(users)} users and {len(metas)} metas")
+    return {"users": len(users), "metas": len(metas)}
@@ -0,0 +1,197 @@
+from collections import defaultdict
+from datetime import date
+import logging
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from issuer.db.database import get_session
+from issuer.db.models import Issue, ProjectIssueStats
+
+
+Logger = logging.getLogger(__name__)
+
+
+Bucket = Tuple[str, date, str]
+"""(project_code, day, status)"""
+
+
+def _current_bucket(issue: "Issue") -> "Bucket":
+    return issue.project_code, issue.propose_date, issue.status
+
+
+def _committed_bucket(issue: "Issue") -> "Bucket":
+    state = inspect(issue)
+    values = list()
+    for name in ("project_code", "propose_date", "status"):
+        history = state.attrs[name].history
+        if len(history.deleted) > 0:
+            values.append(history.deleted[0])
+        else:
+            values.append(getattr(issue, name))
+    return tuple(values)
+
+
+def _upsert_stats(session: "Session", deltas: Dict["Bucket", int]) -> None:
+    connection = session.connection()
+    dialect = connection.dialect.name
+    for (project_code, day, status), delta in deltas.items():
+        values = dict(
+            project_code=project_code, day=day, status=status, count=delta
+        )
+        if dialect in ("sqlite", "postgresql"):
+            dialect_insert = (
+                sqlite.insert if dialect == "sqlite" else postgresql.insert
+            )
+            stmt = dialect_insert(ProjectIssueStats).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["project_code", "day", "status"],
+                set_={"count": ProjectIssueStats.count + stmt.excluded.count},
+            )
+            connection.execute(stmt)
+            continue
+        stmt = (
+            update(ProjectIssueStats)
+            .where(ProjectIssueStats.project_code == project_code)
+            .where(ProjectIssueStats.day == day)
+            .where(ProjectIssueStats.status == status)
+            .values(count=ProjectIssueStats.count + delta)
+        )
+        if connection.execute(stmt).rowcount == 0:
+            connection.execute(insert(ProjectIssueStats).values(**values))
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_issue_stats(session: "Session", flush_context) -> None:
+    """
+    在flush时根据新增、删除以及状态或日期发生变化的议题增量更新统计，与议题的写入
+    处于同一事务。after_flush时各属性的修改历史仍然可用，因此无论议题对象经由何处
+    修改都能得到修改前的值。
+    """
+    deltas: Dict["Bucket", int] = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, Issue):
+            deltas[_current_bucket(obj)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Issue):
+            deltas[_committed_bucket(obj)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Issue):
+            old, new = _committed_bucket(obj), _current_bucket(obj)
+            if old != new:
+                deltas[old] -= 1
+                deltas[new] += 1
+    deltas = {bucket: delta for bucket, delta in deltas.items() if delta}
+    if len(deltas) > 0:
+        _upsert_stats(session, deltas)
+
+
+def rebuild_issue_stats(
+    session: "Session", project_code: Optional[str] = None
+) -> None:
+    """在:arg:`session`的事务中根据议题表重建统计"""
+    stmt = delete(ProjectIssueStats)
+    if project_code is not None:
+        stmt = stmt.where(ProjectIssueStats.project_code == project_code)
+    session.exec(stmt)
+    columns = [Issue.project_code, Issue.propose_date, Issue.status]
+    source = select(*columns, func.count()).group_by(*columns)
+    if project_code is not None:
+        source = source.where(Issue.project_code == project_code)
+    session.exec(
+        insert(ProjectIssueStats).from_select(
+            ["project_code", "day", "status", "count"], source
+        )
+    )
+
+
+def rebuild_project_issue_stats(project_code: Optional[str] = None) -> bool:
+    """
+    根据议题表重建统计，用于修复统计偏差。
+
+    Args:
+        project_code: 只重建该项目，为空时重建全部项目。
+
+    """
+    try:
+        with get_session() as session:
+            rebuild_issue_stats(session, project_code)
+            session.commit()
+    except Exception as e:
+        Logger.error(e)
+        return False
+    return True
+
+
+def _stat_issues(
+    columns,
+    project_code: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    # 读取按日汇总的统计，代价与天数相关而与议题数无关
+    stmt = select(*columns, func.sum(ProjectIssueStats.count)).where(
+        ProjectIssueStats.project_code == project_code
+    )
+    if start_date is not None:
+        stmt = stmt.where(ProjectIssueStats.day >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(ProjectIssueStats.day <= end_date)
+    stmt = stmt.group_by(*columns).having(
+        func.sum(ProjectIssueStats.count) > 0
+    )
+    with get_session(read_only=True) as session:
+        return session.exec(stmt).all()
+
+
+def stat_issues_by_status(
+    project_code: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[str, int]:
+    """按状态统计提出日期在给定范围内的议题个数"""
+    try:
+        rows = _stat_issues(
+            [ProjectIssueStats.status], project_code, start_date, end_date
+        )
+        return {status: count for status, count in rows}
+    except Exception as e:
+        Logger.error(e)
+    return dict()
+
+
+def stat_issues_by_date(
+    project_code: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[date, int]:
+    """按提出日期统计给定范围内的议题个数"""
+    try:
+        rows = _stat_issues(
+            [ProjectIssueStats.day], project_code, start_date, end_date
+        )
+        return {day: count for day, count in rows}
+    except Exception as e:
+        Logger.error(e)
+    return dict()
+
+
+def stat_issues_by_date_and_status(
+    project_code: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[Tuple[date, str], int]:
+    """按提出日期和状态统计给定范围内的议题个数"""
+    try:
+        rows = _stat_issues(
+            [ProjectIssueStats.day, ProjectIssueStats.status],
+            project_code,
+            start_date,
+            end_date,
+        )
+        return {(day, status): count for day, status, count in rows}
+    except Exception as e:
+        Logger.error(e)
+    return dict()
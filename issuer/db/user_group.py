@@ -2,11 +2,13 @@ from datetime import datetime
 import logging
 from typing import Optional, Sequence
 
-from sqlalchemy import func
-from sqlmodel import Session, or_, select
+from sqlalchemy import exists, func
+from sqlmodel import or_, select
 
-from issuer.db.database import DatabaseFactory
+from issuer.db.bulk import delete_one, delete_where
+from issuer.db.database import get_session
 from issuer.db.gen import generate_code
+from issuer.db.pagination import paginate
 from issuer.db.models import UserGroup, UserToUserGroup
 
 
@@ -14,10 +16,10 @@ Logger = logging.getLogger(__name__)
 
 
 def insert_user_group(user_group: "UserGroup") -> str | None:
-    if user_group.group_code is None:
-        user_group.group_code = generate_code("UG")
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        if user_group.group_code is None:
+            user_group.group_code = generate_code("UG")
+        with get_session() as session:
             session.add(user_group)
             session.commit()
             session.refresh(user_group)
@@ -29,7 +31,7 @@ def insert_user_group(user_group: "UserGroup") -> str | None:
 
 def update_user_group_by_code(user_group: "UserGroup") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session() as session:
             stmt = select(UserGroup).where(
                 UserGroup.group_code == user_group.group_code
             )
@@ -51,12 +53,8 @@ def update_user_group_by_code(user_group: "UserGroup") -> bool:
 
 def delete_user_group_by_code(group_code: str) -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(UserGroup).where(UserGroup.group_code == group_code)
-            results = session.exec(stmt)
-            result = results.one()
-
-            session.delete(result)
+        with get_session() as session:
+            delete_one(session, UserGroup, UserGroup.group_code == group_code)
             session.commit()
     except Exception as e:
         Logger.error(e)
@@ -66,7 +64,7 @@ def delete_user_group_by_code(group_code: str) -> bool:
 
 def find_user_group_by_code(group_code: str) -> Optional["UserGroup"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(UserGroup).where(UserGroup.group_code == group_code)
             results = session.exec(stmt)
             return results.one()
@@ -77,7 +75,7 @@ def find_user_group_by_code(group_code: str) -> Optional["UserGroup"]:
 
 def find_user_group_by_owner(owner: str) -> Sequence["UserGroup"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(UserGroup).where(UserGroup.group_owner == owner)
             results = session.exec(stmt)
             return results.all()
@@ -93,12 +91,15 @@ def list_user_group_by_condition(
     members: Optional[Sequence[str]] = None,
     page_num: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
 ) -> Sequence["UserGroup"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(UserGroup).where(
+        with get_session(read_only=True) as session:
+            # 成员关系的条件放在EXISTS子查询中，避免连接后再DISTINCT
+            u2g_stmt = select(UserToUserGroup.id).where(
                 UserGroup.group_code == UserToUserGroup.group_code
             )
+            stmt = select(UserGroup)
             if group_code is not None:
                 stmt = stmt.where(UserGroup.group_code == group_code)
             if group_name is not None:
@@ -111,12 +112,9 @@ def list_user_group_by_condition(
                 or_clauses = []
                 for member in members:
                     or_clauses.append(UserToUserGroup.user_code == member)
-                stmt = stmt.where(or_(*or_clauses))
-            stmt = (
-                stmt.distinct()
-                .limit(page_size)
-                .offset((page_num - 1) * page_size)
-            )
+                u2g_stmt = u2g_stmt.where(or_(*or_clauses))
+            stmt = stmt.where(exists(u2g_stmt))
+            stmt = paginate(stmt, UserGroup, page_num, page_size, cursor)
             results = session.exec(stmt)
             return results.all()
     except Exception as e:
@@ -131,7 +129,7 @@ def count_user_group_by_condition(
     members: Optional[Sequence[str]] = None,
 ) -> Optional[int]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(func.count(UserGroup.id)).where(
                 UserGroup.group_code == UserToUserGroup.group_code
             )
@@ -158,12 +156,8 @@ def count_user_group_by_condition(
 
 def delete_all_user_groups() -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(UserGroup)
-            results = session.exec(stmt).all()
-
-            for result in results:
-                session.delete(result)
+        with get_session() as session:
+            delete_where(session, UserGroup)
             session.commit()
     except Exception as e:
         Logger.error(e)
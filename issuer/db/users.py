@@ -1,35 +1,129 @@
 from datetime import datetime
 import logging
+import threading
+import time
 from typing import Optional, Sequence
-from sqlmodel import Session, select
-from issuer.db.models import User
-from issuer.db.database import DatabaseFactory
-from issuer.db.gen import generate_code
+from sqlmodel import select
+from issuer.cache import TTLCache
+from issuer.config import GET_CONFIG
+from issuer.db.models import Counter, User
+from issuer.db.bulk import delete_one, delete_where
+from issuer.db.database import (
+    find_identity,
+    forget_identity,
+    get_session,
+    on_commit,
+    remember_identity,
+)
+from issuer.db.gen import generate_code, reserve
+from issuer.db.pagination import paginate
 
 
 Logger = logging.getLogger(__name__)
 
 
+USER_TOKEN_CACHE = TTLCache(
+    maxsize=int(GET_CONFIG("AUTH_CACHE_SIZE", 1024)),
+    ttl=float(GET_CONFIG("AUTH_CACHE_TTL", 10)),
+)
+"""登录校验缓存，键为(user_code, token)"""
+
+
+TOKEN_VERSION = "token_version"
+"""令牌版本号的计数器名称，登出、修改密码或角色以及删除用户时递增，登录时不递增"""
+
+
+class TokenRevocations:
+    """
+    跨进程的登录校验缓存失效。撤销令牌的写操作在同一事务中递增数据库中的版本号，
+    各进程每隔:arg:`interval`秒至多检查一次，版本号变化时清空本进程的缓存，其他
+    进程最多在该间隔内继续接受被撤销的令牌。
+
+    Args:
+        interval: 检查版本号的间隔秒数。
+
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.interval:
+                return
+            self._checked_at = now
+        try:
+            with get_session(read_only=True) as session:
+                version = session.exec(
+                    select(Counter.value).where(Counter.name == TOKEN_VERSION)
+                ).one_or_none()
+        except Exception as e:
+            Logger.error(e)
+            # 无法确认时不使用缓存
+            USER_TOKEN_CACHE.clear()
+            return
+        with self._lock:
+            if version != self.version:
+                USER_TOKEN_CACHE.clear()
+                self.version = version
+
+
+TOKEN_REVOCATIONS = TokenRevocations(
+    interval=float(GET_CONFIG("AUTH_REVOCATION_INTERVAL", 1))
+)
+"""应用使用的令牌撤销检查"""
+
+
+def _invalidate_token_cache(user_code: Optional[str] = None) -> None:
+    if user_code is None:
+        USER_TOKEN_CACHE.clear()
+    else:
+        USER_TOKEN_CACHE.invalidate(lambda key: key[0] == user_code)
+
+
+def invalidate_token_cache(user_code: Optional[str] = None) -> None:
+    """
+    移除登录校验缓存，:arg:`user_code`为空时清空。提交后会再移除一次，防止并发请求
+    在提交前把旧数据写回缓存。
+    """
+    _invalidate_token_cache(user_code)
+    on_commit(lambda: _invalidate_token_cache(user_code))
+
+
 def insert_user(user: "User") -> bool:
-    if user.user_code is None:
-        user.user_code = generate_code("US")
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        if user.user_code is None:
+            user.user_code = generate_code("US")
+        with get_session() as session:
             session.add(user)
             session.commit()
             session.refresh(user)
     except Exception:
         return False
+    remember_identity(User, user.user_code, user)
     return True
 
 
 def update_user_by_code(user: "User") -> bool:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(User).where(User.user_code == user.user_code)
-            results = session.exec(stmt)
-            result = results.one()
-
+        with get_session() as session:
+            result = find_identity(User, user.user_code)
+            if result is None:
+                stmt = select(User).where(User.user_code == user.user_code)
+                results = session.exec(stmt)
+                result = results.one()
+
+            # 登录只签发新令牌，不递增版本号以免清空各进程的缓存，被替换的旧令牌
+            # 在其他进程中至多在缓存存活时间内有效
+            revoked = (
+                (result.token is not None and user.token is None)
+                or result.passwd != user.passwd
+                or result.role != user.role
+            )
             result.gmt_modified = datetime.utcnow()
             result.user_name = user.user_name
             result.passwd = user.passwd
@@ -41,40 +135,42 @@ def update_user_by_code(user: "User") -> bool:
             result.avatar = user.avatar
 
             session.add(result)
+            if revoked:
+                reserve(session, TOKEN_VERSION)
             session.commit()
             session.refresh(result)
     except Exception as e:
         Logger.error(e)
         return False
+    invalidate_token_cache(user.user_code)
     return True
 
 
 def delete_user_by_code(user_code: str):
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = select(User).where(User.user_code == user_code)
-            results = session.exec(stmt)
-            result = results.one()
-
-            session.delete(result)
+        with get_session() as session:
+            delete_one(session, User, User.user_code == user_code)
+            reserve(session, TOKEN_VERSION)
             session.commit()
     except Exception as e:
         Logger.error(e)
+    forget_identity(User, user_code)
+    invalidate_token_cache(user_code)
     return True
 
 
 def delete_all_users():
-    with Session(DatabaseFactory.get_db().get_engine()) as session:
-        stmt = select(User)
-        results = session.exec(stmt).all()
-        for result in results:
-            session.delete(result)
+    with get_session() as session:
+        delete_where(session, User)
+        reserve(session, TOKEN_VERSION)
         session.commit()
+    forget_identity(User)
+    invalidate_token_cache()
 
 
 def find_user_by_email(email: str) -> Optional["User"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(User).where(User.email == email)
             return session.exec(stmt).one()
     except Exception as e:
@@ -83,24 +179,61 @@ def find_user_by_email(email: str) -> Optional["User"]:
 
 
 def find_user_by_code(user_code: str) -> Optional["User"]:
+    user = find_identity(User, user_code)
+    if user is not None:
+        return user
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
+        with get_session(read_only=True) as session:
             stmt = select(User).where(User.user_code == user_code)
-            return session.exec(stmt).one()
+            user = session.exec(stmt).one()
+            remember_identity(User, user_code, user)
+            return user
     except Exception as e:
         Logger.error(e)
     return None
 
 
-def list_users(page_num: int = 1, page_size: int = 10) -> Sequence["User"]:
+def find_user_by_token(user_code: str, token: str) -> Optional["User"]:
+    """
+    根据用户码和token查询用户，token不匹配时返回空。结果缓存在
+    :data:`USER_TOKEN_CACHE`中，命中时不查询用户，其他进程撤销的令牌由
+    :data:`TOKEN_REVOCATIONS`发现。
+    """
+    TOKEN_REVOCATIONS.check()
+    key = (user_code, token)
+    user = USER_TOKEN_CACHE.get(key)
+    if user is not None:
+        return user
+    user = find_user_by_code(user_code)
+    if user is None or user.token != token:
+        return None
+    # 缓存副本，避免跨会话共享ORM对象
+    USER_TOKEN_CACHE.set(key, User(**user.model_dump()))
+    return user
+
+
+def list_users(
+    page_num: int = 1, page_size: int = 10, cursor: Optional[str] = None
+) -> Sequence["User"]:
     try:
-        with Session(DatabaseFactory.get_db().get_engine()) as session:
-            stmt = (
-                select(User)
-                .limit(page_size)
-                .offset((page_num - 1) * page_size)
-            )
+        with get_session(read_only=True) as session:
+            stmt = paginate(select(User), User, page_num, page_size, cursor)
             return session.exec(stmt).all()
     except Exception as e:
         Logger.error(e)
     return list()
+
+
+def list_users_by_codes(user_codes: Sequence[str]) -> Sequence["User"]:
+    if len(user_codes) == 0:
+        return list()
+    try:
+        with get_session(read_only=True) as session:
+            stmt = select(User).where(User.user_code.in_(set(user_codes)))
+            results = session.exec(stmt).all()
+            for result in results:
+                remember_identity(User, result.user_code, result)
+            return results
+    except Exception as e:
+        Logger.error(e)
+    return list()
@@ -0,0 +1,98 @@
+import logging
+from typing import List, Optional, Sequence
+
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from issuer.cache import TTLCache
+from issuer.config import GET_CONFIG
+from issuer.db.bulk import delete_where
+from issuer.db.database import get_session, on_commit
+from issuer.db.models import WebhookDelivery
+
+
+Logger = logging.getLogger(__name__)
+
+
+DELIVERY_CACHE = TTLCache(
+    maxsize=int(GET_CONFIG("WEBHOOK_DEDUP_CACHE_SIZE", 4096))
+)
+"""已记录的投递标识，重试的投递不必查询投递记录"""
+
+
+def record_webhook_delivery(
+    delivery_id: str, project_code: str, commit_ids: Sequence[str]
+) -> Optional[List[str]]:
+    """
+    记录一次推送回调的投递，用一次索引查询找出已记录的投递和提交，并用一条多行
+    INSERT记录其余的提交。
+
+    Args:
+        delivery_id: 投递标识。
+        project_code: 项目码。
+        commit_ids: 推送包含的提交标识。
+
+    Returns:
+        需要处理的提交标识，投递已记录时为空列表，失败时返回``None``。
+
+    """
+    if delivery_id in DELIVERY_CACHE:
+        return list()
+    try:
+        with get_session() as session:
+            stmt = select(
+                WebhookDelivery.delivery_id, WebhookDelivery.commit_id
+            ).where(
+                or_(
+                    WebhookDelivery.delivery_id == delivery_id,
+                    (WebhookDelivery.project_code == project_code)
+                    & WebhookDelivery.commit_id.in_(set(commit_ids)),
+                )
+            )
+            rows = session.exec(stmt).all()
+            if any(row[0] == delivery_id for row in rows):
+                DELIVERY_CACHE.set(delivery_id, True)
+                return list()
+            delivered = {row[1] for row in rows}
+            commit_ids = list(
+                dict.fromkeys(
+                    commit_id
+                    for commit_id in commit_ids
+                    if commit_id not in delivered
+                )
+            )
+            if len(commit_ids) > 0:
+                session.exec(
+                    insert(WebhookDelivery),
+                    params=[
+                        {
+                            "delivery_id": delivery_id,
+                            "project_code": project_code,
+                            "commit_id": commit_id,
+                        }
+                        for commit_id in commit_ids
+                    ],
+                )
+            session.commit()
+    except IntegrityError as e:
+        # 并发的投递已经记录了这些提交
+        Logger.warning(e)
+        return list()
+    except Exception as e:
+        Logger.error(e)
+        return None
+    on_commit(lambda: DELIVERY_CACHE.set(delivery_id, True))
+    return commit_ids
+
+
+def delete_all_webhook_deliveries() -> bool:
+    try:
+        with get_session() as session:
+            delete_where(session, WebhookDelivery)
+            session.commit()
+    except Exception as e:
+        Logger.error(e)
+        return False
+    DELIVERY_CACHE.clear()
+    return True
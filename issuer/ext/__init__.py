@@ -1 +1,11 @@
+from issuer.ext.base import (
+    ADAPTORS,
+    ForgeAdaptor,
+    PushCommit,
+    get_adaptor,
+    register_adaptor,
+)
 from issuer.ext.gitea import GiteaAdaptor
+from issuer.ext.gitlab import GitLabAdaptor
+from issuer.ext.github import GitHubAdaptor
+from issuer.ext.tokenizer import CommitRefs, tokenize
@@ -0,0 +1,207 @@
+from datetime import datetime
+import json
+import logging
+from typing import ClassVar, Dict, List, NamedTuple, Optional, Sequence, Type
+
+from issuer import db
+from issuer.cache import TTLCache
+from issuer.config import GET_CONFIG
+from issuer.db.models import Activity, IssueComment
+from issuer.db.seed import BOT_EMAIL
+from issuer.ext.tokenizer import tokenize
+
+
+Logger = logging.getLogger(__name__)
+
+
+BOT_CACHE = TTLCache(maxsize=1, ttl=300)
+"""自动评论机器人用户码的缓存"""
+
+
+CLOSE_BY_KEYWORD = bool(int(GET_CONFIG("FORGE_CLOSE_BY_KEYWORD", 0)))
+"""是否只完成紧跟在close、fix、resolve等关键字后引用的议题，默认完成所有引用的议题"""
+
+
+def get_bot_code() -> str:
+    bot_code = BOT_CACHE.get(BOT_EMAIL)
+    if bot_code is None:
+        bot = db.find_user_by_email(BOT_EMAIL)
+        if bot is None:
+            raise RuntimeError("Cannot find the user bot")
+        bot_code = bot.user_code
+        BOT_CACHE.set(BOT_EMAIL, bot_code)
+    return bot_code
+
+
+class PushCommit(NamedTuple):
+    """
+    各代码托管平台推送回调中的提交，一次推送可能包含大量提交，使用元组以减少开销
+    """
+
+    commit_id: Optional[str]
+    """提交标识"""
+
+    author: str
+    """提交者名称"""
+
+    message: str
+    """提交信息"""
+
+    url: str
+    """提交的链接"""
+
+
+class ForgeAdaptor:
+    """
+    代码托管平台的适配器。子类将平台的推送回调转换为:class:`PushCommit`，提交中
+    ``$议题编号``形式的引用由本类统一处理：为被引用的议题添加评论和活动，并将其
+    标记为完成。开启:attr:`close_by_keyword`时只完成紧跟在close、fix、resolve等
+    关键字后引用的议题。
+
+    Args:
+        project_code: 回调所属的项目码。
+
+    """
+
+    name: ClassVar[str]
+    """平台名称，即回调地址中的平台部分"""
+
+    delivery_header: ClassVar[Optional[str]] = None
+    """投递标识所在的请求头，平台重试时该值不变"""
+
+    close_by_keyword: ClassVar[bool] = CLOSE_BY_KEYWORD
+    """是否只完成关键字后引用的议题，见``FORGE_CLOSE_BY_KEYWORD``"""
+
+    def __init__(self, project_code: str) -> None:
+        self.project_code = project_code
+
+    def extract_commits(self, payload: Dict) -> List["PushCommit"]:
+        """
+        提取推送中的提交，默认按Gitea、GitLab和GitHub共有的``commits``列表格式
+        解析。
+        """
+        return [
+            PushCommit(
+                commit_id=commit.get("id"),
+                author=commit["author"]["name"],
+                message=commit["message"],
+                url=commit["url"],
+            )
+            for commit in payload.get("commits") or list()
+        ]
+
+    def parse_commits(self, payload: Dict):
+        """
+        处理一次推送的全部提交。提交中引用的议题用一次查询取出，评论、活动和议题
+        状态分别批量写入，处于会话作用域时在同一事务中提交。
+        """
+        try:
+            refs = list()
+            for commit in self.extract_commits(payload):
+                tokens = tokenize(commit.message)
+                if len(tokens.ids) > 0:
+                    refs.append((commit, tokens))
+            if len(refs) == 0:
+                return
+            issues = {
+                issue.issue_id: issue
+                for issue in db.list_issues_by_project_and_code_ids(
+                    self.project_code,
+                    [_id for _, tokens in refs for _id in tokens.ids],
+                )
+            }
+            project = db.find_project_by_code(self.project_code)
+            if project is None:
+                raise RuntimeError("Cannot find the project")
+            bot_code = get_bot_code()
+
+            comments, activities, closed = list(), list(), set()
+            for commit, tokens in refs:
+                for _id in tokens.ids:
+                    issue = issues.get(_id)
+                    if issue is None:
+                        Logger.warning(
+                            f"Cannot find issue {_id} in {self.project_code}"
+                        )
+                        continue
+                    closes = (
+                        not self.close_by_keyword or _id in tokens.closes
+                    )
+                    if closes:
+                        closed.add(issue.issue_code)
+                    comments.append(
+                        self._build_comment(
+                            issue.issue_code,
+                            bot_code,
+                            commit.author,
+                            commit.url,
+                            tokens.urls,
+                            closes,
+                        )
+                    )
+                    ext_info = json.dumps(
+                        {"name": f"{project.project_name}#{issue.issue_id}"}
+                    )
+                    activities.append(
+                        Activity(
+                            subject=bot_code,
+                            target=issue.issue_code,
+                            category="NewComment",
+                            ext_info=ext_info,
+                        )
+                    )
+            if not db.insert_issue_comments(comments):
+                raise RuntimeError("Cannot insert comments")
+            if not db.insert_activities(activities):
+                raise RuntimeError("Cannot insert activities")
+            if len(closed) > 0 and not db.update_issues_status(
+                list(closed), "finished"
+            ):
+                raise RuntimeError("Cannot update issue status")
+        except Exception as e:
+            raise RuntimeError(
+                f"Cannot parse the push to {self.project_code}"
+            ) from e
+
+    @staticmethod
+    def _build_comment(
+        issue_code: str,
+        bot_code: str,
+        commiter: str,
+        git_compare_url: str,
+        urls: Sequence[str],
+        closes: bool = True,
+    ) -> "IssueComment":
+        action = "通过提交代码完成了本议题" if closes else "在提交中引用了本议题"
+        content = f"""_{commiter}{action}_ \n\n_代码仓库链接详情[{git_compare_url}]({git_compare_url})_"""  # noqa
+        if len(urls) > 0:
+            content += """\n\n_包含其它参考链接详情："""
+            for idx, url in enumerate(urls):
+                content += f"""[链接{idx + 1}]({url})"""
+            content += "_"
+        return IssueComment(
+            issue_code=issue_code,
+            comment_time=datetime.now(),
+            commenter=bot_code,
+            fold=False,
+            content=content,
+        )
+
+
+ADAPTORS: Dict[str, Type["ForgeAdaptor"]] = dict()
+"""已注册的适配器，键为平台名称"""
+
+
+def register_adaptor(
+    adaptor: Type["ForgeAdaptor"],
+) -> Type["ForgeAdaptor"]:
+    """注册适配器，可用作类装饰器"""
+    ADAPTORS[adaptor.name] = adaptor
+    return adaptor
+
+
+def get_adaptor(name: str, project_code: str) -> Optional["ForgeAdaptor"]:
+    adaptor = ADAPTORS.get(name)
+    if adaptor is None:
+        return None
+    return adaptor(project_code)
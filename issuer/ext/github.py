@@ -0,0 +1,23 @@
+from typing import Dict, List
+
+from issuer.ext.base import ForgeAdaptor, PushCommit, register_adaptor
+
+
+@register_adaptor
+class GitHubAdaptor(ForgeAdaptor):
+    name = "github"
+    delivery_header = "X-GitHub-Delivery"
+
+    def extract_commits(self, payload: Dict) -> List["PushCommit"]:
+        # ``distinct``为false的提交已经随推送到其他分支时处理过
+        return [
+            PushCommit(
+                commit_id=commit.get("id"),
+                author=commit["author"].get("name")
+                or commit["author"].get("username", ""),
+                message=commit["message"],
+                url=commit["url"],
+            )
+            for commit in payload.get("commits") or list()
+            if commit.get("distinct", True)
+        ]
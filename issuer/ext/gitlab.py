@@ -0,0 +1,7 @@
+from issuer.ext.base import ForgeAdaptor, register_adaptor
+
+
+@register_adaptor
+class GitLabAdaptor(ForgeAdaptor):
+    name = "gitlab"
+    delivery_header = "X-Gitlab-Event-UUID"
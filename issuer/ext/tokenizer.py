@@ -0,0 +1,46 @@
+import re
+from typing import List, NamedTuple
+
+
+TOKEN_PATTERN = re.compile(
+    # 先以首字符过滤，大多数位置不必逐个尝试各分支
+    r"(?=[$hcfrCFR])(?:"
+    r"(https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+)"
+    r"|\$(\d+)"
+    r"|(?<!\w)(?:[cC]lose[sd]?|[fF]ix(?:e[sd])?|[rR]esolve[sd]?)\b"
+    r"(?::?\s*\$(\d+))?)"
+)
+"""
+提交信息中的链接、``$议题编号``形式的议题引用以及紧跟在close、fix、resolve等关键字
+后的议题引用，模块加载时编译。三个分组依次为链接、议题编号和关键字后的议题编号，
+每次匹配至多一个分组非空
+"""
+
+
+class CommitRefs(NamedTuple):
+    """
+    从提交信息中提取的内容。每个提交都会构造一次，使用元组以减少开销
+    """
+
+    ids: List[int]
+    """引用的议题编号，按出现顺序去重"""
+
+    urls: List[str]
+    """包含的链接"""
+
+    closes: List[int]
+    """紧跟在关闭类关键字后的议题编号，如``fixes $12``，按出现顺序去重"""
+
+
+def tokenize(message: str) -> "CommitRefs":
+    """一次扫描提取提交信息中的议题引用、链接和关闭的议题"""
+    ids, urls, closes = dict(), list(), dict()
+    for url, _id, closed_id in TOKEN_PATTERN.findall(message):
+        if _id:
+            ids[int(_id)] = None
+        elif closed_id:
+            ids[int(closed_id)] = None
+            closes[int(closed_id)] = None
+        elif url:
+            urls.append(url)
+    return CommitRefs(list(ids), urls, list(closes))
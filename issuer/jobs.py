@@ -0,0 +1,217 @@
+"""
+进程内的后台任务队列，用于活动记录、Gitea提交处理等不影响请求结果的副作用，请求
+只需等待主要的写操作完成。
+
+任务先写入:class:`~issuer.db.models.Job`发件箱，与请求的写操作在同一事务中提交，
+进程重启后未完成的任务会继续执行；事务提交后唤醒asyncio的worker，worker按批取出
+到期的任务执行，失败后按指数退避重试，超过最大次数后标记为failed。
+
+    @JOB_QUEUE.handler("activity")
+    async def record_activity(subject: str, ...): ...
+
+    await JOB_QUEUE.enqueue("activity", subject=..., ...)
+
+队列未启动时（如测试或``JOB_WORKERS``为0），任务在``enqueue``时直接执行。
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+import inspect
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from issuer.config import GET_CONFIG
+from issuer.db import aio
+from issuer.db.database import on_commit
+from issuer.db.models import Job
+
+
+Logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    以数据库发件箱持久化的asyncio任务队列。
+
+    Args:
+        workers: worker协程数。
+        batch_size: 每次取出的最大任务数。
+        max_attempts: 最大执行次数。
+        backoff: 首次重试前等待的秒数，之后每次翻倍。
+        max_backoff: 重试等待的最大秒数。
+        poll_interval: 没有唤醒时检查到期任务的间隔秒数，用于重试和其他进程写入的
+            任务。
+
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        batch_size: int = 20,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.handlers: Dict[str, Callable[..., Any]] = dict()
+        self.running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = list()
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def handler(self, name: str) -> Callable:
+        """注册任务的处理函数，处理函数以关键字参数接收任务参数，失败时抛出异常"""
+
+        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self.handlers[name] = fn
+            return fn
+
+        return decorator
+
+    async def enqueue(self, name: str, **payload) -> bool:
+        """
+        提交任务。处于会话作用域时任务随作用域一并提交，提交后唤醒worker。
+
+        Args:
+            name: 任务名称。
+            payload: 任务参数，须能序列化为json。
+
+        Returns:
+            队列未启动时为任务是否执行成功，否则为``True``。
+
+        """
+        if name not in self.handlers:
+            raise KeyError(f"Unknown job {name}")
+        if not self.running:
+            # 与后台执行一样，副作用的失败不抛出，需要的调用方可检查返回值
+            try:
+                await self._execute(name, payload)
+            except Exception as e:
+                Logger.error(f"Job {name} failed: {e!r}")
+                return False
+            return True
+        job_id = await aio.insert_job(
+            Job(name=name, payload=json.dumps(payload))
+        )
+        if job_id is None:
+            raise RuntimeError(f"Cannot enqueue the job {name}")
+        with self._lock:
+            self.enqueued += 1
+        on_commit(self._wake)
+        return True
+
+    def _wake(self) -> None:
+        # 线程池执行方式下提交回调在线程池中执行
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _execute(self, name: str, payload: Dict[str, Any]) -> None:
+        result = self.handlers[name](**payload)
+        if inspect.isawaitable(result):
+            await result
+
+    def _retry_delay(self, attempts: int) -> float:
+        return min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+
+    async def _run_job(self, job: "Job") -> None:
+        try:
+            # 任务的写操作与删除任务在同一事务中提交；任务常在请求写入后立即执行，
+            # 读取走主库以免副本延迟读到旧数据
+            async with aio.request_scope(sticky=True):
+                await self._execute(job.name, json.loads(job.payload))
+                if not await aio.complete_job(job.id):
+                    raise RuntimeError(f"Cannot complete the job {job.id}")
+        except Exception as e:
+            attempts = job.attempts + 1
+            Logger.error(f"Job {job.name}#{job.id} failed ({attempts}): {e!r}")
+            if attempts >= self.max_attempts or job.name not in self.handlers:
+                await aio.fail_job(job.id, repr(e))
+                with self._lock:
+                    self.failed += 1
+                return
+            next_run_at = datetime.utcnow() + timedelta(
+                seconds=self._retry_delay(attempts)
+            )
+            await aio.retry_job(job.id, repr(e), next_run_at)
+            with self._lock:
+                self.retried += 1
+            return
+        with self._lock:
+            self.completed += 1
+
+    async def _work(self) -> None:
+        while self.running:
+            self._wakeup.clear()
+            jobs = await aio.claim_jobs(self.batch_size)
+            for job in jobs:
+                # 单个任务的意外错误不能结束worker，任务留在执行中，由
+                # :meth:`start`在下次启动时恢复
+                try:
+                    await self._run_job(job)
+                except Exception as e:
+                    Logger.error(f"Cannot run the job {job.id}: {e!r}")
+            if len(jobs) > 0:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        """
+        启动worker，并将上次运行中取出但未完成的任务恢复为待执行。多进程部署时只
+        恢复取出时间早于一个最大退避时间的任务。
+        """
+        if self.running or self.workers <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        before = datetime.utcnow() - timedelta(seconds=self.max_backoff)
+        await aio.recover_jobs(before)
+        self.running = True
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """停止worker，等待执行中的任务完成，未执行的任务留在发件箱中"""
+        if not self.running:
+            return
+        self.running = False
+        self._wakeup.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = list()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": len(self._tasks),
+                "enqueued": self.enqueued,
+                "completed": self.completed,
+                "retried": self.retried,
+                "failed": self.failed,
+            }
+
+
+JOB_QUEUE = JobQueue(
+    workers=int(GET_CONFIG("JOB_WORKERS", 2)),
+    batch_size=int(GET_CONFIG("JOB_BATCH_SIZE", 20)),
+    max_attempts=int(GET_CONFIG("JOB_MAX_ATTEMPTS", 5)),
+    backoff=float(GET_CONFIG("JOB_RETRY_BACKOFF", 1)),
+    max_backoff=float(GET_CONFIG("JOB_RETRY_MAX_BACKOFF", 300)),
+    poll_interval=float(GET_CONFIG("JOB_POLL_INTERVAL", 1)),
+)
+"""应用使用的任务队列，在应用启动时启动"""
@@ -1,12 +1,31 @@
+import logging
+import math
 import os
 import sys
-from fastapi import FastAPI
+import time
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.exc import SQLAlchemyError
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from issuer.config import GET_CONFIG
-from issuer.db import DatabaseFactory, User, Metas, insert_user, insert_metas
+from issuer.db import (
+    DatabaseFactory,
+    run_migrations,
+    seed_database,
+)
+from issuer.db import aio
+from issuer.db.database import (
+    LAST_WRITE_COOKIE,
+    STICKY_SECONDS,
+    wrote_recently,
+)
+from issuer.jobs import JOB_QUEUE
+from issuer.retention import ACTIVITY_RETENTION
+from issuer.sink import ACTIVITY_SINK
 from issuer.routers import (
     hooks,
     users,
@@ -15,6 +34,8 @@ from issuer.routers import (
     issue,
     comment,
     notice,
+    metrics,
+    search,
 )
 
 
@@ -30,9 +51,47 @@ def get_index_path():
     return os.path.join(webdir, "build")
 
 
+Logger = logging.getLogger(__name__)
+
+
 app = FastAPI()
 
 
+def _sticky_key(request: Request) -> Optional[str]:
+    """请求方的标识，登录用户为用户码，否则为客户端地址"""
+    cookie = request.cookies.get("current_user")
+    if cookie:
+        return cookie.split(":")[0]
+    if request.client is not None:
+        return request.client.host
+    return None
+
+
+@app.middleware("http")
+async def db_session_scope(request: Request, call_next):
+    """
+    同一请求内的``db``调用共享一个会话，请求结束时统一提交。配置了只读副本时，
+    请求方写入后的短时间内其读取仍走主库，写入时间记录在Cookie中。
+    """
+    sticky = wrote_recently(request.cookies.get(LAST_WRITE_COOKIE))
+    try:
+        async with aio.request_scope(_sticky_key(request), sticky) as scope:
+            response = await call_next(request)
+    except SQLAlchemyError as e:
+        Logger.error(e)
+        return JSONResponse({"success": False, "reason": "Internal error"})
+    if scope.wrote and DatabaseFactory.get_db().has_replicas():
+        # 写入时间随Cookie带回，后续请求落在其他进程时也读主库
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            str(time.time()),
+            max_age=math.ceil(STICKY_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
 app.include_router(users.router)
 app.include_router(user_group.router)
 app.include_router(project.router)
@@ -40,6 +99,8 @@ app.include_router(issue.router)
 app.include_router(comment.router)
 app.include_router(notice.router)
 app.include_router(hooks.router)
+app.include_router(metrics.router)
+app.include_router(search.router)
 app.mount(
     "/statics", StaticFiles(directory=get_statics_path()), name="statics"
 )
@@ -50,69 +111,21 @@ app.mount("/", StaticFiles(directory=get_index_path(), html=True))
 async def create_engine():
     # 创建schema
     app.db = DatabaseFactory.get_db()
+    run_migrations()
 
-    # TODO: 通过环境变量或者``.env``定制化初始变量
+    # 添加管理员、机器人以及角色、项目状态和议题状态等元数据
+    seed_database()
 
-    # 添加管理员
-    admin = User(
-        user_name="admin",
-        passwd="21232f297a57a5a743894a0e4a801fc3",
-        role="admin",
-        email="admin@issuer.com",
-    )
-    insert_user(admin)
-
-    # 添加机器人
-    bot = User(
-        user_name="自动评论",
-        passwd="21232f297a57a5a743894a0e4a801fc3",
-        role="admin",
-        email="bot@issuer.com",
-    )
-    insert_user(bot)
+    await JOB_QUEUE.start()
+    await ACTIVITY_SINK.start()
+    await ACTIVITY_RETENTION.start()
 
-    # 添加管理员角色
-    user_role_admin = Metas(
-        meta_type="USER_ROLE", meta_value="admin", note="管理员"
-    )
-    insert_metas(user_role_admin)
 
-    user_role_default = Metas(
-        meta_type="USER_ROLE", meta_value="default", note="默认"
-    )
-    insert_metas(user_role_default)
-
-    # 添加项目状态
-    project_status_start = Metas(
-        meta_type="PROJECT_STATUS", meta_value="start", note="开始"
-    )
-    insert_metas(project_status_start)
-    project_status_processing = Metas(
-        meta_type="PROJECT_STATUS", meta_value="processing", note="进行"
-    )
-    insert_metas(project_status_processing)
-    project_status_checking = Metas(
-        meta_type="PROJECT_STATUS", meta_value="checking", note="验收"
-    )
-    insert_metas(project_status_checking)
-    project_status_finished = Metas(
-        meta_type="PROJECT_STATUS", meta_value="checked", note="完工"
-    )
-    insert_metas(project_status_finished)
-
-    # 添加议题状态
-    issue_status_open = Metas(
-        meta_type="ISSUE_STATUS", meta_value="open", note="开放"
-    )
-    insert_metas(issue_status_open)
-    issue_status_finished = Metas(
-        meta_type="ISSUE_STATUS", meta_value="finished", note="完成"
-    )
-    insert_metas(issue_status_finished)
-    issue_status_closed = Metas(
-        meta_type="ISSUE_STATUS", meta_value="closed", note="关闭"
-    )
-    insert_metas(issue_status_closed)
+@app.on_event("shutdown")
+async def stop_jobs():
+    await ACTIVITY_RETENTION.stop()
+    await ACTIVITY_SINK.stop()
+    await JOB_QUEUE.stop()
 
 
 # 启动应用
@@ -0,0 +1,66 @@
+"""
+运维命令
+
+    python issuer/manage.py rebuild-stats [--project PJ1]
+    python issuer/manage.py archive-activities [--days 180]
+    python issuer/manage.py seed
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from issuer import db  # noqa: E402
+from issuer.config import GET_CONFIG  # noqa: E402
+
+
+def rebuild_stats(args: argparse.Namespace) -> bool:
+    return db.rebuild_project_issue_stats(args.project)
+
+
+def archive_activities(args: argparse.Namespace) -> bool:
+    before = datetime.utcnow() - timedelta(days=args.days)
+    return db.archive_activities(before) is not None
+
+
+def seed(args: argparse.Namespace) -> bool:
+    return db.seed_database() is not None
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(prog="manage.py")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_stats = subparsers.add_parser(
+        "rebuild-stats", help="根据议题表重建项目议题统计"
+    )
+    parser_stats.add_argument("--project", help="只重建该项目码的统计")
+    parser_stats.set_defaults(func=rebuild_stats)
+
+    parser_archive = subparsers.add_parser(
+        "archive-activities", help="归档并删除过期的用户活动"
+    )
+    parser_archive.add_argument(
+        "--days",
+        type=int,
+        default=int(GET_CONFIG("ACTIVITY_RETENTION_DAYS", 180)),
+        help="活动表中保留的天数",
+    )
+    parser_archive.set_defaults(func=archive_activities)
+
+    parser_seed = subparsers.add_parser(
+        "seed", help="写入缺少的初始用户和元数据"
+    )
+    parser_seed.set_defaults(func=seed)
+
+    args = parser.parse_args()
+    sys.exit(0 if args.func(args) else 1)
+
+
+if __name__ == "__main__":
+    main()
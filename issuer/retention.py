@@ -0,0 +1,86 @@
+"""
+用户活动的保留策略。后台协程定期将超过保留天数的活动归档到按月划分的压缩JSONL
+文件并从活动表中分批删除，活动表只保留近期的数据；归档的活动可通过
+:func:`~issuer.db.list_archived_activities`按日期范围查询。
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+import logging
+from typing import Dict, Optional
+
+from issuer import db
+from issuer.config import GET_CONFIG
+
+
+Logger = logging.getLogger(__name__)
+
+
+class ActivityRetention:
+    """
+    定期归档过期活动的后台任务。
+
+    Args:
+        retention_days: 活动表中保留的天数，为0时不归档。
+        interval: 两次归档之间的秒数。
+
+    """
+
+    def __init__(self, retention_days: int, interval: float) -> None:
+        self.retention_days = retention_days
+        self.interval = interval
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.runs = 0
+        self.archived = 0
+        self.last_run: Optional[datetime] = None
+
+    async def run_once(self) -> Optional[int]:
+        """归档一次过期活动，在线程中执行，不占用事件循环，各批独立提交"""
+        before = datetime.utcnow() - timedelta(days=self.retention_days)
+        count = await asyncio.to_thread(db.archive_activities, before)
+        self.runs += 1
+        self.last_run = datetime.utcnow()
+        self.archived += count or 0
+        return count
+
+    async def _run(self) -> None:
+        while self.running:
+            try:
+                await self.run_once()
+            except Exception as e:
+                Logger.error(e)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        if self.running or self.retention_days <= 0:
+            return
+        self._stopping = asyncio.Event()
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self.running = False
+        self._stopping.set()
+        await self._task
+
+    def stats(self) -> Dict[str, int | str | None]:
+        return {
+            "retention_days": self.retention_days,
+            "runs": self.runs,
+            "archived": self.archived,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+        }
+
+
+ACTIVITY_RETENTION = ActivityRetention(
+    retention_days=int(GET_CONFIG("ACTIVITY_RETENTION_DAYS", 180)),
+    interval=float(GET_CONFIG("ACTIVITY_RETENTION_INTERVAL", 86400)),
+)
+"""应用使用的活动保留任务，在应用启动时启动"""
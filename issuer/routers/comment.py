@@ -3,7 +3,7 @@ import os
 from typing import Annotated, Dict, List
 from fastapi import APIRouter, Cookie, Form, UploadFile
 
-from issuer import db
+from issuer.db import aio
 from issuer.db.models import IssueComment
 from issuer.routers.convertors import convert_comment
 from issuer.routers.models import (
@@ -27,7 +27,7 @@ async def new_comment(
     issue_comment: "IssueCommentReq",
     current_user: Annotated[str | None, Cookie()] = None,
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     comment_do = IssueComment(
@@ -38,16 +38,16 @@ async def new_comment(
         content=issue_comment.content,
         appendices=issue_comment.appendices,
     )
-    res = db.insert_issue_comment(comment_do)
+    res = await aio.insert_issue_comment(comment_do)
     if res is None:
         return {"success": False, "reason": "Internal error"}
-    issue = db.find_issue_by_code(issue_comment.issue_code)
+    issue = await aio.find_issue_by_code(issue_comment.issue_code)
     if issue is None:
         return {"success": False, "reason": "Internal error"}
-    project = db.find_project_by_code(issue.project_code)
+    project = await aio.find_project_by_code(issue.project_code)
     if project is None:
         return {"success": False, "reason": "Internal error"}
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=issue.issue_code,
         category=ActivityEnum.NewComment.name,
@@ -61,24 +61,24 @@ async def fold_comment(
     issue_comment: "IssueCommentReq",
     current_user: Annotated[str | None, Cookie()] = None,
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    comment = db.find_issue_comment_by_code(issue_comment.comment_code)
+    comment = await aio.find_issue_comment_by_code(issue_comment.comment_code)
     if comment.commenter != _user.user_code:
         return {"success": False, "reason": "Permission denied"}
     comment.fold = True
-    res = db.update_issue_comment_by_code(comment)
+    res = await aio.update_issue_comment_by_code(comment)
     if res is False:
         return {"success": res}
 
-    issue = db.find_issue_by_code(comment.issue_code)
+    issue = await aio.find_issue_by_code(comment.issue_code)
     if issue is None:
         return {"success": False, "reason": "Internal error"}
-    project = db.find_project_by_code(issue.project_code)
+    project = await aio.find_project_by_code(issue.project_code)
     if project is None:
         return {"success": False, "reason": "Internal error"}
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=issue_comment.issue_code,
         category=ActivityEnum.FoldComment.name,
@@ -94,15 +94,15 @@ async def fold_comment(
 async def list_comment_by_code(
     issue_code: str, current_user: Annotated[str | None, Cookie()] = None
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    comments = db.list_issue_comment_by_issue(issue_code)
+    comments = await aio.list_issue_comment_by_issue(issue_code)
     res = list()
     for comment in comments:
         if comment is None:
             continue
-        res.append(convert_comment(comment))
+        res.append(await convert_comment(comment))
     return {"success": True, "data": res}
 
 
@@ -113,15 +113,15 @@ async def list_comment_by_code(
 async def list_comment_by_commenter(
     user_code: str, current_user: Annotated[str | None, Cookie()] = None
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    comments = db.list_issue_comment_by_commenter(user_code)
+    comments = await aio.list_issue_comment_by_commenter(user_code)
     res = list()
     for comment in comments:
         if comment is None:
             continue
-        res.append(convert_comment(comment))
+        res.append(await convert_comment(comment))
     return {"success": True, "data": res}
 
 
@@ -131,7 +131,7 @@ async def upload_appendix(
     issue_code: str = Form(),
     current_user: Annotated[str | None, Cookie()] = None,
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {
             "success": False,
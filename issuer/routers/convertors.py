@@ -1,8 +1,9 @@
+from collections import defaultdict
 from datetime import datetime
 import json
 import logging
-from typing import List
-from issuer import db
+from typing import Dict, Iterable, List, Optional, Sequence
+from issuer.db import aio
 from issuer.db import (
     UserGroup,
     User,
@@ -40,14 +41,14 @@ def convert_user(do_: User) -> "UserModel":
     )
 
 
-def convert_user_group(do_: UserGroup) -> "UserGroupRes":
-    user_do = db.find_user_by_code(do_.group_owner)
+async def convert_user_group(do_: UserGroup) -> "UserGroupRes":
+    user_do = await aio.find_user_by_code(do_.group_owner)
     if user_do is None:
         Logger.error("Cannot find User with user_code: " f"{do_.group_owner}")
-    users = db.list_user_to_user_group_by_group(do_.group_code)
+    users = await aio.list_user_to_user_group_by_group(do_.group_code)
     members = list()
     for user in users:
-        _user = db.find_user_by_code(user.user_code)
+        _user = await aio.find_user_by_code(user.user_code)
         if _user is None:
             Logger.error(
                 "Cannot find User with user_code: " f"{user.user_code}"
@@ -62,20 +63,39 @@ def convert_user_group(do_: UserGroup) -> "UserGroupRes":
     )
 
 
-def convert_project(do_: Project) -> "ProjectRes":
-    user_do = db.find_user_by_code(do_.owner)
+def _split_codes(codes: Optional[str]) -> List[str]:
+    if codes is None:
+        return list()
+    return [code for code in codes.split(",") if code != ""]
+
+
+async def _find_users(user_codes: Iterable[str]) -> Dict[str, "User"]:
+    """批量查询用户，返回用户码到用户的映射"""
+    user_dos = await aio.list_users_by_codes(list(set(user_codes)))
+    return {user_do.user_code: user_do for user_do in user_dos}
+
+
+def _convert_users(
+    user_codes: Iterable[str], users: Dict[str, "User"]
+) -> List["UserModel"]:
+    res: List["UserModel"] = list()
+    for user_code in user_codes:
+        user_do = users.get(user_code)
+        if user_do is None:
+            Logger.error("Cannot find User with user_code: " f"{user_code}")
+            continue
+        res.append(convert_user(user_do))
+    return res
+
+
+def _build_project(
+    do_: Project,
+    participant_codes: List[str],
+    users: Dict[str, "User"],
+) -> "ProjectRes":
+    user_do = users.get(do_.owner)
     if user_do is None:
         Logger.error("Cannot find User with user_code: " f"{do_.owner}")
-    p2us = db.list_project_to_user_by_project(do_.project_code)
-    participants: List["UserModel"] = list()
-    for p2u in p2us:
-        _user_do = db.find_user_by_code(p2u.user_code)
-        if _user_do is None:
-            Logger.error(
-                "Cannot find User with user_code: " f"{p2u.user_code}"
-            )
-            continue
-        participants.append(convert_user(_user_do))
     return ProjectRes(
         project_code=do_.project_code,
         project_name=do_.project_name,
@@ -88,53 +108,101 @@ def convert_project(do_: Project) -> "ProjectRes":
         status=do_.status,
         budget=do_.budget,
         privilege=do_.privilege,
-        participants=participants,
+        participants=_convert_users(participant_codes, users),
     )
 
 
-def convert_issue(do_: Issue) -> "IssueRes":
-    project_do = db.find_project_by_code(do_.project_code)
-    if project_do is None:
-        Logger.error(
-            "Cannot find Project with project_code: " f"{do_.project_code}"
+async def _list_participants(
+    project_codes: Iterable[str],
+) -> Dict[str, List[str]]:
+    participants: Dict[str, List[str]] = defaultdict(list)
+    p2us = await aio.list_project_to_user_by_projects(list(set(project_codes)))
+    for p2u in p2us:
+        participants[p2u.project_code].append(p2u.user_code)
+    return participants
+
+
+async def convert_projects(dos: Sequence[Project]) -> List["ProjectRes"]:
+    """
+    批量转换项目，参与者与负责人通过``IN``查询一次性获取，查询次数与项目数无关。
+    """
+    participants = await _list_participants(do_.project_code for do_ in dos)
+    user_codes = [do_.owner for do_ in dos]
+    for codes in participants.values():
+        user_codes.extend(codes)
+    users = await _find_users(user_codes)
+    return [
+        _build_project(do_, participants[do_.project_code], users)
+        for do_ in dos
+    ]
+
+
+async def convert_project(do_: Project) -> "ProjectRes":
+    return (await convert_projects([do_]))[0]
+
+
+async def convert_issues(dos: Sequence[Issue]) -> List["IssueRes"]:
+    """
+    批量转换议题。一页议题涉及的项目、参与者、关注者和被指派者分别通过``IN``查询
+    获取，查询次数与议题数以及关注者数量无关。
+    """
+    projects = {
+        project_do.project_code: project_do
+        for project_do in await aio.list_projects_by_codes(
+            list(set(do_.project_code for do_ in dos))
+        )
+    }
+    participants = await _list_participants(projects.keys())
+
+    user_codes: List[str] = list()
+    for project_do in projects.values():
+        user_codes.append(project_do.owner)
+    for codes in participants.values():
+        user_codes.extend(codes)
+    for do_ in dos:
+        user_codes.append(do_.owner)
+        user_codes.extend(_split_codes(do_.followers))
+        user_codes.extend(_split_codes(do_.assigned))
+    users = await _find_users(user_codes)
+
+    res: List["IssueRes"] = list()
+    for do_ in dos:
+        project_do = projects.get(do_.project_code)
+        if project_do is None:
+            Logger.error(
+                "Cannot find Project with project_code: "
+                f"{do_.project_code}"
+            )
+            continue
+        owner_do = users.get(do_.owner)
+        if owner_do is None:
+            Logger.error("Cannot find User with user_code: " f"{do_.owner}")
+        res.append(
+            IssueRes(
+                issue_code=do_.issue_code,
+                project=_build_project(
+                    project_do, participants[project_do.project_code], users
+                ),
+                issue_id=do_.issue_id,
+                title=do_.title,
+                description=do_.description,
+                owner=convert_user(owner_do),
+                propose_date=datetime.strftime(do_.propose_date, "%Y-%m-%d"),
+                status=do_.status,
+                tags=do_.tags,
+                followers=_convert_users(_split_codes(do_.followers), users),
+                assigned=_convert_users(_split_codes(do_.assigned), users),
+            )
         )
-    owner_do = db.find_user_by_code(do_.owner)
-    if owner_do is None:
-        Logger.error("Cannot find User with user_code: " f"{do_.owner}")
-    followers: List[User] = list()
-    if do_.followers is not None:
-        for follower in do_.followers.split(","):
-            f = db.find_user_by_code(follower)
-            if f is None:
-                Logger.error("Cannot find User with user_code: " f"{follower}")
-                continue
-            followers.append(convert_user(f))
-    assigneds = list()
-    if do_.assigned is not None:
-        for assigned in do_.assigned.split(","):
-            a = db.find_user_by_code(assigned)
-            if a is None:
-                Logger.error("Cannot find User with user_code: " f"{assigned}")
-                continue
-            assigneds.append(convert_user(a))
-    res = IssueRes(
-        issue_code=do_.issue_code,
-        project=convert_project(project_do),
-        issue_id=do_.issue_id,
-        title=do_.title,
-        description=do_.description,
-        owner=convert_user(owner_do),
-        propose_date=datetime.strftime(do_.propose_date, "%Y-%m-%d"),
-        status=do_.status,
-        tags=do_.tags,
-        followers=followers,
-        assigned=assigneds,
-    )
     return res
 
 
-def convert_comment(do_: IssueComment) -> "IssueCommentRes":
-    commenter_do = db.find_user_by_code(do_.commenter)
+async def convert_issue(do_: Issue) -> "IssueRes":
+    return (await convert_issues([do_]))[0]
+
+
+async def convert_comment(do_: IssueComment) -> "IssueCommentRes":
+    commenter_do = await aio.find_user_by_code(do_.commenter)
     if commenter_do is None:
         Logger.error("Cannot find User with user_code: " f"{do_.commenter}")
     return IssueCommentRes(
@@ -150,10 +218,32 @@ def convert_comment(do_: IssueComment) -> "IssueCommentRes":
     )
 
 
-def convert_activity(activity: "Activity") -> "ActivityModel":
-    user_do = db.find_user_by_code(activity.subject)
+async def convert_activity(activity: "Activity") -> "ActivityModel":
+    user_do = await aio.find_user_by_code(activity.subject)
     if user_do is None:
         Logger.error("Cannot find User with user_code: " f"{activity.subject}")
+    return _build_activity(activity, user_do)
+
+
+async def convert_activities(
+    activities: Sequence["Activity"],
+) -> List["ActivityModel"]:
+    """批量转换活动，活动主体的用户只查询一次"""
+    users = await _find_users(activity.subject for activity in activities)
+    res: List["ActivityModel"] = list()
+    for activity in activities:
+        user_do = users.get(activity.subject)
+        if user_do is None:
+            Logger.error(
+                "Cannot find User with user_code: " f"{activity.subject}"
+            )
+        res.append(_build_activity(activity, user_do))
+    return res
+
+
+def _build_activity(
+    activity: "Activity", user_do: "User"
+) -> "ActivityModel":
     user = convert_user(user_do)
     trigger_time = datetime.strftime(activity.gmt_create, "%Y-%m-%d")
     match activity.category:
@@ -1,7 +1,16 @@
+import logging
 from typing import Dict
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 
-from issuer.ext.gitea import GiteaAdaptor
+from issuer import db
+from issuer.db import aio
+from issuer.db.database import set_rollback
+from issuer.ext import get_adaptor
+from issuer.jobs import JOB_QUEUE
+
+
+Logger = logging.getLogger(__name__)
 
 
 router = APIRouter(
@@ -11,13 +20,100 @@ router = APIRouter(
 )
 
 
-@router.post("/project/{project_code}")
-async def hook_gitea(project_code: str, payload: Dict):
-    print(f"project_code: {project_code}")
-    print(f"payload: {payload}")
-    ga = GiteaAdaptor(project_code)
+def _failure(status_code: int, reason: str) -> "JSONResponse":
+    return JSONResponse(
+        {"success": False, "reason": reason}, status_code=status_code
+    )
+
+
+def _duplicate() -> "JSONResponse":
+    # 没有新的提交需要处理，不返回202
+    return JSONResponse({"success": True, "duplicate": True})
+
+
+async def _receive_push(
+    forge: str, project_code: str, payload: Dict, request: "Request"
+):
+    adaptor = get_adaptor(forge, project_code)
+    if adaptor is None:
+        return _failure(404, "Unsupported forge")
+    commits = payload.get("commits") or list()
+    if not isinstance(commits, list) or not all(
+        isinstance(commit, dict) for commit in commits
+    ):
+        return _failure(400, "Malformed commits")
+    delivery_id = (
+        request.headers.get(adaptor.delivery_header)
+        if adaptor.delivery_header is not None
+        else None
+    )
+    if delivery_id is not None:
+        if delivery_id in db.DELIVERY_CACHE:
+            return _duplicate()
+        commit_ids = await aio.record_webhook_delivery(
+            delivery_id,
+            project_code,
+            [commit["id"] for commit in commits if "id" in commit],
+        )
+        if commit_ids is None:
+            return _failure(500, "Internal Error")
+        commit_ids = set(commit_ids)
+        commits = [
+            commit
+            for commit in commits
+            if "id" not in commit or commit["id"] in commit_ids
+        ]
+        if len(commits) == 0:
+            return _duplicate()
     try:
-        ga.parse_commits(payload)
+        enqueued = await JOB_QUEUE.enqueue(
+            "forge_push",
+            forge=forge,
+            project_code=project_code,
+            payload={**payload, "commits": commits},
+        )
     except Exception as e:
-        return {"success": False, "reason": e}
+        Logger.error(f"Cannot enqueue the push to {project_code}: {e!r}")
+        # 撤销本次投递的记录，平台重试时重新处理
+        set_rollback()
+        return _failure(503, "Cannot enqueue the push")
+    if not enqueued:
+        # 队列未启动时任务直接执行，执行失败同样撤销投递记录和已写入的评论
+        set_rollback()
+        return _failure(500, "Cannot process the push")
     return {"success": True}
+
+
+@router.post("/project/{project_code}", status_code=202)
+async def hook_gitea(project_code: str, payload: Dict, request: "Request"):
+    """
+    Gitea推送的回调，同``/hooks/gitea/project/{project_code}``。
+    """
+    return await _receive_push("gitea", project_code, payload, request)
+
+
+@router.post("/{forge}/project/{project_code}", status_code=202)
+async def hook_forge(
+    forge: str, project_code: str, payload: Dict, request: "Request"
+):
+    """
+    代码托管平台推送的回调，:arg:`forge`可以是gitea、gitlab和github。推送提交给
+    后台任务处理后立即返回202，不等待评论和议题状态的写入。平台重试的投递以及已
+    处理过的提交在投递记录中去重，不会重复评论，此时返回200。不支持的平台返回
+    404，格式错误的推送返回400，无法记录投递或提交任务时返回5xx以便平台重试。
+    """
+    return await _receive_push(forge, project_code, payload, request)
+
+
+@JOB_QUEUE.handler("forge_push")
+async def parse_forge_push(forge: str, project_code: str, payload: Dict):
+    adaptor = get_adaptor(forge, project_code)
+    if adaptor is None:
+        raise RuntimeError(f"Unsupported forge {forge}")
+    await aio.run(adaptor.parse_commits, payload)
+
+
+@JOB_QUEUE.handler("gitea_push")
+async def parse_gitea_push(project_code: str, payload: Dict) -> None:
+    # 兼容升级前写入发件箱的任务
+    await parse_forge_push("gitea", project_code, payload)
@@ -1,17 +1,19 @@
 from datetime import datetime
 from typing import Annotated, Dict, List, Optional
-from fastapi import APIRouter, Cookie
+from fastapi import APIRouter, Cookie, Request
 
 from issuer import db
+from issuer.db import aio
 from issuer.db import Issue
 from issuer.db.models import Activity
-from issuer.routers.convertors import convert_issue
+from issuer.routers.convertors import convert_issues
 from issuer.routers.models import ActivityEnum, IssueReq, IssueRes
 from issuer.routers.users import check_cookie
 from issuer.routers.utils import (
     activity_helper,
     empty_string_to_none,
     empty_strings_to_none,
+    metas_response,
 )
 
 
@@ -36,7 +38,7 @@ async def new_issue(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     issue = empty_strings_to_none(issue)
@@ -51,15 +53,15 @@ async def new_issue(
         followers=_user.user_code,
         assigned=issue.assigned,
     )
-    res = db.insert_issue(issue_do)
+    res = await aio.insert_issue(issue_do)
     if res is None:
         return {"success": False, "reason": "Internal error"}
 
     # 添加用户活动
-    project = db.find_project_by_code(issue.project_code)
+    project = await aio.find_project_by_code(issue.project_code)
     if project is None:
         return {"success": False, "reason": "Internal error"}
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=project.project_code,
         category=ActivityEnum.NewIssue.name,
@@ -81,23 +83,23 @@ async def delete_issue(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     issue = empty_strings_to_none(issue)
-    issue_do = db.find_issue_by_code(issue_code=issue.issue_code)
+    issue_do = await aio.find_issue_by_code(issue_code=issue.issue_code)
     if issue_do is None:
         return {"success": False, "reason": "Cannot find issue"}
     if issue_do.owner != _user.user_code:
         return {"success": False, "reason": "Permission denied"}
-    db.delete_issue_by_code(issue.issue_code)
-    res = db.delete_issue_comment_by_issue(issue.issue_code)
+    await aio.delete_issue_by_code(issue.issue_code)
+    res = await aio.delete_issue_comment_by_issue(issue.issue_code)
 
     # 添加用户活动
-    project = db.find_project_by_code(issue_do.project_code)
+    project = await aio.find_project_by_code(issue_do.project_code)
     if project is None:
         return {"success": False, "reason": "Internal Error"}
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=issue_do.issue_code,
         category=ActivityEnum.DeleteIssue.name,
@@ -118,10 +120,10 @@ async def change_issue(
         current_user: 请求Cookies，键为:arg:`current_user`，值为 user_code:token
             形式。
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    issue_do = db.find_issue_by_code(issue_code=issue.issue_code)
+    issue_do = await aio.find_issue_by_code(issue_code=issue.issue_code)
     if issue_do is None:
         return {"success": False, "reason": "Cannot find issue"}
     if issue_do.owner != _user.user_code:
@@ -139,13 +141,13 @@ async def change_issue(
         if issue.description is not None
         else issue_do.description
     )
-    res = db.update_issue_by_code(issue_do)
+    res = await aio.update_issue_by_code(issue_do)
 
     # 添加用户活动
-    project = db.find_project_by_code(issue_do.project_code)
+    project = await aio.find_project_by_code(issue_do.project_code)
     if project is None:
         return {"success": False, "reason": "Internal Error"}
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=issue_do.issue_code,
         category=ActivityEnum.ChangeIssue.name,
@@ -170,41 +172,41 @@ async def follow_issue(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    issue_do = db.find_issue_by_code(issue_code=issue_code)
+    issue_do = await aio.find_issue_by_code(issue_code=issue_code)
     if issue_do is None:
         return {"success": False, "reason": "Cannot find issue"}
 
     followers = issue_do.followers.split(",")
-    project = db.find_project_by_code(issue_do.project_code)
+    project = await aio.find_project_by_code(issue_do.project_code)
     if project is None:
         return {"success": False, "reason": "Internal Error"}
-    if action == 1 and _user.user_code not in issue_do.followers:
+    category = None
+    if action == 1 and _user.user_code not in followers:
         followers.append(_user.user_code)
-        # 添加用户活动
-        activity_helper(
-            subject=_user.user_code,
-            target=issue_do.issue_code,
-            category=ActivityEnum.FollowIssue.name,
-            kv={"name": f"{project.project_name}#{issue_do.issue_id}"},
-        )
-    if action == 0 and _user.user_code in issue_do.followers:
+        category = ActivityEnum.FollowIssue.name
+    if action == 0 and _user.user_code in followers:
         followers.remove(_user.user_code)
-        activity_helper(
+        category = ActivityEnum.UnfollowIssue.name
+    issue_do.followers = ",".join(followers)
+    res = await aio.update_issue_by_code(issue=issue_do)
+
+    # 添加用户活动，活动在写入时分发给当前的关注者，因此需在更新关注关系之后添加
+    if category is not None:
+        await activity_helper(
             subject=_user.user_code,
             target=issue_do.issue_code,
-            category=ActivityEnum.UnfollowIssue.name,
+            category=category,
             kv={"name": f"{project.project_name}#{issue_do.issue_id}"},
         )
-    issue_do.followers = ",".join(followers)
-    res = db.update_issue_by_code(issue=issue_do)
     return {"success": res}
 
 
 @router.get(
-    "/list_issues", response_model=Dict[str, bool | str | List[IssueRes]]
+    "/list_issues",
+    response_model=Dict[str, bool | str | List[IssueRes] | None],
 )
 async def list_issues_by_condition(
     issue_code: Optional[str] = None,
@@ -221,6 +223,7 @@ async def list_issues_by_condition(
     tags: Optional[str] = None,
     page_num: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
     current_user: Annotated[str | None, Cookie()] = None,
 ):
     """
@@ -241,13 +244,17 @@ async def list_issues_by_condition(
         tags: 标签，用逗号分隔。
         page_num: 页码。
         page_size: 页数。
+        cursor: 游标，传入空字符串时按创建时间分页并返回第一页，之后传入上一页返回
+            的``next_cursor``。
         current_user: 请求Cookies，键为:arg:`current_user`，值为 user_code:token
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
+    if cursor and db.decode_cursor(cursor) is None:
+        return {"success": False, "reason": "Invalid cursor"}
     issue_code = empty_string_to_none(issue_code)
     project_code = empty_string_to_none(project_code)
     owner = empty_string_to_none(owner)
@@ -268,7 +275,7 @@ async def list_issues_by_condition(
         end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
     if tags is not None:
         tags = tags.split(",")
-    issues = db.list_issues_by_condition(
+    issues = await aio.list_issues_by_condition(
         issue_code,
         project_code,
         owner,
@@ -283,12 +290,12 @@ async def list_issues_by_condition(
         tags,
         page_num,
         page_size,
+        cursor,
     )
-    res = list()
-    for issue in issues:
-        issue_res = convert_issue(issue)
-        res.append(issue_res)
-    return {"success": True, "data": res}
+    res = {"success": True, "data": await convert_issues(issues)}
+    if cursor is not None:
+        res["next_cursor"] = db.next_cursor(issues, page_size)
+    return res
 
 
 @router.get("/count_issues", response_model=Dict[str, bool | str | int])
@@ -327,7 +334,7 @@ async def count_issues_by_condition(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     issue_code = empty_string_to_none(issue_code)
@@ -350,7 +357,7 @@ async def count_issues_by_condition(
         end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
     if tags is not None:
         tags = tags.split(",")
-    res = db.count_issues_by_condition(
+    res = await aio.count_issues_by_condition(
         issue_code=issue_code,
         project_code=project_code,
         owner=owner,
@@ -371,12 +378,6 @@ async def count_issues_by_condition(
 
 
 @router.get("/query_status")
-async def query_status():
-    """获取议题状态"""
-    metas = db.list_metas_by_type("ISSUE_STATUS")
-    return {
-        "success": True,
-        "data": [
-            {"value": meta.meta_value, "label": meta.note} for meta in metas
-        ],
-    }
+async def query_status(request: "Request"):
+    """获取议题状态，元数据未变化时返回304"""
+    return await metas_response("ISSUE_STATUS", request)
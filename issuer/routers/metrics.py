@@ -0,0 +1,93 @@
+from typing import Annotated, Dict, Optional
+from fastapi import APIRouter, Cookie
+
+from issuer import db
+from issuer.db import aio
+from issuer.jobs import JOB_QUEUE
+from issuer.retention import ACTIVITY_RETENTION
+from issuer.routers.users import check_cookie
+from issuer.sink import ACTIVITY_SINK
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    responses={404: {"description": "Not Found"}},
+)
+
+
+async def check_admin(cookie: Optional[str]) -> Optional[Dict]:
+    # 运行指标暴露缓存、连接池和任务队列的内部状态，只对管理员开放
+    _user = await check_cookie(cookie=cookie)
+    if _user is None:
+        return {"success": False, "reason": "Invalid token"}
+    if _user.role != "admin":
+        return {"success": False, "reason": "Permission denied"}
+    return None
+
+
+@router.get("/auth_cache")
+async def auth_cache_stats(
+    current_user: Annotated[str | None, Cookie()] = None,
+):
+    """登录校验缓存的命中、未命中和淘汰计数"""
+    failure = await check_admin(current_user)
+    if failure is not None:
+        return failure
+    return {"success": True, "data": db.USER_TOKEN_CACHE.stats()}
+
+
+@router.get("/db_pool")
+async def db_pool_stats(
+    current_user: Annotated[str | None, Cookie()] = None,
+):
+    """
+    ``threadpool``执行方式下线程池的使用情况，包括饱和度、排队数以及从提交到开始
+    执行的等待时间。
+    """
+    failure = await check_admin(current_user)
+    if failure is not None:
+        return failure
+    return {
+        "success": True,
+        "data": {"mode": aio.EXECUTION_MODE, **aio.DB_THREAD_POOL.stats()},
+    }
+
+
+@router.get("/jobs")
+async def job_stats(
+    current_user: Annotated[str | None, Cookie()] = None,
+):
+    """后台任务队列的处理计数，以及发件箱中各状态的任务数"""
+    failure = await check_admin(current_user)
+    if failure is not None:
+        return failure
+    return {
+        "success": True,
+        "data": {
+            **JOB_QUEUE.stats(),
+            "outbox": await aio.count_jobs_by_status(),
+        },
+    }
+
+
+@router.get("/activity_sink")
+async def activity_sink_stats(
+    current_user: Annotated[str | None, Cookie()] = None,
+):
+    """活动批量写入的缓冲条数、写入次数以及每次写入的耗时"""
+    failure = await check_admin(current_user)
+    if failure is not None:
+        return failure
+    return {"success": True, "data": ACTIVITY_SINK.stats()}
+
+
+@router.get("/activity_retention")
+async def activity_retention_stats(
+    current_user: Annotated[str | None, Cookie()] = None,
+):
+    """活动归档的执行次数与累计归档条数"""
+    failure = await check_admin(current_user)
+    if failure is not None:
+        return failure
+    return {"success": True, "data": ACTIVITY_RETENTION.stats()}
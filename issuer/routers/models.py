@@ -138,3 +138,14 @@ class NoticeModel(BaseModel):
     publish_time: str | None = None
     notice_code: str | None = None
     content: str
+
+
+class SearchRes(BaseModel):
+    doc_type: str
+    issue_code: str
+    issue_id: int
+    comment_code: str | None = None
+    project_code: str
+    title: str
+    snippet: str
+    score: float
@@ -2,7 +2,7 @@ import logging
 from typing import Annotated, Dict, List, Optional
 from fastapi import APIRouter, Cookie
 
-from issuer import db
+from issuer.db import aio
 from issuer.db.models import Notice
 from issuer.routers.convertors import convert_notice
 from issuer.routers.models import NoticeModel
@@ -24,10 +24,10 @@ Logger = logging.getLogger(__name__)
 async def new_notice(
     notice: "NoticeModel", current_user: Annotated[str | None, Cookie()] = None
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    res = db.insert_notice(Notice(content=notice.content))
+    res = await aio.insert_notice(Notice(content=notice.content))
     if res is not None:
         return {"success": True}
     return {"success": False}
@@ -40,11 +40,11 @@ async def list_notices(
     limit: Optional[int] = None,
     current_user: Annotated[str | None, Cookie()] = None,
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     limit = empty_string_to_none(limit)
-    results = db.list_notices(limit=limit)
+    results = await aio.list_notices(limit=limit)
     res = []
     for result in results:
         res.append(convert_notice(result))
@@ -55,8 +55,8 @@ async def list_notices(
 async def delete_notice(
     notice: "NoticeModel", current_user: Annotated[str | None, Cookie()] = None
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    res = db.delete_notice_by_code(notice.notice_code)
+    res = await aio.delete_notice_by_code(notice.notice_code)
     return {"success": res}
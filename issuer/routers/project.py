@@ -1,12 +1,14 @@
-from datetime import datetime, timedelta
+from collections import defaultdict
+from datetime import date, datetime, timedelta
 import logging
-from typing import Annotated, Dict, List, Optional, Sequence
-from fastapi import APIRouter, Cookie
+from typing import Annotated, Dict, List, Optional
+from fastapi import APIRouter, Cookie, Request
 
 from issuer import db
+from issuer.db import aio
 from issuer.config import GET_CONFIG
-from issuer.db.models import Issue, Project, ProjectToUser
-from issuer.routers.convertors import convert_project
+from issuer.db.models import Project, ProjectToUser
+from issuer.routers.convertors import convert_project, convert_projects
 from issuer.routers.models import (
     ActivityEnum,
     ProjectPrivilegeEnum,
@@ -18,6 +20,8 @@ from issuer.routers.utils import (
     activity_helper,
     empty_string_to_none,
     empty_strings_to_none,
+    list_metas,
+    metas_response,
 )
 
 
@@ -45,7 +49,7 @@ async def new_project(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     project = empty_strings_to_none(project)
@@ -65,23 +69,23 @@ async def new_project(
         budget=project.budget,
         privilege=project.privilege,
     )
-    code = db.insert_project(project_do)
+    code = await aio.insert_project(project_do)
     if code is None:
         return {"success": False, "reason": "Fail to insert"}
 
+    # 将创建人加入关注
+    res = await aio.insert_project_to_user(
+        ProjectToUser(project_code=code, user_code=_user.user_code)
+    )
+
     # 添加用户活动
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=code,
         category=ActivityEnum.NewProject.name,
         kv={"name": project.project_name},
     )
-
-    # 将创建人加入关注
-    res = db.insert_project_to_user(
-        ProjectToUser(project_code=code, user_code=_user.user_code)
-    )
-    return {"success": res}
+    return {"success": True, "data": res}
 
 
 @router.post("/delete")
@@ -97,28 +101,27 @@ async def delete_project(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     project = empty_strings_to_none(project)
-    project_do = db.find_project_by_code(project.project_code)
+    project_do = await aio.find_project_by_code(project.project_code)
     if project_do is None:
         return {"success": False, "reason": "Cannot find Project"}
     if project_do.owner != _user.user_code:
         return {"success": False, "reason": "Permission denied"}
-    issues = db.list_issues_by_condition(project_code=project.project_code)
-    for issue in issues:
-        db.delete_issue_by_code(issue.issue_code)
-    res = db.delete_project_by_code(project_do.project_code)
+    res = await aio.delete_project_cascade(project_do.project_code)
+    if res is None:
+        return {"success": False, "reason": "Internal Error"}
 
     # 添加用户活动
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=project.project_code,
         category=ActivityEnum.DeleteProject.name,
         kv={"name": project.project_name},
     )
-    return {"success": res}
+    return {"success": True, "data": res}
 
 
 @router.post("/change")
@@ -134,12 +137,12 @@ async def change_project(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
 
     project = empty_strings_to_none(project)
-    project_do = db.find_project_by_code(project.project_code)
+    project_do = await aio.find_project_by_code(project.project_code)
     if project_do is None:
         return {"success": False, "reason": "Cannot find Project"}
     if project_do.owner != _user.user_code:
@@ -163,16 +166,16 @@ async def change_project(
         project_do.budget = project.budget
     if project.privilege is not None:
         project_do.privilege = project.privilege
-    res = db.update_project_by_code(project_do)
+    res = await aio.update_project_by_code(project_do)
 
     # 添加用户活动
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=project.project_code,
         category=ActivityEnum.ChangeProject.name,
         kv={"name": project.project_name},
     )
-    return {"success": res}
+    return {"success": True, "data": res}
 
 
 @router.post("/add")
@@ -189,27 +192,27 @@ async def add_project(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     project = empty_strings_to_none(project)
-    res = db.insert_project_to_user(
+    res = await aio.insert_project_to_user(
         ProjectToUser(
             project_code=project.project_code, user_code=project.new_member
         )
     )
 
     # 添加用户活动
-    project = db.find_project_by_code(project.project_code)
+    project = await aio.find_project_by_code(project.project_code)
     if project is None:
         return {"success": False, "reason": "Cannot find project"}
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=project.project_code,
         category=ActivityEnum.JoinProject.name,
         kv={"name": project.project_name},
     )
-    return {"success": res}
+    return {"success": True, "data": res}
 
 
 @router.get("/query_privileges")
@@ -225,15 +228,9 @@ async def query_privileges():
 
 
 @router.get("/query_status")
-async def query_status():
-    """获取项目状态"""
-    metas = db.list_metas_by_type("PROJECT_STATUS")
-    return {
-        "success": True,
-        "data": [
-            {"value": meta.meta_value, "label": meta.note} for meta in metas
-        ],
-    }
+async def query_status(request: "Request"):
+    """获取项目状态，元数据未变化时返回304"""
+    return await metas_response("PROJECT_STATUS", request)
 
 
 @router.get("/query", response_model=Dict[str, bool | str | ProjectRes])
@@ -249,14 +246,14 @@ async def query_project_by_code(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
 
-    project = db.find_project_by_code(project_code=project_code)
+    project = await aio.find_project_by_code(project_code=project_code)
     if project is None:
         return {"success": False, "reason": "Cannot find Project"}
-    res = convert_project(project)
+    res = await convert_project(project)
 
     if (
         project.privilege == ProjectPrivilegeEnum.Private.name
@@ -288,26 +285,34 @@ async def query_project_by_participants(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
 
-    p2us = db.list_project_to_user_by_user(user_code, page_num, page_size)
-    res = list()
+    p2us = await aio.list_project_to_user_by_user(
+        user_code, page_num, page_size
+    )
+    project_dos = {
+        project_do.project_code: project_do
+        for project_do in await aio.list_projects_by_codes(
+            [p2u.project_code for p2u in p2us]
+        )
+    }
+    projects = list()
     for p2u in p2us:
-        project_do = db.find_project_by_code(p2u.project_code)
+        project_do = project_dos.get(p2u.project_code)
         if project_do is None:
             Logger.error(
                 "Cannot find Project with project_code: " f"{p2u.project_code}"
             )
             continue
-        project = convert_project(project_do)
-        res.append(project)
-    return {"success": True, "data": res}
+        projects.append(project_do)
+    return {"success": True, "data": await convert_projects(projects)}
 
 
 @router.get(
-    "/list_projects", response_model=Dict[str, bool | str | List[ProjectRes]]
+    "/list_projects",
+    response_model=Dict[str, bool | str | List[ProjectRes] | None],
 )
 async def list_projects_by_condition(
     project_code: Optional[str] = None,
@@ -319,6 +324,7 @@ async def list_projects_by_condition(
     participants: Optional[str] = None,
     page_num: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
     current_user: Annotated[str | None, Cookie()] = None,
 ):
     """
@@ -334,13 +340,17 @@ async def list_projects_by_condition(
         participants: 用半角逗号分隔的用户码字符串。
         page_num: 页码。
         page_size: 页数。
+        cursor: 游标，传入空字符串时按创建时间分页并返回第一页，之后传入上一页返回
+            的``next_cursor``。
         current_user: 请求Cookies，键为:arg:`current_user`，值为 user_code:token
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
+    if cursor and db.decode_cursor(cursor) is None:
+        return {"success": False, "reason": "Invalid cursor"}
 
     project_code = empty_string_to_none(project_code)
     project_name = empty_string_to_none(project_name)
@@ -364,7 +374,7 @@ async def list_projects_by_condition(
         participants.split(",") if participants is not None else None
     )
 
-    project_dos = db.list_projects_by_condition(
+    project_dos = await aio.list_projects_by_condition(
         current_user=_user.user_code,
         project_code=project_code,
         project_name=project_name,
@@ -375,11 +385,12 @@ async def list_projects_by_condition(
         participants=participants,
         page_num=page_num,
         page_size=page_size,
+        cursor=cursor,
     )
-    res = list()
-    for project_do in project_dos:
-        res.append(convert_project(project_do))
-    return {"success": True, "data": res}
+    res = {"success": True, "data": await convert_projects(project_dos)}
+    if cursor is not None:
+        res["next_cursor"] = db.next_cursor(project_dos, page_size)
+    return res
 
 
 @router.get(
@@ -411,7 +422,7 @@ async def count_projects_by_condition(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
 
@@ -437,7 +448,7 @@ async def count_projects_by_condition(
         participants.split(",") if participants is not None else None
     )
 
-    res = db.count_projects_by_condition(
+    res = await aio.count_projects_by_condition(
         current_user=_user.user_code,
         project_code=project_code,
         project_name=project_name,
@@ -452,6 +463,34 @@ async def count_projects_by_condition(
     return {"success": True, "data": res}
 
 
+def _parse_date_range(after_date: str, before_date: str):
+    after_date = empty_string_to_none(after_date)
+    before_date = empty_string_to_none(before_date)
+    if after_date is not None:
+        after_date = datetime.strptime(after_date, "%Y-%m-%d").date()
+    if before_date is not None:
+        before_date = datetime.strptime(before_date, "%Y-%m-%d").date()
+    return after_date, before_date
+
+
+async def _status_series(counts: Dict[str, int]) -> Dict[str, int]:
+    metas = await list_metas("ISSUE_STATUS")
+    issue_status = map(lambda meta: meta.meta_value, metas)
+    res = dict.fromkeys(issue_status, 0)
+    for status, count in counts.items():
+        res[status] = res.get(status, 0) + count
+    return res
+
+
+def _date_series(
+    counts: Dict[date, int], after_date: date, before_date: date
+) -> Dict[str, int]:
+    # 统计区间不包含开始日期
+    delta_days = (before_date - after_date).days
+    keys = [after_date + timedelta(days=day + 1) for day in range(delta_days)]
+    return {key.strftime("%Y-%m-%d"): counts.get(key, 0) for key in keys}
+
+
 @router.get(
     "/stat_status", response_model=Dict[str, str | bool | Dict[str, int]]
 )
@@ -469,22 +508,14 @@ async def stat_issue_state(
         before_date: 统计结束日期。
         after_date: 统计开始日期。
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    project_code = empty_string_to_none(project_code)
-    after_date = empty_string_to_none(after_date)
-    before_date = empty_string_to_none(before_date)
-    issues: Sequence["Issue"] = db.list_issues_by_condition(
+    after_date, before_date = _parse_date_range(after_date, before_date)
+    counts = await aio.stat_issues_by_status(
         project_code=project_code, start_date=after_date, end_date=before_date
     )
-    issue_status = map(
-        lambda meta: meta.meta_value, db.list_metas_by_type("ISSUE_STATUS")
-    )
-    res = dict.fromkeys(issue_status, 0)
-    for issue in issues:
-        res[issue.status] += 1
-    return {"success": True, "data": res}
+    return {"success": True, "data": await _status_series(counts)}
 
 
 @router.get(
@@ -504,25 +535,56 @@ async def stat_issue_date(
         before_date: 统计结束日期。
         after_date: 统计开始日期。
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    project_code = empty_string_to_none(project_code)
-    after_date = empty_string_to_none(after_date)
-    before_date = empty_string_to_none(before_date)
-    issues: Sequence["Issue"] = db.list_issues_by_condition(
+    after_date, before_date = _parse_date_range(after_date, before_date)
+    counts = await aio.stat_issues_by_date(
         project_code=project_code, start_date=after_date, end_date=before_date
     )
-    start_date = datetime.strptime(after_date, "%Y-%m-%d")
-    end_date = datetime.strptime(before_date, "%Y-%m-%d")
-    delta_days = (end_date - start_date).days
-    keys = [start_date + timedelta(days=day + 1) for day in range(delta_days)]
-    keys = [key_date.strftime("%Y-%m-%d") for key_date in keys]
-    res = dict.fromkeys(keys, 0)
-    for issue in issues:
-        if issue.propose_date.strftime("%Y-%m-%d") in res.keys():
-            res[issue.propose_date.strftime("%Y-%m-%d")] += 1
-    return {"success": True, "data": res}
+    return {
+        "success": True,
+        "data": _date_series(counts, after_date, before_date),
+    }
+
+
+@router.get(
+    "/stat_issues",
+    response_model=Dict[str, str | bool | Dict[str, Dict[str, int]]],
+)
+async def stat_issues(
+    project_code: str,
+    before_date: str,
+    after_date: str,
+    current_user: Annotated[str | None, Cookie()] = None,
+):
+    """
+    同时统计给定时间范围内议题的状态占比和每日提出的个数，只需一次查询。
+
+    Args:
+        project_code: 项目码。
+        before_date: 统计结束日期。
+        after_date: 统计开始日期。
+    """
+    _user = await check_cookie(cookie=current_user)
+    if _user is None:
+        return {"success": False, "reason": "Invalid token"}
+    after_date, before_date = _parse_date_range(after_date, before_date)
+    counts = await aio.stat_issues_by_date_and_status(
+        project_code=project_code, start_date=after_date, end_date=before_date
+    )
+    status_counts = defaultdict(int)
+    date_counts = defaultdict(int)
+    for (propose_date, status), count in counts.items():
+        status_counts[status] += count
+        date_counts[propose_date] += count
+    return {
+        "success": True,
+        "data": {
+            "status": await _status_series(status_counts),
+            "date": _date_series(date_counts, after_date, before_date),
+        },
+    }
 
 
 @router.get("/gitea_hook_url")
@@ -0,0 +1,83 @@
+from typing import Annotated, Dict, List, Optional
+from fastapi import APIRouter, Cookie
+
+from issuer.config import GET_CONFIG
+from issuer.db import aio
+from issuer.routers.models import SearchRes
+from issuer.routers.users import check_cookie
+from issuer.routers.utils import empty_string_to_none
+
+
+router = APIRouter(
+    prefix="/search",
+    tags=["search"],
+    responses={404: {"description": "Not Found"}},
+)
+
+
+MAX_LIMIT = int(GET_CONFIG("SEARCH_MAX_LIMIT", 100))
+"""单次搜索返回的最大条数"""
+
+
+@router.get("", response_model=Dict[str, bool | str | List[SearchRes]])
+async def search(
+    q: str,
+    project_code: Optional[str] = None,
+    limit: int = 20,
+    current_user: Annotated[str | None, Cookie()] = None,
+):
+    """
+    全文搜索议题标题、描述以及评论内容，按相关度排序。
+
+    Args:
+        q: 查询语句，用空格分隔的各词需同时命中，不区分大小写。
+        project_code: 限定所属项目码。
+        limit: 返回的最大条数，不超过``SEARCH_MAX_LIMIT``。
+        current_user: 请求Cookies，键为:arg:`current_user`，值为 user_code:token
+            形式。
+
+    """
+    _user = await check_cookie(cookie=current_user)
+    if _user is None:
+        return {"success": False, "reason": "Invalid token"}
+    project_code = empty_string_to_none(project_code)
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    # 私有项目只对参与者可见，在搜索时过滤以保证返回的条数
+    hits = await aio.search_issues(
+        q, project_code=project_code, limit=limit, visible_to=_user.user_code
+    )
+    issues = {
+        issue.issue_code: issue
+        for issue in await aio.list_issues_by_codes(
+            [hit.issue_code for hit in hits]
+        )
+    }
+    projects = {
+        project.project_code: project
+        for project in await aio.list_projects_by_codes(
+            [hit.project_code for hit in hits]
+        )
+    }
+
+    res = list()
+    for hit in hits:
+        issue = issues.get(hit.issue_code)
+        project = projects.get(hit.project_code)
+        if issue is None or project is None:
+            continue
+        res.append(
+            SearchRes(
+                doc_type=hit.doc_type,
+                issue_code=issue.issue_code,
+                issue_id=issue.issue_id,
+                comment_code=(
+                    hit.doc_code if hit.doc_type == "comment" else None
+                ),
+                project_code=project.project_code,
+                title=issue.title,
+                snippet=hit.snippet,
+                score=hit.score,
+            )
+        )
+    return {"success": True, "data": res}
@@ -3,6 +3,7 @@ from typing import Annotated, Dict, List, Optional
 from fastapi import APIRouter, Cookie
 
 from issuer import db
+from issuer.db import aio
 from issuer.db import UserGroup, UserToUserGroup
 from issuer.db.models import Activity
 from issuer.routers.convertors import convert_user_group
@@ -40,19 +41,19 @@ async def new_user_group(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     user_group_do = UserGroup(
         group_name=user_group_model.group_name, group_owner=_user.user_code
     )
-    res = db.insert_user_group(user_group=user_group_do)
+    res = await aio.insert_user_group(user_group=user_group_do)
     if res is None:
         return {"success": False}
 
     # 把自己添加入members列表
-    user_group = db.find_user_group_by_code(res)
-    res = db.insert_user_to_user_group(
+    user_group = await aio.find_user_group_by_code(res)
+    res = await aio.insert_user_to_user_group(
         UserToUserGroup(
             user_code=_user.user_code, group_code=user_group.group_code
         )
@@ -61,14 +62,14 @@ async def new_user_group(
     # 把其他人添加入members列表
     if user_group_model.members is not None and user_group_model.members != "":
         for member in user_group_model.members.split(","):
-            db.insert_user_to_user_group(
+            await aio.insert_user_to_user_group(
                 UserToUserGroup(
                     user_code=member, group_code=user_group.group_code
                 )
             )
 
     # 添加用户活动
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=user_group.group_code,
         category=ActivityEnum.NewGroup.name,
@@ -91,18 +92,20 @@ async def delete_user_group(
         current_user: 请求Cookies，键为:arg:`current_user`，值为 user_code:token
             形式。
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
-    user_group = db.find_user_group_by_code(user_group_model.group_code)
+    user_group = await aio.find_user_group_by_code(user_group_model.group_code)
     if user_group.group_owner != _user.user_code:
         return {"success": False, "reason": "Permission denied"}
-    res = db.delete_user_group_by_code(user_group_model.group_code)
+    res = await aio.delete_user_group_by_code(user_group_model.group_code)
     if res is False:
         return {"success": res}
-    res = db.delete_user_to_user_group_by_group(user_group_model.group_code)
+    res = await aio.delete_user_to_user_group_by_group(
+        user_group_model.group_code
+    )
     # 添加用户活动
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=user_group.group_code,
         category=ActivityEnum.DeleteGroup.name,
@@ -127,11 +130,11 @@ async def change_user_group(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     user_group_model = empty_strings_to_none(user_group_model)
-    user_group = db.find_user_group_by_code(user_group_model.group_code)
+    user_group = await aio.find_user_group_by_code(user_group_model.group_code)
     if user_group.group_owner != _user.user_code:
         return {"success": False, "reason": "Permission denied"}
 
@@ -141,9 +144,9 @@ async def change_user_group(
     if user_group_model.owner is not None:
         user_group.group_owner = user_group_model.owner
 
-    res = db.update_user_group_by_code(user_group)
+    res = await aio.update_user_group_by_code(user_group)
     # 添加用户活动
-    activity_helper(
+    await activity_helper(
         subject=_user.user_code,
         target=user_group.group_code,
         category=ActivityEnum.ChangeGroup.name,
@@ -151,14 +154,16 @@ async def change_user_group(
     )
 
     if user_group_model.members is not None:
-        db.delete_user_to_user_group_by_group(user_group_model.group_code)
+        await aio.delete_user_to_user_group_by_group(
+            user_group_model.group_code
+        )
         if user_group.group_owner not in user_group_model.members:
             tmp = user_group_model.members.split(",")
             tmp.append(user_group.group_owner)
             user_group_model.members = ",".join(tmp)
         users = user_group_model.members.split(",")
         for user in users:
-            res = db.insert_user_to_user_group(
+            res = await aio.insert_user_to_user_group(
                 UserToUserGroup(
                     user_code=user, group_code=user_group_model.group_code
                 )
@@ -181,24 +186,24 @@ async def add_user_group(
             :attr:`new_member`是新加入用户的user_code。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     user_group_model = empty_strings_to_none(user_group_model)
-    res = db.insert_user_to_user_group(
+    res = await aio.insert_user_to_user_group(
         UserToUserGroup(
             user_code=user_group_model.new_member,
             group_code=user_group_model.group_code,
         )
     )
     # 添加用户活动
-    user = db.find_user_by_code(user_group_model.new_member)
+    user = await aio.find_user_by_code(user_group_model.new_member)
     if user is None:
         return {"success": False, "reason": "Internal Error"}
-    user_group = db.find_user_group_by_code(user_group_model.group_code)
+    user_group = await aio.find_user_group_by_code(user_group_model.group_code)
     if user_group is None:
         return {"success": False, "reason": "Internal Error"}
-    activity_helper(
+    await activity_helper(
         subject=user.user_code,
         target=user_group.group_code,
         category=ActivityEnum.AddGroup.name,
@@ -226,16 +231,16 @@ async def query_user_group_by_user(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
 
-    user_to_user_groups = db.list_user_to_user_group_by_user(
+    user_to_user_groups = await aio.list_user_to_user_group_by_user(
         user_code=user_code, page_num=page_num, page_size=page_size
     )
     user_groups = list()
     for user_to_user_group in user_to_user_groups:
-        user_group_do = db.find_user_group_by_code(
+        user_group_do = await aio.find_user_group_by_code(
             user_to_user_group.group_code
         )
         if user_group_do is None:
@@ -244,13 +249,14 @@ async def query_user_group_by_user(
                 f"{user_to_user_group.group_code}"
             )
             continue
-        user_group = convert_user_group(user_group_do)
+        user_group = await convert_user_group(user_group_do)
         user_groups.append(user_group)
     return {"success": True, "data": user_groups}
 
 
 @router.get(
-    "/list_groups", response_model=Dict[str, bool | str | List[UserGroupRes]]
+    "/list_groups",
+    response_model=Dict[str, bool | str | List[UserGroupRes] | None],
 )
 async def list_groups_by_condition(
     group_code: Optional[str] = None,
@@ -259,6 +265,7 @@ async def list_groups_by_condition(
     members: Optional[str] = None,
     page_num: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
     current_user: Annotated[str | None, Cookie()] = None,
 ):
     """
@@ -272,31 +279,39 @@ async def list_groups_by_condition(
             字段在SQL中用``OR``连接。
         page_num (int): 页码，默认为1。
         page_size (int): 页数，默认为10。
+        cursor (Optional[str]): 游标，传入空字符串时按创建时间分页并返回第一页，之后
+            传入上一页返回的``next_cursor``。
         current_user: 请求Cookies，键为:arg:`current_user`，值为 user_code:token
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
+    if cursor and db.decode_cursor(cursor) is None:
+        return {"success": False, "reason": "Invalid cursor"}
     group_code = empty_string_to_none(group_code)
     group_name = empty_string_to_none(group_name)
     owner = empty_string_to_none(owner)
     members = empty_string_to_none(members)
     if members is not None:
         members = members.split(",")
-    user_group_dos = db.list_user_group_by_condition(
+    user_group_dos = await aio.list_user_group_by_condition(
         group_code=group_code,
         group_name=group_name,
         owner=owner,
         members=members,
         page_num=page_num,
         page_size=page_size,
+        cursor=cursor,
     )
     user_groups = list()
     for user_group_do in user_group_dos:
-        user_groups.append(convert_user_group(user_group_do))
-    return {"success": True, "data": user_groups}
+        user_groups.append(await convert_user_group(user_group_do))
+    res = {"success": True, "data": user_groups}
+    if cursor is not None:
+        res["next_cursor"] = db.next_cursor(user_group_dos, page_size)
+    return res
 
 
 @router.get("/count_groups", response_model=Dict[str, bool | str | int])
@@ -320,7 +335,7 @@ async def count_groups_by_condition(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {"success": False, "reason": "Invalid token"}
     group_code = empty_string_to_none(group_code)
@@ -329,7 +344,7 @@ async def count_groups_by_condition(
     members = empty_string_to_none(members)
     if members is not None:
         members = members.split(",")
-    count = db.count_user_group_by_condition(
+    count = await aio.count_user_group_by_condition(
         group_code=group_code,
         group_name=group_name,
         owner=owner,
@@ -1,14 +1,20 @@
+import asyncio
 from datetime import datetime
 import hashlib
 import os
 from typing import Annotated, Dict, Optional, Sequence
-from fastapi import APIRouter, Cookie, UploadFile
+from fastapi import APIRouter, Cookie, Request, UploadFile
 
 from issuer import db
+from issuer.db import aio
 from issuer.db import User
-from issuer.routers.convertors import convert_activity, convert_user
+from issuer.routers.convertors import convert_activities, convert_user
 from issuer.routers.models import ActivityModel, UserModel
-from issuer.routers.utils import empty_string_to_none, empty_strings_to_none
+from issuer.routers.utils import (
+    empty_string_to_none,
+    empty_strings_to_none,
+    metas_response,
+)
 
 
 router = APIRouter(
@@ -43,7 +49,7 @@ async def sign_up(user: "UserModel"):
         phone=user.phone,
         avatar=user.avatar,
     )
-    is_success = db.insert_user(user_do)
+    is_success = await aio.insert_user(user_do)
     return {"success": is_success}
 
 
@@ -54,13 +60,11 @@ def generate_token(user_code: str) -> str:
     return md5.hexdigest()
 
 
-def check_cookie(cookie: Optional[str]) -> Optional["User"]:
+async def check_cookie(cookie: Optional[str]) -> Optional["User"]:
     # cookie格式: user_code:token
     if cookie is not None:
         user_code, token = cookie.split(":")
-        user = db.find_user_by_code(user_code)
-        if user is not None and user.token == token:
-            return user
+        return await aio.find_user_by_token(user_code, token)
     return None
 
 
@@ -85,7 +89,7 @@ async def sign_in(
             形式。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is not None:
         return {"success": True, "reason": "Valid token", "user": _user}
 
@@ -93,7 +97,7 @@ async def sign_in(
     md5.update(user.passwd.encode("utf-8"))
     passwd_md5 = md5.hexdigest()
 
-    user = db.find_user_by_email(user.email)
+    user = await aio.find_user_by_email(user.email)
     if user is None:
         return {"success": False, "reason": "Not exist"}
 
@@ -103,7 +107,7 @@ async def sign_in(
         token = generate_token(user.user_code)
         expr = 60 * 60 * 1000
         user.token = token
-        res = db.update_user_by_code(user)
+        res = await aio.update_user_by_code(user)
         if res is False:
             return {"success": False, "reason": "Internal error"}
         else:
@@ -126,16 +130,16 @@ async def sign_out(
         user: :class:`UserModel`模型，必须提供:attr:`user_code`字段。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None or _user.user_code != user.user_code:
         return {
             "success": False,
             "reason": "Invalid token",
         }
 
-    user = db.find_user_by_code(user.user_code)
+    user = await aio.find_user_by_code(user.user_code)
     user.token = None
-    res = db.update_user_by_code(user)
+    res = await aio.update_user_by_code(user)
     return {"success": res}
 
 
@@ -150,13 +154,13 @@ async def change_user(
         user: :class:`UserModel`模型，必填:attr:`user_code`。
 
     """
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None or _user.user_code != user.user_code:
         return {
             "success": False,
             "reason": "Invalid token",
         }
-    user_do = db.find_user_by_code(user.user_code)
+    user_do = await aio.find_user_by_code(user.user_code)
     user = empty_strings_to_none(user)
     if user.user_name is not None:
         user_do.user_name = user.user_name
@@ -175,20 +179,14 @@ async def change_user(
         user_do.phone = user.phone
     if user.avatar is not None:
         user_do.avatar = user.avatar
-    res = db.update_user_by_code(user_do)
+    res = await aio.update_user_by_code(user_do)
     return {"success": res}
 
 
 @router.get("/roles")
-async def query_roles():
-    """获取所有用户角色"""
-    metas = db.list_metas_by_type("USER_ROLE")
-    return {
-        "success": True,
-        "data": [
-            {"value": meta.meta_value, "label": meta.note} for meta in metas
-        ],
-    }
+async def query_roles(request: "Request"):
+    """获取所有用户角色，元数据未变化时返回304"""
+    return await metas_response("USER_ROLE", request)
 
 
 @router.post("/upload_avatar")
@@ -196,7 +194,7 @@ async def upload_avatar(
     file: "UploadFile", current_user: Annotated[str | None, Cookie()] = None
 ):
     """上传头像"""
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {
             "success": False,
@@ -217,36 +215,46 @@ async def upload_avatar(
 async def get_user(
     user_code: str, current_user: Annotated[str | None, Cookie()] = None
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {
             "success": False,
             "reason": "Invalid token",
         }
-    user = db.find_user_by_code(user_code=user_code)
+    user = await aio.find_user_by_code(user_code=user_code)
     if user is not None:
         user_model = convert_user(user)
         return {"success": True, "data": user_model}
 
 
 @router.get(
-    "/users", response_model=Dict[str, str | bool | Sequence[UserModel]]
+    "/users",
+    response_model=Dict[str, str | bool | Sequence[UserModel] | None],
 )
-def get_users(
+async def get_users(
     page_num: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
     current_user: Annotated[str | None, Cookie()] = None,
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {
             "success": False,
             "reason": "Invalid token",
         }
-    users = db.list_users(page_num, page_size)
+    if cursor and db.decode_cursor(cursor) is None:
+        return {"success": False, "reason": "Invalid cursor"}
+    users = await aio.list_users(page_num, page_size, cursor)
     res = []
     for user in users:
         res.append(convert_user(user))
+    if cursor is not None:
+        return {
+            "success": True,
+            "data": res,
+            "next_cursor": db.next_cursor(users, page_size),
+        }
     return {"success": True, "data": res}
 
 
@@ -259,60 +267,80 @@ async def stat_activity_subject(
     limit: Optional[int] = None,
     current_user: Annotated[str | None, Cookie()] = None,
 ):
-    _user = check_cookie(cookie=current_user)
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {
             "success": False,
             "reason": "Invalid token",
         }
     limit = empty_string_to_none(limit)
-    res = list()
-    activities = db.list_activities_by_subject(subject, limit)
-    for activity in activities:
-        res.append(convert_activity(activity))
-    return {"success": True, "data": res}
+    activities = await aio.list_activities_by_subject(subject, limit)
+    return {"success": True, "data": await convert_activities(activities)}
 
 
 @router.get(
-    "/stat_targets",
+    "/stat_subject_archive",
     response_model=Dict[str, bool | str | Sequence[ActivityModel]],
 )
-async def stat_activity_targets(
+async def stat_activity_subject_archive(
+    subject: str,
+    start_date: str,
+    end_date: str,
     limit: Optional[int] = None,
     current_user: Annotated[str | None, Cookie()] = None,
 ):
-    _user = check_cookie(cookie=current_user)
+    """
+    查询已归档的用户活动。
+
+    Args:
+        subject: 活动主体的用户码。
+        start_date: 起始日期，形如2024-06-01。
+        end_date: 结束日期，形如2024-06-30。
+        limit: 返回的最大条数。
+
+    """
+    _user = await check_cookie(cookie=current_user)
     if _user is None:
         return {
             "success": False,
             "reason": "Invalid token",
         }
     limit = empty_string_to_none(limit)
+    try:
+        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError as e:
+        return {
+            "success": False,
+            "reason": str(e),
+        }
+    # 读取归档文件不访问数据库，在线程中执行
+    activities = await asyncio.to_thread(
+        db.list_archived_activities,
+        start_date,
+        end_date,
+        subject=subject,
+        limit=limit,
+    )
+    return {"success": True, "data": await convert_activities(activities)}
 
-    targets = []
-
-    # 获取参与的组织
-    # XXX: 参与的用户组存在上限
-    u2ugs = db.list_user_to_user_group_by_user(_user.user_code, 1, 999)
-    for u2ug in u2ugs:
-        targets.append(u2ug.group_code)
-
-    # 获取参与的项目
-    # XXX: 参与的项目存在上限
-    projects = db.list_project_to_user_by_user(_user.user_code, 1, 999)
-    for project in projects:
-        targets.append(project.project_code)
 
-    # 获取关注的议题
-    # XXX: 关注的议题存在上限
-    issues = db.list_issues_by_condition(
-        follower=_user.user_code, page_size=999
-    )
-    for issue in issues:
-        targets.append(issue.issue_code)
+@router.get(
+    "/stat_targets",
+    response_model=Dict[str, bool | str | Sequence[ActivityModel]],
+)
+async def stat_activity_targets(
+    limit: Optional[int] = None,
+    current_user: Annotated[str | None, Cookie()] = None,
+):
+    _user = await check_cookie(cookie=current_user)
+    if _user is None:
+        return {
+            "success": False,
+            "reason": "Invalid token",
+        }
+    limit = empty_string_to_none(limit)
 
-    activities = db.list_activities_by_targets(targets, limit)
-    res = []
-    for activity in activities:
-        res.append(convert_activity(activity))
-    return {"success": True, "data": res}
+    # 活动在写入时已分发到所属组织、参与项目和关注议题的相关用户的时间线
+    activities = await aio.list_timeline_activities(_user.user_code, limit)
+    return {"success": True, "data": await convert_activities(activities)}
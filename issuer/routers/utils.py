@@ -1,9 +1,12 @@
 import json
-from typing import Dict
+from typing import Dict, Sequence
+from fastapi import Request, Response
 from pydantic import BaseModel
 
-from issuer import db
-from issuer.db.models import Activity
+from issuer.db import METAS_REGISTRY, aio
+from issuer.db.models import Activity, Metas
+from issuer.jobs import JOB_QUEUE
+from issuer.sink import ACTIVITY_SINK
 
 
 def empty_string_to_none(param: str | int):
@@ -18,11 +21,70 @@ def empty_strings_to_none(obj: BaseModel) -> BaseModel:
     return obj
 
 
-def activity_helper(
+async def list_metas(meta_type: str) -> Sequence["Metas"]:
+    """从元数据注册表取出:arg:`meta_type`类型的元数据，只在需要刷新时访问数据库"""
+    snapshot = METAS_REGISTRY.snapshot() or await aio.load_metas()
+    if snapshot is None:
+        return list()
+    return snapshot.metas.get(meta_type, tuple())
+
+
+async def metas_response(meta_type: str, request: "Request") -> "Response":
+    """
+    返回:arg:`meta_type`类型元数据的预先序列化的响应，请求的``If-None-Match``与
+    ETag一致时返回304。
+    """
+    snapshot = METAS_REGISTRY.snapshot() or await aio.load_metas()
+    if snapshot is None:
+        return Response(
+            content=json.dumps(
+                {"success": False, "reason": "Cannot load metas"}
+            ),
+            media_type="application/json",
+        )
+    body, etag = snapshot.response(meta_type)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=body, media_type="application/json", headers=headers
+    )
+
+
+async def activity_helper(
     subject: str, target: str, category: str, kv: Dict[str, str]
-) -> str:
+) -> None:
+    """
+    记录用户活动。批量写入器启动时活动在请求提交后进入其缓冲区，否则提交记录活动
+    的后台任务。
+    """
     ext_info = json.dumps(kv)
-    db.insert_activity(
+    if ACTIVITY_SINK.running:
+        await ACTIVITY_SINK.add(
+            Activity(
+                subject=subject,
+                target=target,
+                category=category,
+                ext_info=ext_info,
+            )
+        )
+        return
+    await JOB_QUEUE.enqueue(
+        "activity",
+        subject=subject,
+        target=target,
+        category=category,
+        ext_info=ext_info,
+    )
+
+
+@JOB_QUEUE.handler("activity")
+async def record_activity(
+    subject: str, target: str, category: str, ext_info: str
+) -> None:
+    res = await aio.insert_activity(
         Activity(
             subject=subject,
             target=target,
@@ -30,3 +92,5 @@ def activity_helper(
             ext_info=ext_info,
         )
     )
+    if not res:
+        raise RuntimeError("Cannot insert an activity")
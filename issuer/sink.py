@@ -0,0 +1,173 @@
+"""
+用户活动的批量写入。请求提交后活动先进入内存缓冲区，由后台协程每隔一段时间或缓冲
+的条数达到阈值时，用:func:`~issuer.db.insert_activities`一次写入，请求不再为每条
+活动单独提交事务。
+
+缓冲区已满时:meth:`ActivitySink.add`会等待下一次写入腾出空间；应用关闭时写入剩余
+的活动。进程异常退出时尚未写入的活动会丢失，活动只用于展示动态，可以接受。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+from issuer.config import GET_CONFIG
+from issuer.db import aio
+from issuer.db.database import on_commit, on_rollback
+from issuer.db.models import Activity
+
+
+Logger = logging.getLogger(__name__)
+
+
+class ActivitySink:
+    """
+    活动的批量写入器。
+
+    Args:
+        flush_rows: 缓冲条数达到该值时立即写入。
+        flush_interval: 两次写入的最长间隔秒数。
+        max_buffer: 缓冲区容量，为0时不启用批量写入。
+
+    """
+
+    def __init__(
+        self, flush_rows: int, flush_interval: float, max_buffer: int
+    ) -> None:
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.running = False
+        self._buffer: List["Activity"] = list()
+        self._reserved = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.flushes = 0
+        self.rows = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+        self.last_flush = 0.0
+        self.total_flush = 0.0
+        self.max_flush = 0.0
+
+    async def add(self, activity: "Activity") -> None:
+        """
+        在当前会话作用域提交后将活动放入缓冲区，作用域回滚时丢弃。调用时即占用
+        缓冲区的一个位置，缓冲区已满时先等待写入。
+        """
+        while not self._has_space():
+            self.backpressure_waits += 1
+            self._space.clear()
+            self._wakeup.set()
+            await self._space.wait()
+        # 活动在提交后才放入缓冲区，先占位以免并发的请求都通过容量检查
+        self._reserved += 1
+        on_commit(lambda: self._call_in_loop(self._append, activity))
+        on_rollback(lambda: self._call_in_loop(self._release))
+
+    def _has_space(self) -> bool:
+        return len(self._buffer) + self._reserved < self.max_buffer
+
+    def _call_in_loop(self, fn: Callable[..., None], *args) -> None:
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            fn(*args)
+        else:
+            # 线程池执行方式下提交、回滚的回调在线程池中执行
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _release(self) -> None:
+        self._reserved -= 1
+        if self._has_space():
+            self._space.set()
+
+    def _append(self, activity: "Activity") -> None:
+        self._reserved -= 1
+        self._buffer.append(activity)
+        # 缓冲区已满时可能有请求在等待，立即写入
+        if len(self._buffer) >= self.flush_rows or not self._has_space():
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """写入缓冲区中的全部活动，失败时放回缓冲区，超出容量的部分丢弃"""
+        async with self._flush_lock:
+            if len(self._buffer) == 0:
+                return
+            rows, self._buffer = self._buffer, list()
+            start = time.perf_counter()
+            res = await aio.insert_activities(rows)
+            duration = time.perf_counter() - start
+            self.flushes += 1
+            self.last_flush = duration
+            self.total_flush += duration
+            self.max_flush = max(self.max_flush, duration)
+            if res:
+                self.rows += len(rows)
+            else:
+                Logger.error(f"Cannot flush {len(rows)} activities")
+                rows = rows + self._buffer
+                # 为已占位但尚未提交的活动保留位置
+                self._buffer = rows[: max(self.max_buffer - self._reserved, 0)]
+                self.dropped += len(rows) - len(self._buffer)
+            if self._has_space():
+                self._space.set()
+
+    async def _run(self) -> None:
+        while self.running:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        if self.running or self.max_buffer <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台协程并写入剩余的活动"""
+        if not self.running:
+            return
+        self.running = False
+        self._wakeup.set()
+        await self._task
+        await self.flush()
+        self._space.set()
+
+    def stats(self) -> Dict[str, float]:
+        flushes = max(self.flushes, 1)
+        return {
+            "buffered": len(self._buffer),
+            "reserved": self._reserved,
+            "flushes": self.flushes,
+            "rows": self.rows,
+            "dropped": self.dropped,
+            "backpressure_waits": self.backpressure_waits,
+            "last_flush_ms": self.last_flush * 1000,
+            "avg_flush_ms": self.total_flush / flushes * 1000,
+            "max_flush_ms": self.max_flush * 1000,
+        }
+
+
+ACTIVITY_SINK = ActivitySink(
+    flush_rows=int(GET_CONFIG("ACTIVITY_FLUSH_ROWS", 100)),
+    flush_interval=int(GET_CONFIG("ACTIVITY_FLUSH_INTERVAL_MS", 200)) / 1000,
+    max_buffer=int(GET_CONFIG("ACTIVITY_BUFFER_SIZE", 10000)),
+)
+"""应用使用的活动写入器，在应用启动时启动"""
@@ -0,0 +1,146 @@
+"""
+SQLite引擎配置基准测试，在读写并发下对比不同日志模式、同步级别和缓存设置的吞吐量，
+每种配置在独立的进程和临时数据库中运行。
+
+    python scripts/bench_engine.py --writes 1000 --reads 2000 --threads 8
+    python scripts/bench_engine.py --profiles rollback tuned
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+PROFILES = {
+    "rollback": {
+        "DB_SQLITE_JOURNAL_MODE": "DELETE",
+        "DB_SQLITE_SYNCHRONOUS": "FULL",
+        "DB_SQLITE_CACHE_SIZE": "",
+        "DB_SQLITE_MMAP_SIZE": "",
+    },
+    "wal": {
+        "DB_SQLITE_JOURNAL_MODE": "WAL",
+        "DB_SQLITE_SYNCHRONOUS": "FULL",
+        "DB_SQLITE_CACHE_SIZE": "",
+        "DB_SQLITE_MMAP_SIZE": "",
+    },
+    "wal_normal": {
+        "DB_SQLITE_JOURNAL_MODE": "WAL",
+        "DB_SQLITE_SYNCHRONOUS": "NORMAL",
+        "DB_SQLITE_CACHE_SIZE": "",
+        "DB_SQLITE_MMAP_SIZE": "",
+    },
+    "tuned": dict(),
+}
+"""各配置覆盖的环境变量，tuned使用默认配置"""
+
+
+def run_profile(args) -> None:
+    db_dir = tempfile.mkdtemp()
+    os.environ["DB_URL"] = "sqlite:///" + os.path.join(db_dir, "bench.db")
+    os.environ.update(PROFILES[args.profile])
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+    from issuer.db import Issue, insert_issue, list_issues_by_condition
+    from issuer.db.database import DatabaseFactory, session_scope
+
+    DatabaseFactory.get_db()
+
+    def write(i: int) -> bool:
+        with session_scope():
+            return (
+                insert_issue(
+                    Issue(
+                        project_code="PJ1",
+                        title=f"issue {i}",
+                        owner="US1",
+                        status="open",
+                    )
+                )
+                is not None
+            )
+
+    def read(i: int) -> bool:
+        list_issues_by_condition(project_code="PJ1", page_size=20)
+        return True
+
+    tasks = [(write, i) for i in range(args.writes)]
+    tasks += [(read, i) for i in range(args.reads)]
+    # 读写交错提交，使读取与写入并发
+    tasks.sort(key=lambda task: task[1] / (1 + (task[0] is read)))
+    durations = {write: 0.0, read: 0.0}
+    failed = 0
+    lock = threading.Lock()
+
+    def run(task) -> None:
+        nonlocal failed
+        func, i = task
+        start = time.perf_counter()
+        success = func(i)
+        duration = time.perf_counter() - start
+        with lock:
+            durations[func] += duration
+            failed += 0 if success else 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(run, tasks))
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "total": len(tasks) / elapsed,
+                "write_ms": durations[write] / max(args.writes, 1) * 1000,
+                "read_ms": durations[read] / max(args.reads, 1) * 1000,
+                "failed": failed,
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--reads", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES))
+    parser.add_argument("--profile", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile is not None:
+        run_profile(args)
+        return
+    for profile in args.profiles:
+        output = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--profile",
+                profile,
+                "--writes",
+                str(args.writes),
+                "--reads",
+                str(args.reads),
+                "--threads",
+                str(args.threads),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        res = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{profile}: {res['total']:.1f} ops/s, "
+            f"write={res['write_ms']:.2f}ms, read={res['read_ms']:.2f}ms, "
+            f"failed={res['failed']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+推送回调解析的微基准测试，对比旧的GiteaAdaptor解析方式（每次调用编译正则，链接和
+议题引用各扫描一次）与预编译的单次扫描分词器，不访问数据库。
+
+    python scripts/bench_forge.py --commits 10000 --rounds 5
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+
+def legacy_parse(message: str):
+    pattern = re.compile(r"https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+")
+    urls = re.findall(pattern=pattern, string=message)
+    pattern = re.compile(r"\$\d+")
+    res = re.findall(pattern=pattern, string=message)
+    return list(map(lambda t: int(t[1]), res)), urls
+
+
+def make_payload(commits: int) -> dict:
+    words = ["update", "refactor", "docs", "test", "cleanup", "bump"]
+    rng = random.Random(0)
+    payload = {"commits": list()}
+    for i in range(commits):
+        message = " ".join(rng.choice(words) for _ in range(8))
+        if i % 2 == 0:
+            message = f"fixes ${rng.randint(1, 500)} " + message
+        if i % 5 == 0:
+            message += f" see https://ci.example.com/build/{i}"
+        payload["commits"].append(
+            {
+                "id": f"{i:040x}",
+                "message": message,
+                "url": f"https://git.example.com/repo/commit/{i:040x}",
+                "author": {"name": "bench", "username": "bench"},
+            }
+        )
+    return payload
+
+
+def timed(fn, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commits", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+    from issuer.ext import ADAPTORS, tokenize
+
+    payload = make_payload(args.commits)
+    messages = [commit["message"] for commit in payload["commits"]]
+
+    legacy = timed(lambda: [legacy_parse(m) for m in messages], args.rounds)
+    single = timed(lambda: [tokenize(m) for m in messages], args.rounds)
+    print(f"legacy: {legacy * 1000:.1f}ms")
+    print(f"tokenize: {single * 1000:.1f}ms")
+    for name, adaptor in ADAPTORS.items():
+        forge = adaptor("PJ1")
+        elapsed = timed(
+            lambda: [
+                tokenize(commit.message)
+                for commit in forge.extract_commits(payload)
+            ],
+            args.rounds,
+        )
+        print(
+            f"{name}: {elapsed * 1000:.1f}ms, "
+            f"{args.commits / elapsed:.0f} commits/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
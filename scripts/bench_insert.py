@@ -0,0 +1,95 @@
+"""
+议题与评论写入吞吐量基准测试，使用临时的SQLite数据库。
+
+    python scripts/bench_insert.py --count 2000 --threads 8
+    python scripts/bench_insert.py --legacy  # 对比旧的Generator发号方式
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os
+import sys
+import tempfile
+import time
+
+
+def legacy_generate_code(meta_type: str) -> str:
+    from sqlmodel import Session, select
+
+    from issuer.db.database import DatabaseFactory
+    from issuer.db.models import Generator
+
+    engine = DatabaseFactory.get_db().get_engine()
+    with Session(engine) as session:
+        session.add(Generator(meta_type=meta_type))
+        session.commit()
+    with Session(engine) as session:
+        statement = select(Generator).order_by(Generator.id.desc()).limit(1)
+        return meta_type + str(session.exec(statement).first().id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp()
+    os.environ["DB_URL"] = "sqlite:///" + os.path.join(db_dir, "bench.db")
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+    from issuer.db import Issue, IssueComment, insert_issue
+    from issuer.db import insert_issue_comment
+    from issuer.db import issue as issue_module
+    from issuer.db import issue_comment as issue_comment_module
+    from issuer.db.database import DatabaseFactory, session_scope
+
+    DatabaseFactory.get_db()
+    if args.legacy:
+        issue_module.generate_code = legacy_generate_code
+        issue_comment_module.generate_code = legacy_generate_code
+
+    def create_issue(i: int) -> str:
+        # 与HTTP请求一致，每次写入处于独立的会话作用域中
+        with session_scope():
+            return insert_issue(
+                Issue(
+                    project_code="PJ1",
+                    title=f"issue {i}",
+                    owner="US1",
+                    status="open",
+                )
+            )
+
+    def create_comment(i: int) -> str:
+        with session_scope():
+            return insert_issue_comment(
+                IssueComment(
+                    issue_code="IS1",
+                    comment_time=datetime.now(),
+                    commenter="US1",
+                    fold=False,
+                    content=f"comment {i}",
+                )
+            )
+
+    for name, func in (
+        ("insert_issue", create_issue),
+        ("insert_issue_comment", create_comment),
+    ):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            codes = list(executor.map(func, range(args.count)))
+        elapsed = time.perf_counter() - start
+        failed = codes.count(None)
+        duplicated = len(codes) - failed - len(set(codes) - {None})
+        print(
+            f"{name}: {args.count / elapsed:.1f} ops/s, "
+            f"failed={failed}, duplicated={duplicated}"
+        )
+
+
+if __name__ == "__main__":
+    main()
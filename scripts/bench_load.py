@@ -0,0 +1,164 @@
+"""
+并发负载测试，对比``db``函数在事件循环中同步执行、交给线程池执行以及通过异步引擎
+执行时的吞吐量和延迟，每种执行方式在独立的进程和临时SQLite数据库中运行。
+
+同步执行时每个进行中的请求都占用一个连接，并发数超过连接池容量（默认15）后获取
+连接会阻塞事件循环，请求将一直等待到连接池超时。
+
+    python scripts/bench_load.py --clients 8 --requests 50
+    python scripts/bench_load.py --modes async  # 只测试异步引擎
+"""
+
+import argparse
+import asyncio
+from datetime import date, timedelta
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Tuple
+
+
+def seed(issues: int) -> Tuple[str, str]:
+    """创建测试用户、项目和议题，返回登录Cookie"""
+    from issuer.db import Issue, Project, ProjectToUser, User
+    from issuer.db import insert_issue, insert_project, insert_project_to_user
+    from issuer.db import insert_user, update_user_by_code
+    from issuer.db.database import session_scope
+
+    with session_scope():
+        user = User(
+            user_name="bench", passwd="bench", role="default", email="bench"
+        )
+        insert_user(user)
+        user.token = "bench"
+        update_user_by_code(user)
+        project_code = insert_project(
+            Project(
+                project_name="bench",
+                owner=user.user_code,
+                status="start",
+                privilege="Public",
+            )
+        )
+        insert_project_to_user(
+            ProjectToUser(project_code=project_code, user_code=user.user_code)
+        )
+    for i in range(issues):
+        with session_scope():
+            insert_issue(
+                Issue(
+                    project_code=project_code,
+                    title=f"issue {i}",
+                    owner=user.user_code,
+                    status="open",
+                    followers=user.user_code,
+                )
+            )
+    return f"{user.user_code}:bench", project_code
+
+
+async def load(
+    cookie: str, project_code: str, clients: int, requests: int
+) -> dict:
+    import httpx
+
+    from issuer.main import app
+
+    after_date = date.today() - timedelta(days=30)
+    paths = [
+        f"/issue/list_issues?project_code={project_code}&page_size=20",
+        f"/project/stat_issues?project_code={project_code}"
+        f"&after_date={after_date}&before_date={date.today()}",
+        "/users/stat_targets?limit=20",
+    ]
+    latencies = list()
+    failed = 0
+
+    async def client(transport) -> None:
+        nonlocal failed
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            cookies={"current_user": cookie},
+        ) as session:
+            for i in range(requests):
+                start = time.perf_counter()
+                res = await session.get(paths[i % len(paths)])
+                latencies.append(time.perf_counter() - start)
+                if res.status_code != 200 or not res.json()["success"]:
+                    failed += 1
+
+    transport = httpx.ASGITransport(app=app)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(transport) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "failed": failed,
+    }
+
+
+def run_mode(args) -> None:
+    db_dir = tempfile.mkdtemp()
+    os.environ["DB_URL"] = "sqlite:///" + os.path.join(db_dir, "bench.db")
+    os.environ["DB_EXECUTION_MODE"] = args.mode
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+    from issuer.db import run_migrations
+    from issuer.db.database import DatabaseFactory
+
+    DatabaseFactory.get_db()
+    run_migrations()
+    cookie, project_code = seed(args.issues)
+    res = asyncio.run(load(cookie, project_code, args.clients, args.requests))
+    print(json.dumps(res))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--issues", type=int, default=200)
+    parser.add_argument(
+        "--modes", nargs="+", default=["sync", "threadpool", "async"]
+    )
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        run_mode(args)
+        return
+    for mode in args.modes:
+        output = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--mode",
+                mode,
+                "--clients",
+                str(args.clients),
+                "--requests",
+                str(args.requests),
+                "--issues",
+                str(args.issues),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        res = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode}: {res['rps']:.1f} req/s, p50={res['p50']:.1f}ms, "
+            f"p95={res['p95']:.1f}ms, failed={res['failed']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
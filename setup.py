@@ -12,6 +12,7 @@ setup(
     packages=['issuer'],
     install_requires=['fastapi>=0.111',
                       'sqlmodel',
+                      'aiosqlite>=0.20.0',
                       'httpx>=0.27.0',
                       'python-multipart>=0.0.9',
                       'python-dotenv>=1.0.1'],
@@ -4,10 +4,14 @@ import pytest
 from issuer.db import (
     delete_activity_by_create_time,
     insert_activity,
+    insert_activities,
     list_activities_by_subject,
     list_activities_by_targets,
+    list_timeline_activities,
+    insert_project_to_user,
+    delete_project_to_user_by_project,
 )
-from issuer.db import Activity
+from issuer.db import Activity, ProjectToUser
 
 
 def setup_function(function):
@@ -38,3 +42,58 @@ def test_list_activities():
 
     res = list_activities_by_targets(["test1", "test2"])
     assert len(res) == 2
+
+
+def test_list_timeline_activities():
+    insert_project_to_user(
+        ProjectToUser(project_code="project", user_code="member")
+    )
+
+    activity = Activity(subject="test", target="project", category="NEW")
+    res = insert_activity(activity)
+    assert res is True
+
+    activity = Activity(subject="test", target="other", category="NEW")
+    res = insert_activity(activity)
+    assert res is True
+
+    res = list_timeline_activities("member")
+    assert len(res) == 1 and res[0].target == "project"
+    assert list_timeline_activities("test") == []
+
+    delete_project_to_user_by_project("project")
+
+
+def test_delete_activity_in_chunks(monkeypatch):
+    monkeypatch.setattr("issuer.db.bulk.DELETE_CHUNK_SIZE", 2)
+    insert_project_to_user(
+        ProjectToUser(project_code="project", user_code="member")
+    )
+    for _ in range(5):
+        activity = Activity(subject="test", target="project", category="NEW")
+        assert insert_activity(activity) is True
+    assert len(list_timeline_activities("member")) == 5
+
+    res = delete_activity_by_create_time(datetime.now())
+    assert res is True
+    assert list_activities_by_subject("test") == []
+    assert list_timeline_activities("member") == []
+
+    delete_project_to_user_by_project("project")
+
+
+def test_insert_activities():
+    insert_project_to_user(
+        ProjectToUser(project_code="project", user_code="member")
+    )
+    activities = [
+        Activity(subject="test", target=target, category="NEW")
+        for target in ("project", "other", "project")
+    ]
+    res = insert_activities(activities)
+    assert res is True
+    assert len(list_activities_by_subject("test")) == 3
+    assert len(list_timeline_activities("member")) == 2
+    assert insert_activities([]) is True
+
+    delete_project_to_user_by_project("project")
@@ -0,0 +1,85 @@
+from datetime import date, datetime, timedelta
+import gzip
+
+from issuer.db import (
+    archive_activities,
+    delete_activity_by_create_time,
+    insert_activities,
+    list_activities_by_subject,
+    list_archived_activities,
+)
+from issuer.db import Activity
+from issuer.db.database import DatabaseFactory
+from issuer.db.migrations import ensure_indexes
+
+
+def setup_function(function):
+    delete_activity_by_create_time(datetime.now())
+
+
+def teardown_function(function):
+    delete_activity_by_create_time(datetime.now())
+
+
+def test_archive_activities(tmp_path, monkeypatch):
+    monkeypatch.setenv("ACTIVITY_ARCHIVE_DIR", str(tmp_path))
+    now = datetime.utcnow()
+    old = [datetime(2024, 5, 31, 12), datetime(2024, 6, 1, 12)]
+    activities = [
+        Activity(subject="test", target="test", category="NEW", gmt_create=t)
+        for t in old + [now]
+    ]
+    insert_activities(activities)
+
+    res = archive_activities(now - timedelta(days=1), chunk_size=1)
+    assert res == 2
+    assert sorted(path.name[:17] for path in tmp_path.iterdir()) == [
+        "activity-2024-05.",
+        "activity-2024-06.",
+    ]
+    assert len(list_activities_by_subject("test")) == 1
+
+    res = list_archived_activities(date(2024, 5, 1), date(2024, 6, 30))
+    assert [activity.gmt_create for activity in res] == old[::-1]
+    res = list_archived_activities(
+        date(2024, 6, 1), date(2024, 6, 30), subject="test"
+    )
+    assert len(res) == 1 and res[0].category == "NEW"
+    assert list_archived_activities(date(2024, 7, 1), date(2024, 7, 31)) == []
+
+
+def test_list_archived_activities_skip_broken(tmp_path, monkeypatch):
+    monkeypatch.setenv("ACTIVITY_ARCHIVE_DIR", str(tmp_path))
+    activities = [
+        Activity(
+            subject="test",
+            target="test",
+            category="NEW",
+            gmt_create=datetime(2024, 6, day, 12),
+        )
+        for day in (1, 2)
+    ]
+    insert_activities(activities)
+    assert archive_activities(datetime(2024, 7, 1), chunk_size=1) == 2
+    # 同一次归档的各批写入同一个分片
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # 旧格式的整月文件中混有无法解析的行
+    with gzip.open(tmp_path / "activity-2024-06.jsonl.gz", "wt") as f:
+        f.write("not json\n")
+    (tmp_path / "activity-2024-06.broken.jsonl.gz").write_bytes(b"broken")
+
+    res = list_archived_activities(date(2024, 6, 1), date(2024, 6, 30))
+    assert [activity.gmt_create.day for activity in res] == [2, 1]
+
+
+def test_timeline_activity_id_index():
+    engine = DatabaseFactory.get_db().get_engine()
+    # 已存在的表在启动时补建索引
+    ensure_indexes(engine)
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN "
+            "DELETE FROM timeline WHERE activity_id IN (1, 2)"
+        ).all()
+    assert any("ix_timeline_activity_id" in row[-1] for row in plan)
@@ -0,0 +1,177 @@
+import time
+import pytest
+from sqlalchemy import event
+from sqlmodel import SQLModel
+
+from issuer.db import (
+    DatabaseFactory,
+    User,
+    delete_all_users,
+    find_user_by_code,
+    find_user_by_email,
+    insert_user,
+)
+from issuer.db.database import (
+    LAST_WRITE_COOKIE,
+    RECENT_WRITERS,
+    Database,
+    session_scope,
+    set_rollback,
+    wrote_recently,
+)
+
+
+def setup_function(function):
+    delete_all_users()
+
+
+def teardown_function(function):
+    delete_all_users()
+
+
+def count_selects(statements):
+    return len([s for s in statements if s.startswith("SELECT")])
+
+
+@pytest.fixture
+def statements():
+    engine = DatabaseFactory.get_db().get_engine()
+    res = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        res.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield res
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_identity_map(statements):
+    user = User(user_name="test", passwd="test", role="admin", email="test")
+    assert insert_user(user) is True
+
+    with session_scope():
+        first = find_user_by_code(user.user_code)
+        assert first is not None
+        selects = count_selects(statements)
+        second = find_user_by_code(user.user_code)
+        assert second is first
+        assert count_selects(statements) == selects
+
+
+def test_commit_at_scope_end():
+    with session_scope():
+        user = User(
+            user_name="test", passwd="test", role="admin", email="test"
+        )
+        assert insert_user(user) is True
+        user_code = user.user_code
+    assert find_user_by_code(user_code) is not None
+
+    with pytest.raises(RuntimeError):
+        with session_scope():
+            user = User(
+                user_name="foo", passwd="test", role="admin", email="foo"
+            )
+            assert insert_user(user) is True
+            user_code = user.user_code
+            raise RuntimeError()
+    assert find_user_by_code(user_code) is None
+
+
+def test_set_rollback():
+    with session_scope():
+        user = User(
+            user_name="test", passwd="test", role="admin", email="test"
+        )
+        assert insert_user(user) is True
+        user_code = user.user_code
+        set_rollback()
+    assert find_user_by_code(user_code) is None
+
+
+def test_failed_write_keeps_scope():
+    with session_scope():
+        user = User(
+            user_name="test", passwd="test", role="admin", email="test"
+        )
+        assert insert_user(user) is True
+        user_code = user.user_code
+
+        duplicated = User(
+            user_name="test", passwd="test", role="admin", email="test"
+        )
+        assert insert_user(duplicated) is False
+    assert find_user_by_code(user_code) is not None
+
+
+@pytest.fixture
+def replica_db(tmp_path, monkeypatch):
+    # 用两个本地SQLite文件模拟主库和未同步的只读副本
+    db = Database(
+        url="sqlite:///" + str(tmp_path / "primary.db"),
+        read_urls=["sqlite:///" + str(tmp_path / "replica.db")],
+    )
+    SQLModel.metadata.create_all(db.read_engines[0])
+    monkeypatch.setattr(DatabaseFactory, "db", db)
+    RECENT_WRITERS.clear()
+    yield db
+    RECENT_WRITERS.clear()
+
+
+def _user(email: str) -> "User":
+    return User(user_name="test", passwd="test", role="admin", email=email)
+
+
+def test_read_replica(replica_db):
+    insert_user(_user("primary"))
+    # 读取走副本，副本上还没有这条数据
+    assert find_user_by_email("primary") is None
+    with session_scope():
+        assert find_user_by_email("primary") is None
+
+
+def test_read_your_writes(replica_db):
+    with session_scope(sticky_key="writer"):
+        insert_user(_user("writer"))
+        assert find_user_by_email("writer") is not None
+
+    # 刚写入过的请求方继续读主库，其他请求方读副本
+    with session_scope(sticky_key="writer"):
+        assert find_user_by_email("writer") is not None
+    with session_scope(sticky_key="other"):
+        assert find_user_by_email("writer") is None
+
+
+def test_read_your_writes_across_processes(replica_db):
+    with session_scope(sticky_key="writer"):
+        insert_user(_user("writer"))
+
+    # 后续请求落在其他进程，进程内的记录不可用，依靠Cookie中的写入时间
+    RECENT_WRITERS.clear()
+    with session_scope(sticky_key="writer"):
+        assert find_user_by_email("writer") is None
+    with session_scope(sticky_key="writer", sticky=True):
+        assert find_user_by_email("writer") is not None
+
+    assert wrote_recently(str(time.time()))
+    assert not wrote_recently(str(time.time() - 3600))
+    assert not wrote_recently(None)
+    assert not wrote_recently("invalid")
+
+
+def test_last_write_cookie(replica_db):
+    from fastapi.testclient import TestClient
+
+    from issuer.main import app
+
+    client = TestClient(app)
+    res = client.post(
+        "/users/sign_up",
+        json={"user_name": "test", "passwd": "test", "email": "cookie"},
+    )
+    assert res.json()["success"] is True
+    assert wrote_recently(res.cookies.get(LAST_WRITE_COOKIE))
+
+    res = client.get("/users/roles")
+    assert LAST_WRITE_COOKIE not in res.cookies
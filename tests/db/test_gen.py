@@ -0,0 +1,126 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from issuer.db import (
+    User,
+    aio,
+    delete_all_users,
+    find_user_by_code,
+    insert_user,
+)
+from issuer.db.bulk import delete_where
+from issuer.db import gen
+from issuer.db.database import (
+    DatabaseFactory,
+    async_session_scope,
+    session_scope,
+)
+from issuer.db.gen import IdAllocator, generate_code, reserve
+from issuer.db.models import Counter
+from sqlalchemy import insert
+from sqlmodel import Session
+
+
+def setup_function(function):
+    delete_all_users()
+
+
+def teardown_function(function):
+    delete_all_users()
+
+
+def test_generate_code():
+    code = generate_code("TS")
+    assert code.startswith("TS")
+    assert int(generate_code("TS")[2:]) > int(code[2:])
+
+
+def test_generate_code_concurrently():
+    allocator = IdAllocator(block_size=8)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        ids = list(executor.map(lambda _: allocator.next_id("TS"), range(200)))
+    assert len(set(ids)) == 200
+
+
+def test_blocks_do_not_overlap():
+    first = IdAllocator(block_size=8)
+    second = IdAllocator(block_size=8)
+    ids = set()
+    for _ in range(20):
+        ids.add(first.next_id("TS"))
+        ids.add(second.next_id("TS"))
+    assert len(ids) == 40
+
+
+def test_reserve():
+    engine = DatabaseFactory.get_db().get_engine()
+    with Session(engine) as session:
+        end = reserve(session, "test:reserve", 10)
+        session.commit()
+    with Session(engine) as session:
+        assert reserve(session, "test:reserve", 1) == end + 1
+        session.commit()
+
+
+def test_reserve_counter_created_concurrently():
+    def initial(session: "Session") -> int:
+        # 模拟其他事务在检查之后抢先创建了计数器
+        session.exec(insert(Counter).values(name="test:race", value=100))
+        return 0
+
+    engine = DatabaseFactory.get_db().get_engine()
+    with Session(engine) as session:
+        delete_where(session, Counter, Counter.name == "test:race")
+        assert reserve(session, "test:race", 5, initial) == 105
+        session.commit()
+
+
+def test_generate_code_in_scope():
+    with session_scope():
+        foo = User(user_name="foo", passwd="test", role="admin", email="foo")
+        assert insert_user(foo) is True
+        bar = User(user_name="bar", passwd="test", role="admin", email="bar")
+        assert insert_user(bar) is True
+        # 已持有写锁时在请求事务中取号
+        assert IdAllocator(block_size=1).next_id("TS") > 0
+    assert foo.user_code != bar.user_code
+    assert find_user_by_code(foo.user_code) is not None
+    assert find_user_by_code(bar.user_code) is not None
+
+
+def test_generate_code_while_other_scope_writes(monkeypatch):
+    # 只有异步执行方式下预留号段不阻塞事件循环
+    monkeypatch.setattr(aio, "EXECUTION_MODE", "async")
+    monkeypatch.setattr(gen, "ID_ALLOCATOR", IdAllocator(block_size=1))
+
+    async def hold_write_lock(locked, release):
+        async with async_session_scope():
+            foo = User(
+                user_code="foo",
+                user_name="foo",
+                passwd="test",
+                role="admin",
+                email="foo",
+            )
+            assert await aio.insert_user(foo) is True
+            locked.set()
+            await release.wait()
+
+    async def allocate():
+        async with async_session_scope():
+            return await aio.run(generate_code, "TS")
+
+    async def run():
+        locked, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(hold_write_lock(locked, release))
+        await locked.wait()
+        allocation = asyncio.create_task(allocate())
+        # 预留号段等待写锁时事件循环仍能调度其他协程
+        await asyncio.sleep(0.2)
+        assert not allocation.done()
+        release.set()
+        await holder
+        return await allocation
+
+    assert asyncio.run(run()).startswith("TS")
+    assert find_user_by_code("foo") is not None
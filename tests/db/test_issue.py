@@ -10,6 +10,11 @@ from issuer.db import (
     update_issue_by_code,
     delete_issue_by_code,
     count_issues_by_condition,
+    find_issue_by_project_and_code_id,
+    stat_issues_by_status,
+    stat_issues_by_date,
+    stat_issues_by_date_and_status,
+    rebuild_project_issue_stats,
 )
 
 
@@ -134,3 +139,113 @@ def test_count_issues_by_condition():
 
     res = count_issues_by_condition(tags=["test1"])
     assert res == 1
+
+
+def test_issue_id():
+    issue_codes = list()
+    for _ in range(3):
+        issue = Issue(
+            project_code="test",
+            title="test",
+            owner="test",
+            propose_date=datetime.now().date(),
+            status="Open",
+        )
+        issue_codes.append(insert_issue(issue))
+    assert delete_issue_by_code(issue_codes[0]) is True
+
+    issue = Issue(
+        project_code="test",
+        title="test",
+        owner="test",
+        propose_date=datetime.now().date(),
+        status="Open",
+    )
+    insert_issue(issue)
+    assert issue.issue_id == 4
+    res = find_issue_by_project_and_code_id("test", 3)
+    assert res.issue_code == issue_codes[2]
+
+
+def test_list_issues_by_relations():
+    foo = Issue(
+        project_code="test",
+        title="foo",
+        owner="test",
+        propose_date=datetime.now().date(),
+        status="Open",
+        followers="US1,US2",
+        assigned="US1",
+        tags="bug,ui",
+    )
+    bar = Issue(
+        project_code="test",
+        title="bar",
+        owner="test",
+        propose_date=datetime.now().date(),
+        status="Open",
+        followers="US12",
+        assigned="US12",
+        tags="bug",
+    )
+    insert_issue(foo)
+    insert_issue(bar)
+
+    issues = list_issues_by_condition(follower="US1")
+    assert [issue.title for issue in issues] == ["foo"]
+    assert count_issues_by_condition(assigned="US12") == 1
+    assert count_issues_by_condition(tags=["bug"]) == 2
+    assert count_issues_by_condition(tags=["bug", "ui"]) == 1
+
+    bar.followers = "US1"
+    update_issue_by_code(bar)
+    assert count_issues_by_condition(follower="US1") == 2
+    assert count_issues_by_condition(follower="US12") == 0
+
+
+def test_stat_issues():
+    for status in ["Open", "Open", "Closed"]:
+        issue = Issue(
+            project_code="test",
+            title="test",
+            owner="test",
+            propose_date=datetime.now().date(),
+            status=status,
+        )
+        insert_issue(issue)
+
+    assert stat_issues_by_status("test") == {"Open": 2, "Closed": 1}
+    assert stat_issues_by_date("test") == {datetime.now().date(): 3}
+    res = stat_issues_by_date_and_status("test")
+    assert res[(datetime.now().date(), "Open")] == 2
+
+
+def test_issue_stats_maintained():
+    issue = Issue(
+        project_code="test",
+        title="test",
+        owner="test",
+        propose_date=datetime.now().date(),
+        status="Open",
+    )
+    insert_issue(issue)
+    assert stat_issues_by_status("test") == {"Open": 1}
+
+    issue.status = "Closed"
+    update_issue_by_code(issue)
+    assert stat_issues_by_status("test") == {"Closed": 1}
+
+    delete_issue_by_code(issue.issue_code)
+    assert stat_issues_by_status("test") == {}
+
+    insert_issue(
+        Issue(
+            project_code="test",
+            title="test",
+            owner="test",
+            propose_date=datetime.now().date(),
+            status="Open",
+        )
+    )
+    assert rebuild_project_issue_stats("test") is True
+    assert stat_issues_by_status("test") == {"Open": 1}
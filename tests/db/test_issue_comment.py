@@ -9,6 +9,7 @@ from issuer.db import (
     list_issue_comment_by_commenter,
     update_issue_comment_by_code,
     find_issue_comment_by_code,
+    search_issues,
 )
 from issuer.db.models import IssueComment
 
@@ -53,6 +54,26 @@ def test_delete_issue_comment_by_issue():
     assert len(res) == 0
 
 
+def test_delete_issue_comment_by_issue_in_chunks(monkeypatch):
+    monkeypatch.setattr("issuer.db.bulk.DELETE_CHUNK_SIZE", 2)
+    for issue_code in ["test"] * 5 + ["other"]:
+        issue_comment = IssueComment(
+            issue_code=issue_code,
+            comment_time=datetime.utcnow(),
+            commenter="test",
+            fold=False,
+            content="chunked comment",
+        )
+        assert insert_issue_comment(issue_comment) is not None
+    assert len(search_issues("chunked")) == 6
+
+    res = delete_issue_comment_by_issue("test")
+    assert res is True
+    assert list_issue_comment_by_issue("test") == []
+    assert len(list_issue_comment_by_issue("other")) == 1
+    assert [hit.issue_code for hit in search_issues("chunked")] == ["other"]
+
+
 def test_change_issue_comment_by_code():
     issue_comment = IssueComment(
         issue_code="test",
@@ -0,0 +1,56 @@
+from issuer.db import (
+    METAS_REGISTRY,
+    delete_metas,
+    insert_metas,
+    list_metas_by_type,
+    load_metas,
+)
+from issuer.db import Metas
+from issuer.db.database import get_session
+from issuer.db.gen import reserve
+from issuer.db.metas import METAS_VERSION
+
+
+META = Metas(meta_type="TEST_TYPE", meta_value="test", note="测试")
+
+
+def setup_function(function):
+    delete_metas(META)
+
+
+def teardown_function(function):
+    delete_metas(META)
+    METAS_REGISTRY.refresh_interval = 30
+
+
+def test_insert_and_delete_metas():
+    assert insert_metas(Metas(**META.model_dump(exclude={"id"})))
+    metas = list_metas_by_type("TEST_TYPE")
+    assert [meta.meta_value for meta in metas] == ["test"]
+    assert load_metas().metas["TEST_TYPE"][0].note == "测试"
+
+    # 重复写入违反唯一约束，版本号不变
+    version = load_metas().version
+    assert not insert_metas(Metas(**META.model_dump(exclude={"id"})))
+    assert load_metas().version == version
+
+    assert delete_metas(META)
+    assert list_metas_by_type("TEST_TYPE") == list()
+    assert "TEST_TYPE" not in load_metas().metas
+
+
+def test_metas_registry():
+    insert_metas(Metas(**META.model_dump(exclude={"id"})))
+    snapshot = load_metas()
+    loads = METAS_REGISTRY.loads
+    assert load_metas() is snapshot
+    assert METAS_REGISTRY.loads == loads
+
+    # 模拟其他进程写入元数据，到达检查间隔后按版本号刷新
+    with get_session() as session:
+        reserve(session, METAS_VERSION)
+        session.commit()
+    assert load_metas() is snapshot
+    METAS_REGISTRY.refresh_interval = 0
+    assert load_metas().version == snapshot.version + 1
+    assert METAS_REGISTRY.loads == loads + 1
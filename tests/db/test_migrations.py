@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from sqlalchemy import delete
+from sqlmodel import Session
+
+from issuer.db import (
+    Issue,
+    IssueFollower,
+    IssueTag,
+    count_issues_by_condition,
+    delete_all_issues,
+    insert_issue,
+    run_migrations,
+)
+from issuer.db.database import DatabaseFactory
+from issuer.db.migrations import _backfill_issue_relations
+
+
+def setup_function(function):
+    delete_all_issues()
+
+
+def teardown_function(function):
+    delete_all_issues()
+
+
+def test_backfill_issue_relations():
+    issue = Issue(
+        project_code="test",
+        title="test",
+        owner="test",
+        propose_date=datetime.now().date(),
+        status="Open",
+        followers="US1,US2",
+        tags="bug",
+    )
+    insert_issue(issue)
+
+    engine = DatabaseFactory.get_db().get_engine()
+    with Session(engine) as session:
+        session.exec(delete(IssueFollower))
+        session.exec(delete(IssueTag))
+        session.commit()
+    assert count_issues_by_condition(follower="US2") == 0
+
+    with Session(engine) as session:
+        _backfill_issue_relations(session)
+        session.commit()
+    assert count_issues_by_condition(follower="US2") == 1
+    assert count_issues_by_condition(tags=["bug"]) == 1
+
+
+def test_run_migrations():
+    run_migrations()
+    run_migrations()
@@ -5,6 +5,7 @@ from issuer.db import (
     delete_all_projects,
     insert_project,
     find_project_by_code,
+    list_projects_by_codes,
     update_project_by_code,
     delete_project_by_code,
     list_project_by_owner,
@@ -12,9 +13,15 @@ from issuer.db import (
     delete_all_project_to_user,
     list_projects_by_condition,
     count_projects_by_condition,
+    delete_project_cascade,
+    insert_issue,
+    insert_issue_comment,
+    count_issues_by_condition,
+    list_issue_comment_by_issue,
+    list_project_to_user_by_project,
 )
 
-from issuer.db import Project, ProjectToUser
+from issuer.db import Issue, IssueComment, Project, ProjectToUser
 
 
 def setup_function(function):
@@ -194,3 +201,65 @@ def test_count_projects_by_condition():
         current_user="test", project_name="foo", participants=["user1"]
     )
     assert res == 0
+
+
+def test_list_projects_by_codes():
+    for code in ("foo", "bar"):
+        project = Project(
+            project_code=code,
+            project_name=code,
+            owner="test",
+            status="start",
+            privilege="public",
+        )
+        res = insert_project(project)
+        assert res is not None
+
+    res = list_projects_by_codes(["foo", "bar", "baz"])
+    assert len(res) == 2
+
+
+def test_delete_project_cascade():
+    project = Project(
+        project_code="test",
+        project_name="bar",
+        owner="test",
+        status="start",
+        privilege="public",
+    )
+    insert_project(project)
+    insert_project_to_user(
+        ProjectToUser(project_code="test", user_code="test")
+    )
+    issue_codes = list()
+    for i in range(12):
+        issue_code = insert_issue(
+            Issue(
+                project_code="test",
+                title=f"issue {i}",
+                owner="test",
+                status="open",
+                followers="test",
+            )
+        )
+        issue_codes.append(issue_code)
+        insert_issue_comment(
+            IssueComment(
+                issue_code=issue_code,
+                commenter="test",
+                comment_time=datetime.datetime.now(),
+                fold=False,
+                content="c",
+            )
+        )
+
+    res = delete_project_cascade("test")
+    assert res["projects"] == 1 and res["issues"] == 12
+    assert res["comments"] == 12 and res["followers"] == 12
+    assert res["members"] == 1
+    assert find_project_by_code("test") is None
+    assert count_issues_by_condition(project_code="test") == 0
+    assert list_issue_comment_by_issue(issue_codes[-1]) == []
+    assert list_project_to_user_by_project("test") == []
+
+    assert delete_project_cascade("test") is None
@@ -11,6 +11,7 @@ from issuer.db import (
     delete_all_project_to_user,
     insert_project_to_user,
     list_project_to_user_by_project,
+    list_project_to_user_by_projects,
     delete_project_to_user_by_project_and_user,
     list_project_to_user_by_user,
     delete_project_to_user_by_project,
@@ -124,3 +125,17 @@ def test_delete_project_to_user_by_project():
 
     res = delete_project_to_user_by_project("foo")
     assert res is True
+
+
+def test_list_project_to_user_by_projects():
+    for project_code, user_code in (("foo", "a"), ("foo", "b"), ("bar", "a")):
+        res = insert_project_to_user(
+            ProjectToUser(project_code=project_code, user_code=user_code)
+        )
+        assert res is True
+
+    res = list_project_to_user_by_projects(["foo", "bar"])
+    assert len(res) == 3
+
+    res = list_project_to_user_by_projects(["foo"])
+    assert [p2u.user_code for p2u in res] == ["a", "b"]
@@ -0,0 +1,129 @@
+from datetime import datetime
+
+import pytest
+
+from issuer.db import (
+    Issue,
+    IssueComment,
+    Project,
+    ProjectToUser,
+    delete_all_issue_comments,
+    delete_all_issues,
+    delete_all_project_to_user,
+    delete_all_projects,
+    delete_issue_by_code,
+    insert_issue,
+    insert_issue_comment,
+    insert_project,
+    insert_project_to_user,
+    search_issues,
+    update_issue_by_code,
+)
+from issuer.db import search
+from issuer.db.search import Fts5Backend, MemoryBackend
+
+
+def setup_function(function):
+    delete_all_issues()
+    delete_all_issue_comments()
+    delete_all_projects()
+    delete_all_project_to_user()
+
+
+def teardown_function(function):
+    delete_all_issues()
+    delete_all_issue_comments()
+    delete_all_projects()
+    delete_all_project_to_user()
+
+
+@pytest.fixture(params=[Fts5Backend, MemoryBackend])
+def backend(request, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_BACKEND", request.param())
+
+
+def new_issue(title, description, project_code="test"):
+    issue = Issue(
+        project_code=project_code,
+        title=title,
+        description=description,
+        owner="test",
+        propose_date=datetime.now().date(),
+        status="Open",
+    )
+    insert_issue(issue)
+    return issue
+
+
+def test_search(backend):
+    foo = new_issue("登录页面崩溃", "点击登录按钮后页面白屏")
+    bar = new_issue("Export report", "The login report cannot be exported")
+    new_issue("其它", "无关内容", project_code="other")
+    insert_issue_comment(
+        IssueComment(
+            issue_code=bar.issue_code,
+            comment_time=datetime.now(),
+            commenter="test",
+            fold=False,
+            content="Reproduced with Firefox",
+        )
+    )
+
+    hits = search_issues("登录")
+    assert {hit.issue_code for hit in hits} == {foo.issue_code}
+    assert "登录" in hits[0].snippet
+
+    hits = search_issues("LOGIN report")
+    assert [hit.issue_code for hit in hits] == [bar.issue_code]
+
+    hits = search_issues("firefox")
+    assert len(hits) == 1
+    assert hits[0].doc_type == "comment"
+
+    assert len(search_issues("内容")) == 1
+    assert len(search_issues("内容", project_code="test")) == 0
+
+    # 标题命中排在内容命中之前
+    baz = new_issue("Report template", "")
+    hits = search_issues("report")
+    assert hits[0].issue_code == baz.issue_code
+
+    foo.title = "Dashboard"
+    foo.description = "Dashboard"
+    update_issue_by_code(foo)
+    assert len(search_issues("崩溃")) == 0
+
+    delete_issue_by_code(bar.issue_code)
+    assert len(search_issues("export")) == 0
+
+
+def test_search_visible_to(backend):
+    for project_code, privilege in [
+        ("public", "Public"),
+        ("private", "Private"),
+        ("joined", "Private"),
+    ]:
+        insert_project(
+            Project(
+                project_code=project_code,
+                project_name=project_code,
+                owner="owner",
+                status="start",
+                privilege=privilege,
+            )
+        )
+    insert_project_to_user(
+        ProjectToUser(project_code="joined", user_code="test")
+    )
+    # 不可见的私有项目相关度更高，过滤后仍应返回足够的条数
+    for _ in range(3):
+        new_issue("crash crash", "crash", project_code="private")
+    new_issue("crash", "", project_code="public")
+    new_issue("crash", "", project_code="joined")
+
+    hits = search_issues("crash", limit=2, visible_to="test")
+    assert {hit.project_code for hit in hits} == {"public", "joined"}
+    hits = search_issues("crash", visible_to="owner")
+    assert len(hits) == 5
+    hits = search_issues("crash", limit=2, visible_to="other")
+    assert [hit.project_code for hit in hits] == ["public"]
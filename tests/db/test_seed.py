@@ -0,0 +1,49 @@
+from issuer.db import (
+    delete_all_users,
+    delete_metas,
+    find_user_by_email,
+    list_metas_by_type,
+    seed_database,
+)
+from issuer.db.seed import get_seed_metas
+
+
+def setup_function(function):
+    delete_all_users()
+    for meta in get_seed_metas():
+        delete_metas(meta)
+
+
+def teardown_function(function):
+    delete_all_users()
+
+
+def test_seed_database():
+    assert seed_database() == {"users": 2, "metas": 9}
+    admin = find_user_by_email("admin@issuer.com")
+    assert admin.role == "admin"
+    assert admin.user_code.startswith("US")
+    assert find_user_by_email("bot@issuer.com") is not None
+    statuses = list_metas_by_type("ISSUE_STATUS")
+    assert {meta.meta_value for meta in statuses} == {
+        "open",
+        "finished",
+        "closed",
+    }
+
+    # 重复执行不写入数据
+    assert seed_database() == {"users": 0, "metas": 0}
+
+
+def test_seed_database_config(monkeypatch):
+    monkeypatch.setenv("SEED_ADMIN_EMAIL", "root@issuer.com")
+    monkeypatch.setenv("SEED_ISSUE_STATUS", "open:开放, blocked:阻塞")
+    assert seed_database() == {"users": 2, "metas": 8}
+    assert find_user_by_email("root@issuer.com") is not None
+    assert find_user_by_email("admin@issuer.com") is None
+    metas = {
+        meta.meta_value: meta.note
+        for meta in list_metas_by_type("ISSUE_STATUS")
+    }
+    assert metas["blocked"] == "阻塞"
+    delete_metas(get_seed_metas()[-1])
@@ -1,4 +1,6 @@
 import pytest
+from sqlalchemy import update
+from sqlmodel import select
 
 from issuer.db import (
     insert_user,
@@ -7,17 +9,35 @@ from issuer.db import (
     find_user_by_email,
     delete_user_by_code,
     find_user_by_code,
+    find_user_by_token,
     list_users,
+    list_users_by_codes,
 )
-from issuer.db import User
+from issuer.db import User, TOKEN_REVOCATIONS, USER_TOKEN_CACHE, next_cursor
+from issuer.db.database import get_session
+from issuer.db.gen import reserve
+from issuer.db.models import Counter
+from issuer.db.users import TOKEN_VERSION
+
+
+REVOCATION_INTERVAL = TOKEN_REVOCATIONS.interval
+
+
+def _sync_token_version(interval: float = 3600) -> None:
+    # 先同步版本号，再调大间隔，避免测试中途清空缓存
+    TOKEN_REVOCATIONS.interval = 0
+    TOKEN_REVOCATIONS.check()
+    TOKEN_REVOCATIONS.interval = interval
 
 
 def setup_function(function):
     delete_all_users()
+    _sync_token_version()
 
 
 def teardown_function(function):
     delete_all_users()
+    TOKEN_REVOCATIONS.interval = REVOCATION_INTERVAL
 
 
 def test_insert_user():
@@ -88,3 +108,117 @@ def test_list_users():
 
     res = list_users()
     assert len(res) == 1
+
+
+def test_list_users_by_codes():
+    for code in ("foo", "bar"):
+        user = User(
+            user_code=code,
+            user_name=code,
+            passwd="test",
+            role="admin",
+            email=code,
+        )
+        res = insert_user(user=user)
+        assert res is True
+
+    res = list_users_by_codes(["foo", "bar", "baz", "foo"])
+    assert sorted(user.user_code for user in res) == ["bar", "foo"]
+
+    res = list_users_by_codes([])
+    assert len(res) == 0
+
+
+def test_find_user_by_token():
+    user = User(
+        user_code="test",
+        user_name="test",
+        passwd="test",
+        role="admin",
+        email="test",
+        token="foo",
+    )
+    res = insert_user(user=user)
+    assert res is True
+
+    assert find_user_by_token("test", "bar") is None
+    assert find_user_by_token("test", "foo") is not None
+    hits = USER_TOKEN_CACHE.stats()["hits"]
+    assert find_user_by_token("test", "foo") is not None
+    assert USER_TOKEN_CACHE.stats()["hits"] == hits + 1
+
+    user.token = None
+    res = update_user_by_code(user)
+    assert res is True
+    assert find_user_by_token("test", "foo") is None
+
+
+def test_token_revocations():
+    user = User(
+        user_code="test",
+        user_name="test",
+        passwd="test",
+        role="admin",
+        email="test",
+        token="foo",
+    )
+    insert_user(user=user)
+    assert find_user_by_token("test", "foo") is not None
+
+    # 模拟其他进程登出：数据库中的令牌和版本号已更新，本进程的缓存仍然有效
+    with get_session() as session:
+        session.exec(
+            update(User).where(User.user_code == "test").values(token=None)
+        )
+        reserve(session, TOKEN_VERSION)
+        session.commit()
+    assert find_user_by_token("test", "foo") is not None
+
+    # 到达检查间隔后发现版本号变化，清空缓存
+    TOKEN_REVOCATIONS.interval = 0
+    assert find_user_by_token("test", "foo") is None
+
+
+def test_list_users_by_cursor():
+    for idx in range(3):
+        user = User(
+            user_name=f"test{idx}",
+            passwd="test",
+            role="admin",
+            email=f"test{idx}",
+        )
+        assert insert_user(user) is True
+
+    users = list_users(page_size=2, cursor="")
+    assert [user.user_name for user in users] == ["test0", "test1"]
+    cursor = next_cursor(users, 2)
+    users = list_users(page_size=2, cursor=cursor)
+    assert [user.user_name for user in users] == ["test2"]
+    assert next_cursor(users, 2) is None
+
+
+def test_sign_in_keeps_token_version():
+    user = User(
+        user_code="test",
+        user_name="test",
+        passwd="test",
+        role="admin",
+        email="test",
+        token="foo",
+    )
+    insert_user(user=user)
+
+    def token_version():
+        with get_session(read_only=True) as session:
+            return session.exec(
+                select(Counter.value).where(Counter.name == TOKEN_VERSION)
+            ).one_or_none()
+
+    version = token_version()
+    user.token = "bar"
+    assert update_user_by_code(user) is True
+    assert token_version() == version
+
+    user.token = None
+    assert update_user_by_code(user) is True
+    assert token_version() != version
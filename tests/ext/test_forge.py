@@ -0,0 +1,50 @@
+from issuer.ext import (
+    GiteaAdaptor,
+    GitHubAdaptor,
+    GitLabAdaptor,
+    get_adaptor,
+    tokenize,
+)
+
+
+def test_tokenize():
+    res = tokenize("Fixes $12 and $3, see http://example.com $12")
+    assert res.ids == [12, 3]
+    assert res.urls == ["http://example.com"]
+    assert res.closes == [12]
+
+    res = tokenize("refs $12, closes: $3, fix the $4")
+    assert res.ids == [12, 3, 4]
+    assert res.closes == [3]
+
+    res = tokenize("refactor")
+    assert res.ids == [] and res.urls == [] and res.closes == []
+
+
+def test_get_adaptor():
+    assert isinstance(get_adaptor("gitea", "PJ1"), GiteaAdaptor)
+    assert isinstance(get_adaptor("gitlab", "PJ1"), GitLabAdaptor)
+    assert get_adaptor("unknown", "PJ1") is None
+
+
+def test_github_extract_commits():
+    payload = {
+        "commits": [
+            {
+                "id": "c1",
+                "message": "fix $1",
+                "url": "http://github/commit/c1",
+                "author": {"name": None, "username": "test"},
+            },
+            {
+                "id": "c2",
+                "message": "fix $2",
+                "url": "http://github/commit/c2",
+                "author": {"name": "test"},
+                "distinct": False,
+            },
+        ]
+    }
+    commits = GitHubAdaptor("PJ1").extract_commits(payload)
+    assert [commit.commit_id for commit in commits] == ["c1"]
+    assert commits[0].author == "test"
@@ -0,0 +1,270 @@
+from fastapi.testclient import TestClient
+
+from issuer import db
+from issuer.db import (
+    Issue,
+    Project,
+    User,
+    delete_all_issue_comments,
+    delete_all_issues,
+    delete_all_projects,
+    delete_all_users,
+    delete_all_webhook_deliveries,
+)
+from issuer.ext.base import BOT_CACHE, ForgeAdaptor
+from issuer.jobs import JOB_QUEUE
+from issuer.main import app
+
+
+client = TestClient(app)
+
+
+def setup_function(function):
+    delete_all_users()
+    delete_all_projects()
+    delete_all_issues()
+    delete_all_issue_comments()
+    delete_all_webhook_deliveries()
+    BOT_CACHE.clear()
+
+
+def teardown_function(function):
+    delete_all_users()
+    delete_all_projects()
+    delete_all_issues()
+    delete_all_issue_comments()
+    delete_all_webhook_deliveries()
+    BOT_CACHE.clear()
+
+
+def _commit(message: str) -> dict:
+    return {
+        "author": {"name": "test"},
+        "message": message,
+        "url": "http://gitea/commit",
+    }
+
+
+def test_hook_gitea():
+    db.insert_user(
+        User(
+            user_name="bot", passwd="bot", role="admin", email="bot@issuer.com"
+        )
+    )
+    db.insert_project(
+        Project(
+            project_code="PJ1",
+            project_name="test",
+            owner="test",
+            status="start",
+            privilege="public",
+        )
+    )
+    issue_codes = [
+        db.insert_issue(
+            Issue(
+                project_code="PJ1", title="test", owner="test", status="open"
+            )
+        )
+        for _ in range(3)
+    ]
+
+    res = client.post(
+        "/hooks/project/PJ1",
+        json={
+            "commits": [
+                _commit("fix $1 see http://example.com"),
+                _commit("fix $2 and $9"),
+                _commit("refs $3"),
+                _commit("refactor"),
+            ]
+        },
+    )
+    assert res.status_code == 202
+    assert res.json()["success"] is True
+    for issue_code in issue_codes:
+        assert db.find_issue_by_code(issue_code).status == "finished"
+        comments = db.list_issue_comment_by_issue(issue_code)
+        assert len(comments) == 1
+    assert (
+        "example.com"
+        in db.list_issue_comment_by_issue(issue_codes[0])[0].content
+    )
+
+
+def test_hook_close_by_keyword(monkeypatch):
+    monkeypatch.setattr(ForgeAdaptor, "close_by_keyword", True)
+    db.insert_user(
+        User(
+            user_name="bot", passwd="bot", role="admin", email="bot@issuer.com"
+        )
+    )
+    db.insert_project(
+        Project(
+            project_code="PJ1",
+            project_name="test",
+            owner="test",
+            status="start",
+            privilege="public",
+        )
+    )
+    issue_codes = [
+        db.insert_issue(
+            Issue(
+                project_code="PJ1", title="test", owner="test", status="open"
+            )
+        )
+        for _ in range(2)
+    ]
+
+    res = client.post(
+        "/hooks/project/PJ1",
+        json={"commits": [_commit("fixes $1"), _commit("refs $2")]},
+    )
+    assert res.status_code == 202
+    assert db.find_issue_by_code(issue_codes[0]).status == "finished"
+    # 没有关闭类关键字的引用只添加评论
+    assert db.find_issue_by_code(issue_codes[1]).status == "open"
+    assert len(db.list_issue_comment_by_issue(issue_codes[1])) == 1
+
+
+def test_hook_gitea_dedup():
+    db.insert_user(
+        User(
+            user_name="bot", passwd="bot", role="admin", email="bot@issuer.com"
+        )
+    )
+    db.insert_project(
+        Project(
+            project_code="PJ1",
+            project_name="test",
+            owner="test",
+            status="start",
+            privilege="public",
+        )
+    )
+    issue_code = db.insert_issue(
+        Issue(project_code="PJ1", title="test", owner="test", status="open")
+    )
+    commit = {**_commit("fix $1"), "id": "c1"}
+
+    for delivery, status_code in (("d1", 202), ("d1", 200), ("d2", 200)):
+        res = client.post(
+            "/hooks/project/PJ1",
+            json={"commits": [commit]},
+            headers={"X-Gitea-Delivery": delivery},
+        )
+        assert res.status_code == status_code
+    assert len(db.list_issue_comment_by_issue(issue_code)) == 1
+
+    db.DELIVERY_CACHE.clear()
+    res = client.post(
+        "/hooks/project/PJ1",
+        json={"commits": [commit]},
+        headers={"X-Gitea-Delivery": "d1"},
+    )
+    assert res.json()["duplicate"] is True
+    assert len(db.list_issue_comment_by_issue(issue_code)) == 1
+
+
+def test_hook_failures(monkeypatch):
+    res = client.post("/hooks/svn/project/PJ1", json={"commits": []})
+    assert res.status_code == 404
+    assert res.json() == {"success": False, "reason": "Unsupported forge"}
+
+    res = client.post("/hooks/project/PJ1", json={"commits": ["c1"]})
+    assert res.status_code == 400
+    assert res.json()["success"] is False
+
+    async def enqueue(name, **payload):
+        raise RuntimeError("queue down")
+
+    monkeypatch.setattr(JOB_QUEUE, "enqueue", enqueue)
+    res = client.post("/hooks/project/PJ1", json={"commits": []})
+    assert res.status_code == 503
+    assert res.json() == {
+        "success": False,
+        "reason": "Cannot enqueue the push",
+    }
+
+
+def test_hook_retry_after_enqueue_failure(monkeypatch):
+    db.insert_user(
+        User(
+            user_name="bot", passwd="bot", role="admin", email="bot@issuer.com"
+        )
+    )
+    db.insert_project(
+        Project(
+            project_code="PJ1",
+            project_name="test",
+            owner="test",
+            status="start",
+            privilege="public",
+        )
+    )
+    issue_code = db.insert_issue(
+        Issue(project_code="PJ1", title="test", owner="test", status="open")
+    )
+    commit = {**_commit("fix $1"), "id": "c1"}
+    enqueue = JOB_QUEUE.enqueue
+
+    async def failing_enqueue(name, **payload):
+        raise RuntimeError("queue down")
+
+    monkeypatch.setattr(JOB_QUEUE, "enqueue", failing_enqueue)
+    res = client.post(
+        "/hooks/project/PJ1",
+        json={"commits": [commit]},
+        headers={"X-Gitea-Delivery": "d1"},
+    )
+    assert res.status_code == 503
+
+    # 投递记录随请求回滚，重试的投递不会被当作重复
+    monkeypatch.setattr(JOB_QUEUE, "enqueue", enqueue)
+    res = client.post(
+        "/hooks/project/PJ1",
+        json={"commits": [commit]},
+        headers={"X-Gitea-Delivery": "d1"},
+    )
+    assert res.status_code == 202
+    assert db.find_issue_by_code(issue_code).status == "finished"
+
+
+def test_hook_inline_failure():
+    db.insert_project(
+        Project(
+            project_code="PJ1",
+            project_name="test",
+            owner="test",
+            status="start",
+            privilege="public",
+        )
+    )
+    issue_code = db.insert_issue(
+        Issue(project_code="PJ1", title="test", owner="test", status="open")
+    )
+    commit = {**_commit("fix $1"), "id": "c1"}
+
+    # 缺少机器人用户，直接执行的任务失败
+    res = client.post(
+        "/hooks/project/PJ1",
+        json={"commits": [commit]},
+        headers={"X-Gitea-Delivery": "d1"},
+    )
+    assert res.status_code == 500
+    assert res.json()["success"] is False
+
+    db.insert_user(
+        User(
+            user_name="bot", passwd="bot", role="admin", email="bot@issuer.com"
+        )
+    )
+    res = client.post(
+        "/hooks/project/PJ1",
+        json={"commits": [commit]},
+        headers={"X-Gitea-Delivery": "d1"},
+    )
+    assert res.status_code == 202
+    assert db.find_issue_by_code(issue_code).status == "finished"
+    assert len(db.list_issue_comment_by_issue(issue_code)) == 1
@@ -277,3 +277,47 @@ def test_follow_issue():
         f"/issue/follow?issue_code={issue_code}&action={0}", cookies=cookie
     )
     assert res.json()["success"] is True
+
+
+def test_list_issues_by_cursor():
+    cookie, user_code = get_cookie()
+    res = client.post(
+        "/project/new",
+        json={
+            "project_name": "test_project",
+            "start_date": "2024-06-05",
+            "privilege": "Start",
+        },
+        cookies=cookie,
+    )
+    assert res.json()["success"] is True
+
+    res = client.get(
+        f"/project/participants?user_code={user_code}", cookies=cookie
+    )
+    project_code = res.json()["data"][0]["project_code"]
+    for idx in range(3):
+        res = client.post(
+            "/issue/new",
+            json={"project_code": project_code, "title": f"test_{idx}"},
+            cookies=cookie,
+        )
+        assert res.json()["success"] is True
+
+    res = client.get("/issue/list_issues?page_size=2&cursor=", cookies=cookie)
+    assert res.json()["success"] is True
+    assert [issue["title"] for issue in res.json()["data"]] == [
+        "test_0",
+        "test_1",
+    ]
+    cursor = res.json()["next_cursor"]
+    assert cursor is not None
+
+    res = client.get(
+        f"/issue/list_issues?page_size=2&cursor={cursor}", cookies=cookie
+    )
+    assert [issue["title"] for issue in res.json()["data"]] == ["test_2"]
+    assert res.json()["next_cursor"] is None
+
+    res = client.get("/issue/list_issues?cursor=foo", cookies=cookie)
+    assert res.json()["success"] is False
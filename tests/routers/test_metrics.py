@@ -0,0 +1,62 @@
+import httpx
+
+from fastapi.testclient import TestClient
+
+from issuer.db.users import delete_all_users
+from issuer.main import app
+
+
+client = TestClient(app)
+
+
+def setup_function(function):
+    delete_all_users()
+
+
+def teardown_function(function):
+    delete_all_users()
+
+
+def _sign_in(role: str) -> "httpx.Cookies":
+    res = client.post(
+        "/users/sign_up",
+        json={
+            "user_name": role,
+            "passwd": "test",
+            "email": role,
+            "role": role,
+        },
+    )
+    assert res.json()["success"] is True
+    res = client.post(
+        "/users/sign_in",
+        json={"user_name": role, "passwd": "test", "email": role},
+    )
+    token = res.json()["token"]
+    user_code = res.json()["user"]["user_code"]
+    cookie = httpx.Cookies()
+    cookie.set(name="current_user", value=f"{user_code}:{token}")
+    return cookie
+
+
+def test_metrics_require_admin():
+    paths = [
+        "/metrics/auth_cache",
+        "/metrics/db_pool",
+        "/metrics/jobs",
+        "/metrics/activity_sink",
+        "/metrics/activity_retention",
+    ]
+    for path in paths:
+        res = client.get(path)
+        assert res.json() == {"success": False, "reason": "Invalid token"}
+
+    cookie = _sign_in("default")
+    for path in paths:
+        res = client.get(path, cookies=cookie)
+        assert res.json()["success"] is False
+
+    cookie = _sign_in("admin")
+    for path in paths:
+        res = client.get(path, cookies=cookie)
+        assert res.json()["success"] is True
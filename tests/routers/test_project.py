@@ -86,6 +86,9 @@ def test_delete_project():
     res = client.post(
         "/project/delete", json={"project_code": project_code}, cookies=cookie
     )
+    assert res.json()["success"] is True
+    assert res.json()["data"]["projects"] == 1
+    assert res.json()["data"]["members"] == 1
     res = db.list_project_by_owner(user_code)
     assert len(res) == 0
 
@@ -300,3 +303,72 @@ def test_stat_issue_date():
     assert res.json()["success"] is True
     assert len(res.json()["data"]) == 5
     assert res.json()["data"][before_date.strftime("%Y-%m-%d")] == 2
+
+
+def test_stat_issues():
+    cookie, user_code = get_cookie()
+    res = client.post(
+        "/project/new",
+        json={
+            "project_name": "test_project",
+            "start_date": "2024-06-05",
+            "privilege": "Start",
+        },
+        cookies=cookie,
+    )
+    assert res.json()["success"] is True
+
+    res = client.get(
+        f"/project/participants?user_code={user_code}", cookies=cookie
+    )
+    assert res.json()["success"] is True
+    project_code = res.json()["data"][0]["project_code"]
+
+    # 超过默认分页大小的议题也需要统计在内
+    for _ in range(12):
+        res = client.post(
+            "/issue/new",
+            json={"project_code": project_code, "title": "test_issue"},
+            cookies=cookie,
+        )
+        assert res.json()["success"] is True
+
+    after_date = datetime.now() - timedelta(days=5)
+    before_date = datetime.now()
+    res = client.get(
+        f'/project/stat_issues?project_code={project_code}&'
+        f'after_date={after_date.strftime("%Y-%m-%d")}&'
+        f'before_date={before_date.strftime("%Y-%m-%d")}',
+        cookies=cookie,
+    )
+    assert res.json()["success"] is True
+    data = res.json()["data"]
+    assert data["status"]["open"] == 12
+    assert len(data["date"]) == 5
+    assert data["date"][before_date.strftime("%Y-%m-%d")] == 12
+
+
+def test_query_status_etag():
+    meta = Metas(meta_type="PROJECT_STATUS", meta_value="start", note="开始")
+    db.delete_metas(meta)
+    db.insert_metas(meta)
+
+    response = client.get("/project/query_status")
+    assert response.status_code == 200
+    assert response.json()["success"]
+    assert {"value": "start", "label": "开始"} in response.json()["data"]
+    etag = response.headers["etag"]
+
+    response = client.get(
+        "/project/query_status", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    # 写入元数据后ETag随内容变化
+    db.delete_metas(meta)
+    response = client.get(
+        "/project/query_status", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert {"value": "start", "label": "开始"} not in response.json()["data"]
+    assert response.headers["etag"] != etag
@@ -0,0 +1,81 @@
+from fastapi.testclient import TestClient
+
+from issuer.db import (
+    delete_all_issue_comments,
+    delete_all_issues,
+    delete_all_project_to_user,
+    delete_all_projects,
+    delete_all_users,
+)
+from issuer.main import app
+from tests.routers.test_user_group import get_cookie
+
+
+client = TestClient(app)
+
+
+def setup_function(function):
+    delete_all_users()
+    delete_all_projects()
+    delete_all_project_to_user()
+    delete_all_issues()
+    delete_all_issue_comments()
+
+
+def teardown_function(function):
+    delete_all_users()
+    delete_all_projects()
+    delete_all_project_to_user()
+    delete_all_issues()
+    delete_all_issue_comments()
+
+
+def test_search():
+    cookie, user_code = get_cookie()
+    res = client.post(
+        "/project/new",
+        json={
+            "project_name": "test_project",
+            "start_date": "2024-06-05",
+            "privilege": "Private",
+        },
+        cookies=cookie,
+    )
+    assert res.json()["success"] is True
+
+    res = client.get(
+        f"/project/participants?user_code={user_code}", cookies=cookie
+    )
+    project_code = res.json()["data"][0]["project_code"]
+    res = client.post(
+        "/issue/new",
+        json={
+            "project_code": project_code,
+            "title": "test_issue",
+            "description": "searchable description",
+        },
+        cookies=cookie,
+    )
+    assert res.json()["success"] is True
+
+    res = client.get("/search?q=searchable", cookies=cookie)
+    assert res.json()["success"] is True
+    assert len(res.json()["data"]) == 1
+    assert res.json()["data"][0]["title"] == "test_issue"
+    assert res.json()["data"][0]["issue_id"] == 1
+
+    res = client.post(
+        "/users/sign_up",
+        json={"user_name": "other", "passwd": "test", "email": "other"},
+    )
+    res = client.post(
+        "/users/sign_in",
+        json={"user_name": "other", "passwd": "test", "email": "other"},
+    )
+    other = res.json()["user"]["user_code"]
+    res = client.get(
+        "/search?q=searchable",
+        cookies={"current_user": f"{other}:{res.json()['token']}"},
+    )
+    assert res.json()["success"] is True
+    assert len(res.json()["data"]) == 0
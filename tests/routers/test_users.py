@@ -277,3 +277,28 @@ def test_stat_activity_targets():
     res = client.get(f"/users/stat_targets?limit={20}", cookies=cookie)
     assert res.json()["success"] is True
     assert len(res.json()["data"]) > 0
+
+
+def test_stat_activity_subject_archive_bad_date():
+    res = client.post(
+        "/users/sign_up",
+        json={"user_name": "test", "passwd": "test", "email": "test"},
+    )
+    assert res.json()["success"] is True
+
+    res = client.post(
+        "/users/sign_in",
+        json={"user_name": "test", "passwd": "test", "email": "test"},
+    )
+    token = res.json()["token"]
+    user_code = res.json()["user"]["user_code"]
+    cookie = httpx.Cookies()
+    cookie.set(name="current_user", value=f"{user_code}:{token}")
+
+    res = client.get(
+        f"/users/stat_subject_archive?subject={user_code}"
+        "&start_date=2024-13-01&end_date=2024-06-30",
+        cookies=cookie,
+    )
+    assert res.status_code == 200
+    assert res.json()["success"] is False
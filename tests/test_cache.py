@@ -0,0 +1,40 @@
+import time
+
+from issuer.cache import TTLCache
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+def test_ttl_expiration():
+    cache = TTLCache(maxsize=2, ttl=0.01)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate():
+    cache = TTLCache(maxsize=4)
+    cache.set(("foo", "1"), 1)
+    cache.set(("foo", "2"), 2)
+    cache.set(("bar", "1"), 3)
+    cache.invalidate(lambda key: key[0] == "foo")
+    assert ("foo", "1") not in cache
+    assert ("foo", "2") not in cache
+    assert ("bar", "1") in cache
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from issuer.db import aio, count_jobs_by_status, delete_all_jobs
+from issuer.jobs import JobQueue
+
+
+def setup_function(function):
+    delete_all_jobs()
+
+
+def teardown_function(function):
+    delete_all_jobs()
+
+
+def test_inline_job():
+    queue = JobQueue(workers=0)
+    calls = list()
+
+    @queue.handler("test")
+    def handler(value: int):
+        calls.append(value)
+
+    assert asyncio.run(queue.enqueue("test", value=1)) is True
+    assert calls == [1]
+    assert count_jobs_by_status() == dict()
+
+    @queue.handler("broken")
+    def broken():
+        raise RuntimeError()
+
+    assert asyncio.run(queue.enqueue("broken")) is False
+
+
+def test_job_retry():
+    queue = JobQueue(workers=2, backoff=0.01, poll_interval=0.01)
+    calls = list()
+
+    @queue.handler("test")
+    async def handler(value: int):
+        calls.append(value)
+        if len(calls) == 1:
+            raise RuntimeError()
+
+    async def run():
+        await queue.start()
+        await queue.enqueue("test", value=1)
+        for _ in range(100):
+            if queue.stats()["completed"] == 1:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert calls == [1, 1]
+    stats = queue.stats()
+    assert stats["retried"] == 1 and stats["completed"] == 1
+    assert count_jobs_by_status() == dict()
+
+
+def test_job_failed():
+    queue = JobQueue(
+        workers=1, max_attempts=2, backoff=0.01, poll_interval=0.01
+    )
+
+    @queue.handler("test")
+    def handler():
+        raise RuntimeError()
+
+    async def run():
+        await queue.start()
+        await queue.enqueue("test")
+        for _ in range(100):
+            if queue.stats()["failed"] == 1:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert queue.stats()["retried"] == 1
+    assert count_jobs_by_status() == {"failed": 1}
+
+
+@pytest.mark.parametrize("mode", ["async", "threadpool", "sync"])
+def test_job_execution_modes(monkeypatch, mode):
+    # 独立会话取出的任务在会话关闭后仍需可读
+    monkeypatch.setattr(aio, "EXECUTION_MODE", mode)
+    queue = JobQueue(workers=1, backoff=0.01, poll_interval=0.01)
+    calls = list()
+
+    @queue.handler("test")
+    def handler(value: int):
+        calls.append(value)
+        if len(calls) == 1:
+            raise RuntimeError()
+
+    async def run():
+        await queue.start()
+        await queue.enqueue("test", value=1)
+        for _ in range(100):
+            if queue.stats()["completed"] == 1:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert calls == [1, 1]
+    assert count_jobs_by_status() == dict()
+
+
+def test_worker_survives_broken_job(monkeypatch):
+    queue = JobQueue(workers=1, poll_interval=0.01)
+    calls = list()
+
+    @queue.handler("test")
+    def handler(value: int):
+        calls.append(value)
+
+    run_job = queue._run_job
+
+    async def broken(job):
+        if job.payload == '{"value": 1}':
+            raise RuntimeError()
+        await run_job(job)
+
+    monkeypatch.setattr(queue, "_run_job", broken)
+
+    async def run():
+        await queue.start()
+        await queue.enqueue("test", value=1)
+        await queue.enqueue("test", value=2)
+        for _ in range(100):
+            if queue.stats()["completed"] == 1:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert calls == [2]
+    assert count_jobs_by_status() == {"running": 1}
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from issuer.db import (
+    Activity,
+    delete_activity_by_create_time,
+    list_activities_by_subject,
+)
+from issuer.db import aio
+from issuer.sink import ActivitySink
+
+
+def setup_function(function):
+    delete_activity_by_create_time(datetime.now())
+
+
+def teardown_function(function):
+    delete_activity_by_create_time(datetime.now())
+
+
+def _activity() -> "Activity":
+    return Activity(subject="test", target="test", category="NEW")
+
+
+def test_flush_by_rows():
+    sink = ActivitySink(flush_rows=3, flush_interval=60, max_buffer=100)
+
+    async def run():
+        await sink.start()
+        for _ in range(3):
+            await sink.add(_activity())
+        for _ in range(100):
+            if sink.stats()["rows"] == 3:
+                break
+            await asyncio.sleep(0.01)
+        await sink.add(_activity())
+        await sink.stop()
+
+    asyncio.run(run())
+    assert len(list_activities_by_subject("test")) == 4
+    stats = sink.stats()
+    assert stats["flushes"] == 2 and stats["buffered"] == 0
+
+
+def test_backpressure():
+    sink = ActivitySink(flush_rows=100, flush_interval=60, max_buffer=2)
+
+    async def run():
+        await sink.start()
+        await asyncio.gather(*[sink.add(_activity()) for _ in range(5)])
+        await sink.stop()
+
+    asyncio.run(run())
+    assert len(list_activities_by_subject("test")) == 5
+    assert sink.stats()["backpressure_waits"] > 0
+
+
+@pytest.mark.parametrize("mode", ["async", "threadpool", "sync"])
+def test_reserve_before_commit(monkeypatch, mode):
+    # 线程池执行方式下提交和回滚回调在线程池中执行
+    monkeypatch.setattr(aio, "EXECUTION_MODE", mode)
+    sink = ActivitySink(flush_rows=100, flush_interval=60, max_buffer=2)
+
+    async def request(release, fail=False):
+        async with aio.request_scope():
+            await sink.add(_activity())
+            await release.wait()
+            if fail:
+                raise RuntimeError()
+
+    async def run():
+        await sink.start()
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(request(release, fail=idx == 0))
+            for idx in range(5)
+        ]
+        await asyncio.sleep(0.05)
+        # 活动尚未提交，缓冲区为空，但只有两个请求占到了位置
+        assert sink.stats()["buffered"] == 0
+        assert sink.stats()["reserved"] == 2
+        release.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await sink.stop()
+
+    asyncio.run(run())
+    # 回滚的请求释放了位置，其余活动全部写入
+    assert len(list_activities_by_subject("test")) == 4
+    assert sink.stats()["reserved"] == 0